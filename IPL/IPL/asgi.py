@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'IPL.settings')
 
 application = get_asgi_application()
+
+# Load the active model and the current features now rather than on the
+# first request
+from api.registry import registry  # noqa: E402
+
+registry.warm()
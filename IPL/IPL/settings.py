@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,8 +48,6 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'scraper.apps.ScraperConfig',
     'dashboard.apps.DashboardConfig',
-    'dashboard',
-    'dashboard',
 ]
 
 # Django REST Framework settings
@@ -106,9 +105,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Scraper worker processes write concurrently; take the write lock
+        # up front and wait for it instead of failing with "database is locked"
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Persistent connections suit WSGI workers, which reuse one thread per
+        # request. Under ASGI each request's queries run on executor threads,
+        # so keep DJANGO_CONN_MAX_AGE at 0 there and rely on the database's
+        # own pooling; health checks drop connections that went stale
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Cache
+# API responses are cached here and expired when the models they read change.
+# Scraper workers run in separate processes, so the cache has to be shared
+# between processes: file-based works out of the box, Redis/Memcached scale
+# further. Local-memory only suits a single process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'api_cache',
     }
 }
 
+API_CACHE_TIMEOUT = 300
+
+# Seconds the dashboard's summary counts are reused; saving a scraper job
+# expires them early
+DASHBOARD_SUMMARY_TTL = 30
+
+# Weight of the latest match in the players' exponentially weighted form;
+# run rebuild_player_form after changing it
+PLAYER_FORM_EWMA_ALPHA = 0.3
+
+# Predictions memoized per process by /api/predict/, and their lifetime in
+# seconds. While features are rebuilt after new data, the previous ones
+# keep being served (and counted as stale) unless PREDICTION_SERVE_STALE
+# is off, in which case requests wait for the rebuild.
+PREDICTION_CACHE_SIZE = 10000
+PREDICTION_CACHE_TTL = 3600
+PREDICTION_SERVE_STALE = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
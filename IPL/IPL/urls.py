@@ -38,7 +38,6 @@ urlpatterns = [
     path('dashboard/', include('dashboard.urls')),
     path('api/', include('api.urls')),
     path('api/scraper/', include('scraper.urls')),
-    path('api/scraper/', include('scraper.urls')),
     path('api-auth/', include('rest_framework.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
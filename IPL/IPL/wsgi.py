@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'IPL.settings')
 
 application = get_wsgi_application()
+
+# Load the active model and the current features now rather than on the
+# first request
+from api.registry import registry  # noqa: E402
+
+registry.warm()
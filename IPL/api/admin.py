@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Team, Player, Stadium, Match, Innings, 
-    PlayerPerformance, Prediction, PlayerPrediction
+    PlayerPerformance, PlayerForm, Prediction, PlayerPrediction
 )
 
 @admin.register(Team)
@@ -41,6 +41,13 @@ class PlayerPerformanceAdmin(admin.ModelAdmin):
     search_fields = ('player__name', 'match__team_home__name', 'match__team_away__name')
     list_filter = ('player__team', 'match__season')
 
+@admin.register(PlayerForm)
+class PlayerFormAdmin(admin.ModelAdmin):
+    list_display = ('player', 'runs_last_5', 'strike_rate_last_5', 'wickets_last_5', 'economy_last_5', 'last_match_date')
+    search_fields = ('player__name',)
+    list_filter = ('player__team',)
+    readonly_fields = ('state',)
+
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
     list_display = ('match', 'predicted_winner', 'win_probability', 'was_correct')
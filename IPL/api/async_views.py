@@ -0,0 +1,183 @@
+import binascii
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.urls import replace_query_param
+from .cache import acache_response
+from .fastpath import ValuesRowBuilder
+from .models import (
+    Team, Player, Stadium, Match, Innings,
+    PlayerPerformance, Prediction
+)
+from .pagination import (
+    KeysetPagination, MatchPagination, PredictionPagination,
+    encode_cursor, decode_cursor, after
+)
+from .renderers import FastJSONRenderer
+from .serializers import (
+    TeamSerializer, PlayerSerializer, MatchSerializer,
+    MatchDetailSerializer, PredictionSerializer
+)
+
+# Async versions of the hot read endpoints, served under /api/async/.
+#
+# Every query goes through the async ORM, so under an ASGI server a slow
+# query suspends its request instead of holding a worker. Lists are built
+# from values() rows by the same ValuesRowBuilder as the viewsets' fast
+# path and keyset paginated on the viewsets' orderings; the output of each
+# row is identical to the synchronous endpoint's.
+
+renderer = FastJSONRenderer()
+row_builders = {}
+
+TRUE_VALUES = {'true', 'True', '1'}
+FALSE_VALUES = {'false', 'False', '0'}
+
+
+def render(data, status=200):
+    return HttpResponse(renderer.render(data), content_type='application/json', status=status)
+
+
+def not_found(model):
+    return render({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+def parse_int(value):
+    if not value.isdigit():
+        raise ValueError('must be a number')
+    return int(value)
+
+
+def parse_bool(value):
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError('must be true or false')
+
+
+def apply_filters(request, queryset, filters):
+    """Filter ``queryset`` on the query parameters named in ``filters``.
+
+    ``filters`` maps each parameter to the function that parses it, which
+    raises ValueError for bad input.
+    """
+    for param, parse in filters.items():
+        value = request.GET.get(param)
+        if value:
+            try:
+                queryset = queryset.filter(**{param: parse(value)})
+            except ValueError as e:
+                raise ValueError(f'{param} {e}')
+    return queryset
+
+
+def get_row_builder(serializer_class):
+    builder = row_builders.get(serializer_class)
+    if builder is None:
+        builder = row_builders[serializer_class] = ValuesRowBuilder(serializer_class)
+    return builder
+
+
+async def paginate(request, queryset, builder, ordering):
+    """One keyset page of ``queryset`` as ``{'next': url, 'results': rows}``.
+
+    Pages are fetched with a WHERE on the full ordering rather than an
+    OFFSET, and ``next`` is null on the last page.
+    """
+    page_size = KeysetPagination.page_size
+    if request.GET.get('page_size', '').isdigit():
+        page_size = max(1, min(int(request.GET['page_size']), KeysetPagination.max_page_size))
+
+    columns = [field.lstrip('-') for field in ordering]
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            queryset = queryset.filter(after(ordering, decode_cursor(cursor, ordering)))
+        except (ValueError, binascii.Error, ValidationError):
+            return render({'detail': 'Invalid cursor'}, status=404)
+
+    queryset = queryset.order_by(*ordering).values(*dict.fromkeys(builder.lookups + columns))
+    values = [row async for row in queryset[:page_size + 1]]
+    next_url = None
+    if len(values) > page_size:
+        values = values[:page_size]
+        last = [values[-1][column] for column in columns]
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(last))
+    return render({'next': next_url, 'results': builder.rows(values)})
+
+
+async def filtered_page(request, queryset, filters, serializer_class, ordering):
+    try:
+        queryset = apply_filters(request, queryset, filters)
+    except ValueError as e:
+        return render({'error': str(e)}, status=400)
+    return await paginate(request, queryset, get_row_builder(serializer_class), ordering)
+
+
+@require_GET
+@acache_response(Match, Team, Stadium)
+async def match_list(request):
+    """Matches, newest first."""
+    filters = {'season': parse_int, 'team_home': parse_int, 'team_away': parse_int, 'venue': parse_int, 'status': str}
+    return await filtered_page(request, Match.objects.all(), filters, MatchSerializer, MatchPagination.ordering)
+
+
+@require_GET
+@acache_response(Match, Team, Stadium, Innings, PlayerPerformance, Player)
+async def match_detail(request, pk):
+    """A match with its teams, venue, innings and player performances."""
+    queryset = Match.objects.select_related('team_home', 'team_away', 'venue').prefetch_related(
+        Prefetch('innings', queryset=Innings.objects.select_related('batting_team', 'bowling_team')),
+        Prefetch('player_performances', queryset=PlayerPerformance.objects.select_related('player')),
+    )
+    try:
+        match = await queryset.aget(pk=pk)
+    except Match.DoesNotExist:
+        return not_found(Match)
+    return render(MatchDetailSerializer(match).data)
+
+
+@require_GET
+@acache_response(Prediction, Match, Team)
+async def prediction_list(request):
+    """Match predictions, newest first."""
+    filters = {'match': parse_int, 'predicted_winner': parse_int, 'model_version': str, 'was_correct': parse_bool}
+    return await filtered_page(request, Prediction.objects.all(), filters, PredictionSerializer, PredictionPagination.ordering)
+
+
+@require_GET
+@acache_response(Team)
+async def team_list(request):
+    """Teams by name."""
+    filters = {'name': str, 'short_name': str}
+    return await filtered_page(request, Team.objects.all(), filters, TeamSerializer, ('name', 'id'))
+
+
+@require_GET
+@acache_response(Team)
+async def team_detail(request, pk):
+    try:
+        team = await Team.objects.aget(pk=pk)
+    except Team.DoesNotExist:
+        return not_found(Team)
+    return render(TeamSerializer(team).data)
+
+
+@require_GET
+@acache_response(Player, Team)
+async def player_list(request):
+    """Players by name."""
+    filters = {'name': str, 'team': parse_int, 'role': str, 'nationality': str}
+    return await filtered_page(request, Player.objects.all(), filters, PlayerSerializer, ('name', 'id'))
+
+
+@require_GET
+@acache_response(Player, Team)
+async def player_detail(request, pk):
+    try:
+        player = await Player.objects.select_related('team').aget(pk=pk)
+    except Player.DoesNotExist:
+        return not_found(Player)
+    return render(PlayerSerializer(player).data)
@@ -0,0 +1,184 @@
+from collections import defaultdict
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .cache import invalidate_rows
+from .memo import memo
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves ids from objects loaded up front.
+
+    When the serializer context carries ``related_objects`` (model ->
+    {pk: instance}), ids are looked up there instead of with one query per
+    field per item; otherwise it behaves like PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context.get('related_objects', {}).get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in objects:
+            self.fail('does_not_exist', pk_value=data)
+        return objects[pk]
+
+
+class BulkWriteMixin:
+    """Add a ``bulk`` POST action that writes a list of items at once.
+
+    Every item is validated by the viewset's serializer, with the related
+    objects of the whole list loaded in one query per model. If any item
+    is invalid nothing is written and the response lists each item's
+    errors (empty for valid items). Otherwise all items are written with
+    bulk_create and bulk_update in a single transaction.
+
+    With ``bulk_key_fields`` set, items whose key already exists update
+    that row instead (only the fields the item supplies), so posting the
+    same scorecard twice is safe; without it every item is created. The
+    key should be the fields of the model's unique constraint. A write
+    that conflicts with a concurrent one gets a 409 and can be retried.
+    """
+    bulk_key_fields = ()
+    bulk_max_items = 1000
+
+    def get_bulk_serializer(self, items):
+        context = self.get_serializer_context()
+        serializer = self.get_serializer_class()(data=items, many=True, context=context)
+        # Unique-together checks would cost a query per item; the key is
+        # upserted on instead, and the database constraints still hold
+        serializer.child.validators = []
+        context['related_objects'] = self.load_related_objects(serializer.child, items)
+        return serializer
+
+    def load_related_objects(self, serializer, items):
+        """Load every object the items refer to, with one query per model."""
+        pks = defaultdict(set)
+        querysets = {}
+        for name, field in serializer.fields.items():
+            if field.read_only or not isinstance(field, PrefetchedPrimaryKeyRelatedField):
+                continue
+            queryset = field.get_queryset()
+            querysets.setdefault(queryset.model, queryset)
+            for item in items:
+                if not isinstance(item, dict) or item.get(name) in (None, ''):
+                    continue
+                try:
+                    pks[queryset.model].add(queryset.model._meta.pk.to_python(item[name]))
+                except DjangoValidationError:
+                    pass
+        return {model: querysets[model].order_by().in_bulk(pks[model]) if pks[model] else {} for model in querysets}
+
+    def bulk_key(self, values):
+        model = self.get_queryset().model
+        return tuple(
+            getattr(values[field], 'pk', values[field]) if model._meta.get_field(field).is_relation else values[field]
+            for field in self.bulk_key_fields
+        )
+
+    def existing_keys(self, rows):
+        """The pk of each key of ``rows`` that is already in the database."""
+        model = self.get_queryset().model
+        existing = {}
+        keys = [self.bulk_key(values) for values in rows]
+        attnames = [model._meta.get_field(field).attname for field in self.bulk_key_fields]
+        lookup = {f'{attname}__in': {key[i] for key in keys} for i, attname in enumerate(attnames)}
+        # The IN filters may match a superset for composite keys; only
+        # exact key matches are used
+        for pk, *key in model.objects.filter(**lookup).order_by().values_list('pk', *attnames):
+            existing[tuple(key)] = pk
+        return existing
+
+    def bulk_write(self, rows):
+        """Create or update ``rows`` and return ``(id, created)`` for each.
+
+        Raises IntegrityError when a concurrent write created one of the
+        keys after they were looked up; nothing is written then.
+        """
+        model = self.get_queryset().model
+        now = timezone.now()
+        created = []
+        updates = defaultdict(list)
+        results = []
+        with transaction.atomic():
+            existing = self.existing_keys(rows) if self.bulk_key_fields else {}
+            for values in rows:
+                pk = existing.get(self.bulk_key(values)) if self.bulk_key_fields else None
+                if pk is None:
+                    obj = model(**values)
+                    created.append(obj)
+                    results.append((obj, True))
+                    continue
+                obj = model(pk=pk, updated_at=now, **values)
+                updates[tuple(sorted(values))].append(obj)
+                results.append((obj, False))
+
+            # The rows as they were, so responses of objects an update moves them away from expire too
+            stored = list(model._base_manager.filter(
+                pk__in=[obj.pk for objs in updates.values() for obj in objs]
+            )) if updates else []
+            if created:
+                model.objects.bulk_create(created)
+            for fields, objs in updates.items():
+                model.objects.bulk_update(objs, list(fields) + ['updated_at'])
+        # bulk writes send no post_save, so cached API responses and
+        # memoized predictions are expired here
+        invalidate_rows(model, [obj for obj, _ in results] + stored)
+        memo.invalidate_rows(model, [obj for obj, _ in results])
+        return [(obj.pk, was_created) for obj, was_created in results]
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create or update a list of items in one request."""
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Expected a list of items'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'error': f'At most {self.bulk_max_items} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_bulk_serializer(items)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, dict):
+                if not all(isinstance(index, int) for index in errors):
+                    return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+                # The errors of a list are keyed by the index of each invalid item
+                errors = [errors.get(index, {}) for index in range(len(items))]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = serializer.validated_data
+        errors = [{} for _ in rows]
+        seen = {}
+        for index, values in enumerate(rows):
+            if not self.bulk_key_fields:
+                break
+            key = self.bulk_key(values)
+            if key in seen:
+                errors[index] = {'non_field_errors': [f'Same {", ".join(self.bulk_key_fields)} as item {seen[key]}']}
+            seen.setdefault(key, index)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = self.bulk_write(rows)
+        except IntegrityError:
+            return Response(
+                {'error': 'Another request wrote some of these items at the same time; retry the request'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({
+            'created': sum(1 for _, was_created in results if was_created),
+            'updated': sum(1 for _, was_created in results if not was_created),
+            'results': [{'id': pk, 'created': was_created} for pk, was_created in results],
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,304 @@
+import time
+import hashlib
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.response import Response
+from .fieldsets import read_models, sparse_params
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def generation_key(model):
+    return f'api:generation:{model._meta.label_lower}'
+
+
+def epoch_key(model):
+    return f'api:epoch:{model._meta.label_lower}'
+
+
+def scope_key(model, field, value):
+    return f'{generation_key(model)}:{field}:{value}'
+
+
+class Rows:
+    """A dependency on only the rows of ``model`` that point at the viewed object.
+
+    ``Rows(Match)`` is the viewed match itself, ``Rows(Innings, 'match')``
+    the innings of the viewed match and ``Rows(Match, 'team_home',
+    'team_away')`` the matches of the viewed team. Such a response keeps
+    its cache entry while other rows of ``model`` change, where a plain
+    model dependency expires on any of them.
+    """
+
+    def __init__(self, model, *fields):
+        self.model = model
+        self.fields = fields or ('pk',)
+
+    def keys(self, pk):
+        return [epoch_key(self.model)] + [scope_key(self.model, field, pk) for field in self.fields]
+
+
+def dependency_keys(models, pk=None):
+    keys = []
+    for model in models:
+        if isinstance(model, Rows):
+            keys.extend(model.keys(pk))
+        else:
+            keys.append(generation_key(model))
+    return keys
+
+
+def get_generations(models, pk=None):
+    """Current generation of each model, creating missing counters.
+
+    A ``Rows`` dependency contributes the model's epoch and the counter of
+    each scope it reads, for the viewed object ``pk``.
+    """
+    cache = get_cache()
+    keys = dependency_keys(models, pk)
+    generations = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in generations}
+    if missing:
+        # Start from the clock rather than 1 so a counter that was evicted
+        # never comes back at a value old responses were stored under
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def row_scope_keys(model, rows):
+    """The counter of every scope the given instances of ``model`` fall in."""
+    relations = [field for field in model._meta.concrete_fields if field.is_relation]
+    keys = set()
+    for row in rows:
+        keys.add(scope_key(model, 'pk', row.pk))
+        for field in relations:
+            value = getattr(row, field.attname)
+            if value is not None:
+                keys.add(scope_key(model, field.name, value))
+    return keys
+
+
+def invalidate(*models):
+    """Drop every cached response that depends on any of ``models``.
+
+    Saves and deletes do this through signals; call it directly after
+    bulk_create, bulk_update or QuerySet.update, which send none. Prefer
+    ``invalidate_rows`` when the written rows are known: this also expires
+    every ``Rows`` dependency on the models.
+
+    Inside a transaction the generations are bumped again once it commits:
+    a response built by another connection before then still read the old
+    rows, and would otherwise be cached under the new generation.
+    """
+    keys = [generation_key(model) for model in models] + [epoch_key(model) for model in models]
+    _bump(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_rows(model, rows):
+    """Drop the cached responses that read any of ``rows``, instances of ``model``.
+
+    Responses that read every row of ``model``, such as lists, expire as
+    with ``invalidate``; a ``Rows`` dependency expires only when one of
+    the rows points at its object. Pass an updated row's old values too
+    when the update moves it to another object.
+    """
+    keys = [generation_key(model)]
+    scoped = row_scope_keys(model, rows)
+    _bump(keys, scoped)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys, scoped))
+
+
+def _bump(keys, scoped=()):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    # A scope nobody has read has no counter; the first read creates one
+    # from the clock, past anything cached before, so only existing ones
+    # need bumping
+    for key in cache.get_many(scoped):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def _plain(data):
+    # Serializer output holds a reference to its serializer; keep only the data
+    if isinstance(data, dict):
+        return {key: _plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_plain(value) for value in data]
+    return data
+
+
+def auth_scope(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return 'anon'
+
+
+def response_key(request, models, pk=None):
+    """The cache key digest and response headers for a GET of ``request``.
+
+    The key covers the host, path, query string, the auth scope and the
+    negotiated format; it also embeds the generation of every model the
+    response reads, or of the rows of the viewed object ``pk`` for a
+    ``Rows`` dependency, so a change to any of them makes the old entry
+    unreachable. The ETag is derived from the same key, so a client that
+    sends it back gets a 304 without the cache being read at all.
+    """
+    generations = get_generations(models, pk)
+    renderer = getattr(request, 'accepted_renderer', None)
+    fingerprint = '|'.join([
+        request.get_host(),
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        auth_scope(request),
+        renderer.format if renderer else '',
+        *(str(generation) for generation in generations),
+    ])
+    digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+    return digest, {'ETag': f'"{digest}"', 'Vary': 'Accept, Cookie, Authorization'}
+
+
+def not_modified(request, headers):
+    return headers['ETag'] in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+
+
+def cached_response(request, models, build, pk=None):
+    """Serve ``build()``'s response from the cache while ``models`` are unchanged."""
+    if request.method != 'GET':
+        return build()
+
+    digest, headers = response_key(request, models, pk)
+    if not_modified(request, headers):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = get_cache()
+    key = f'api:response:{digest}'
+    data = cache.get(key)
+    if data is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = _plain(response.data)
+        cache.set(key, data, getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    return Response(data, headers=headers)
+
+
+async def acached_response(request, models, build):
+    """``cached_response`` for async views.
+
+    ``build`` is a coroutine function returning an ``HttpResponse``; the
+    rendered body is cached rather than the data, so a hit is served
+    without rendering anything.
+    """
+    if request.method != 'GET':
+        return await build()
+
+    digest, headers = await sync_to_async(response_key)(request, models)
+    if not_modified(request, headers):
+        return HttpResponseNotModified(headers=headers)
+
+    cache = get_cache()
+    key = f'api:response:{digest}'
+    content = await cache.aget(key)
+    if content is None:
+        response = await build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        content = response.content
+        await cache.aset(key, content, getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    return HttpResponse(content, content_type='application/json', headers=headers)
+
+
+def cache_response(*models):
+    """Cache a viewset action's GET responses until one of ``models`` changes.
+
+    A detail action's object is looked up first, so its object permissions
+    are checked even when the response comes from the cache or is a 304;
+    ``Rows`` dependencies are scoped to that object.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            pk = None
+            if request.method == 'GET' and getattr(self, 'detail', False):
+                pk = self.get_object().pk
+            return cached_response(request, models, lambda: func(self, request, *args, **kwargs), pk)
+        return wrapper
+    return decorator
+
+
+def acache_response(*models):
+    """Cache an async view's GET responses until one of ``models`` changes."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request, *args, **kwargs):
+            return await acached_response(request, models, lambda: func(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """Cache list and retrieve responses of a viewset.
+
+    ``cache_models`` lists every model the serialized output reads, the
+    viewset's own model included; override ``get_cache_models()`` when
+    that differs between actions.
+
+    Detail responses look the object up before the cache is read, so 404s
+    and object permissions apply to cached responses and 304s too; the
+    lookup is reused when the response has to be built. They depend on
+    ``Rows`` of the viewset's own model only, so saving one row doesn't
+    expire the others' detail responses. A list reads every row and
+    still expires on any change to its models.
+
+    An ``expand=`` request also depends on every model the embedded
+    serializers read, which are found from the serializer itself.
+    """
+    cache_models = ()
+    _object = None
+
+    def get_cache_models(self):
+        return self.cache_models
+
+    def response_models(self):
+        """``get_cache_models()``, plus the models an ``expand=`` request embeds."""
+        models = list(self.get_cache_models())
+        if sparse_params(self.request).get('expand'):
+            for model in read_models(self.get_serializer(), self.get_queryset().model):
+                if model not in models:
+                    models.append(model)
+        return models
+
+    def get_object(self):
+        if self._object is None:
+            self._object = super().get_object()
+        return self._object
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        return cached_response(request, self.response_models(), lambda: build(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.get_object().pk
+        model = self.get_queryset().model
+        models = [Rows(model) if item is model else item for item in self.response_models()]
+        build = super().retrieve
+        return cached_response(request, models, lambda: build(request, *args, **kwargs), pk)
@@ -0,0 +1,191 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import ReadOnlyField
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from .renderers import FastJSONRenderer
+from .fieldsets import COMPUTED_SOURCES, sparse_params, ordering_columns
+
+# Field types whose DRF representation differs from the value the database
+# returns; every other supported field passes values through unchanged
+CONVERTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.DurationField,
+)
+
+# Field types whose representation is the database value itself
+PASSTHROUGH_FIELDS = (
+    ReadOnlyField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class ValuesRowBuilder:
+    """Build a serializer's list output from ``QuerySet.values()`` rows.
+
+    Columns, their order and their representation are taken from the
+    serializer once, so rows come out exactly as ``serializer.data`` would
+    have them, field for field, without a serializer or model instance per
+    row. ``options`` are passed to the serializer, e.g. ``fields``. Dotted sources such as ``team.name`` become joined lookups
+    (``team__name``). Serializers with nested serializers, method fields or
+    many-to-many fields are not supported and raise ValueError.
+    """
+
+    def __init__(self, serializer_class, **options):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self.lookups = []
+        model = serializer_class.Meta.model
+        for name, field in serializer_class(**options).fields.items():
+            if field.write_only:
+                continue
+            if field.source in COMPUTED_SOURCES:
+                lookups, compute = COMPUTED_SOURCES[field.source]
+                self.columns.append((name, tuple(lookups), compute, None))
+                self.lookups.extend(lookups)
+                continue
+            if isinstance(field, CONVERTED_FIELDS):
+                convert = field.to_representation
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            else:
+                raise ValueError(f"{serializer_class.__name__}.{name} is not supported on the fast path")
+
+            lookup = field.source.replace('.', '__')
+            # A missing related object makes DRF skip the field entirely
+            relation = None
+            if '.' in field.source:
+                relation = field.source.split('.')[0]
+                if not model._meta.get_field(relation).null:
+                    relation = None
+                else:
+                    self.lookups.append(relation)
+            self.columns.append((name, lookup, convert, relation))
+            self.lookups.append(lookup)
+        self.lookups = list(dict.fromkeys(self.lookups))
+
+    def queryset(self, queryset, extra=()):
+        """Restrict a queryset to the columns the rows are built from.
+
+        ``extra`` columns are fetched as well without being output, e.g.
+        the ones a cursor paginator reads its position from.
+        """
+        return queryset.values(*dict.fromkeys([*self.lookups, *extra]))
+
+    def row(self, values):
+        row = {}
+        for name, lookup, convert, relation in self.columns:
+            if relation is not None and values[relation] is None:
+                continue
+            if isinstance(lookup, tuple):
+                row[name] = convert(*(values[column] for column in lookup))
+                continue
+            value = values[lookup]
+            row[name] = convert(value) if convert is not None and value is not None else value
+        return row
+
+    def rows(self, values_rows):
+        return [self.row(values) for values in values_rows]
+
+
+def resolve_ordering(model, ordering, seen=()):
+    """``ordering`` with every relation replaced by the related model's ordering.
+
+    Ordering a queryset by a foreign key orders by the related model's
+    ``Meta.ordering``, but values() orders by the raw id; spelling the
+    columns out makes both give the same rows in the same order. Raises
+    ValueError for orderings that can't be spelled out as columns.
+    """
+    resolved = []
+    for entry in ordering:
+        if not isinstance(entry, str):
+            raise ValueError(f'Ordering {entry!r} is not a column')
+        if entry == '?':
+            resolved.append(entry)
+            continue
+        descending = entry.startswith('-')
+        name = entry.lstrip('-+')
+        current, field = model, None
+        try:
+            for part in name.split('__'):
+                if field is not None:
+                    current = field.related_model
+                field = current._meta.get_field(part)
+        except (FieldDoesNotExist, AttributeError):
+            # pk, an attname such as match_id, or an annotation
+            resolved.append(entry)
+            continue
+        if not (field.many_to_one or field.one_to_one) or not field.concrete or field.name != part:
+            resolved.append(entry)
+            continue
+        related = field.related_model
+        if related in seen:
+            raise ValueError(f'Ordering of {model.__name__} by {name} loops')
+        for sub in resolve_ordering(related, related._meta.ordering or [related._meta.pk.name], (*seen, model)):
+            if sub == '?':
+                continue
+            flipped = sub.startswith('-') != descending
+            resolved.append(f"{'-' if flipped else ''}{name}__{sub.lstrip('-')}")
+    return resolved
+
+
+class FastListMixin:
+    """Serve the list action from ``values()`` rows instead of serializer instances.
+
+    Viewsets opt in with ``fast_list = True``. The output matches the
+    viewset's serializer byte for byte, and filtering, ordering, pagination
+    and ``fields=`` work as before; lists that ``expand=`` a relation, or
+    are ordered by something that isn't a column, go through the serializer.
+    """
+    fast_list = False
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    _row_builders = {}
+    # Every distinct fields= combination gets its own builder; cap how many are kept
+    max_row_builders = 256
+
+    def get_row_builder(self, serializer_class=None):
+        """The row builder for ``serializer_class`` and the request's ``fields``/``expand``.
+
+        Raises ValueError when that combination can't be built from values() rows.
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        options = sparse_params(self.request)
+        key = (serializer_class, tuple(sorted(options.items())))
+        builder = self._row_builders.get(key)
+        if builder is None:
+            builder = ValuesRowBuilder(serializer_class, **options)
+            if len(self._row_builders) < self.max_row_builders:
+                self._row_builders[key] = builder
+        return builder
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list:
+            return super().list(request, *args, **kwargs)
+        try:
+            builder = self.get_row_builder()
+        except ValueError:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = queryset.query.order_by or (
+            queryset.model._meta.ordering if queryset.query.default_ordering else ()
+        )
+        try:
+            resolved = resolve_ordering(queryset.model, ordering)
+        except ValueError:
+            return super().list(request, *args, **kwargs)
+        if resolved != list(ordering):
+            queryset = queryset.order_by(*resolved)
+        queryset = builder.queryset(queryset, extra=ordering_columns(queryset, self.paginator))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(builder.rows(page))
+        return Response(builder.rows(queryset))
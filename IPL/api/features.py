@@ -0,0 +1,408 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from itertools import islice
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from .cache import get_generations
+from .models import Match, Innings, PlayerPerformance
+
+# Match features as NumPy columns, for training and analysis.
+#
+# Rows are read with values_list in chunks straight into preallocated
+# arrays, and every derived feature is computed with array operations over
+# the whole history at once. A row's features only use matches before it,
+# so every completed match is a training example as it stands and every
+# scheduled one can be scored.
+#
+# The arrays are saved as .npy files in a directory named by the data
+# version and loaded memory-mapped: reloading costs no parsing or copying,
+# and processes reading the same version share its pages.
+
+# Bump when the features change, so artifacts of the old schema are rebuilt
+FEATURE_SCHEMA = 2
+CHUNK_SIZE = 5000
+MOMENTUM_WINDOW = 5
+
+# Id column value for a null foreign key
+MISSING = -1
+
+FEATURE_NAMES = [
+    'toss_home',
+    'toss_bat_first',
+    'venue_toss_win_rate',
+    'venue_first_innings_avg',
+    'venue_chasing_win_rate',
+    'head_to_head_home_win_rate',
+    'head_to_head_matches',
+    'home_momentum',
+    'away_momentum',
+    'home_runs_avg',
+    'away_runs_avg',
+    'home_boundaries_avg',
+    'away_boundaries_avg',
+]
+
+# Besides the features: each match's id, ordinal day, (home, away) team
+# ids, whether the home side won and (home, away) runs, NaN when unknown
+ARRAY_NAMES = ('match_ids', 'days', 'teams', 'features', 'target', 'scores')
+
+
+def get_store_dir():
+    return Path(getattr(settings, 'FEATURE_STORE_DIR', settings.BASE_DIR / 'feature_store'))
+
+
+def optional_id(value):
+    return MISSING if value is None else value
+
+
+def toss_choice(value):
+    # 1 for batting first, 0 for fielding first, NaN when not known
+    decision = (value or '').strip().lower()
+    if decision.startswith('bat'):
+        return 1.0
+    if decision.startswith(('field', 'bowl')):
+        return 0.0
+    return np.nan
+
+
+def fetch_columns(queryset, columns, chunk_size=CHUNK_SIZE):
+    """``queryset``'s columns as NumPy arrays, read ``chunk_size`` rows at a time.
+
+    ``columns`` maps each lookup to its dtype and the function that turns a
+    database value into an array item, or None to store values as they are.
+    """
+    count = queryset.count()
+    arrays = {lookup: np.empty(count, dtype=dtype) for lookup, (dtype, _) in columns.items()}
+    converters = [convert for _, convert in columns.values()]
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    start = 0
+    while start < count:
+        chunk = list(islice(rows, min(chunk_size, count - start)))
+        if not chunk:
+            break
+        end = start + len(chunk)
+        for array, convert, values in zip(arrays.values(), converters, zip(*chunk)):
+            array[start:end] = values if convert is None else [convert(value) for value in values]
+        start = end
+    # Rows deleted since the count leave the tail unfilled
+    return {lookup: array[:start] for lookup, array in arrays.items()}
+
+
+def prior_sums(keys, values, window=None):
+    """For each row, the sum of ``values`` over earlier rows with the same key.
+
+    Rows must be in time order. With ``window`` only the last ``window``
+    earlier rows of the key count.
+    """
+    count = len(keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.arange(count)
+    starts = np.ones(count, dtype=bool)
+    starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    group_starts = np.maximum.accumulate(np.where(starts, positions, 0))
+    lower = group_starts if window is None else np.maximum(group_starts, positions - window)
+
+    # totals[i] is the sum of the first i sorted values
+    totals = np.zeros(count + 1)
+    np.cumsum(values[order], out=totals[1:])
+    sums = np.empty(count)
+    sums[order] = totals[positions] - totals[lower]
+    return sums
+
+
+def ratio(numerator, denominator):
+    """``numerator / denominator``, NaN where nothing was counted."""
+    out = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def match_rows(match_ids, ids, order=None):
+    """The row of each of ``ids`` in ``match_ids``, or -1 for an unknown match.
+
+    ``order`` is ``np.argsort(match_ids)``, if already known.
+    """
+    if not len(match_ids):
+        return np.full(len(ids), -1, dtype=np.int64)
+    if order is None:
+        order = np.argsort(match_ids)
+    found = order[np.searchsorted(match_ids[order], ids).clip(max=len(match_ids) - 1)]
+    return np.where(match_ids[found] == ids, found, -1)
+
+
+def compute_features(matches, innings, performances):
+    """The feature arrays from the fetched match, innings and performance columns."""
+    match_ids = matches['id']
+    home = matches['team_home_id']
+    away = matches['team_away_id']
+    venue = matches['venue_id']
+    winner = matches['match_winner_id']
+    toss_winner = matches['toss_winner_id']
+    count = len(match_ids)
+
+    decided = (winner != MISSING).astype(np.float64)
+    home_won = (winner == home).astype(np.float64)
+    target = np.where(decided > 0, home_won, np.nan)
+    toss_known = toss_winner != MISSING
+    toss_home = np.where(toss_known, (toss_winner == home).astype(np.float64), np.nan)
+    toss_winner_won = (toss_known & (winner == toss_winner)).astype(np.float64)
+    toss_decided = (toss_known & (decided > 0)).astype(np.float64)
+
+    # Innings: first innings totals and the side batting second
+    rows = match_rows(match_ids, innings['match_id'])
+    known = rows >= 0
+    first_runs = np.zeros(count)
+    first_played = np.zeros(count)
+    first = known & (innings['innings_number'] == 1)
+    np.add.at(first_runs, rows[first], innings['runs'][first])
+    np.add.at(first_played, rows[first], 1)
+    chaser = np.full(count, MISSING, dtype=np.int64)
+    second = known & (innings['innings_number'] == 2)
+    chaser[rows[second]] = innings['batting_team_id'][second]
+    chase_decided = decided * (chaser != MISSING)
+    chaser_won = chase_decided * (winner == chaser)
+
+    # Runs per side from the innings, boundaries per side from performances
+    team_runs = np.zeros((count, 2))
+    team_innings = np.zeros((count, 2))
+    for side, team in enumerate((home, away)):
+        batting = known & (innings['batting_team_id'] == team[rows.clip(min=0)])
+        np.add.at(team_runs[:, side], rows[batting], innings['runs'][batting])
+        np.add.at(team_innings[:, side], rows[batting], 1)
+    team_boundaries = np.zeros((count, 2))
+    rows = match_rows(match_ids, performances['match_id'])
+    known = rows >= 0
+    boundaries = performances['fours'] + performances['sixes']
+    for side, team in enumerate((home, away)):
+        batting = known & (performances['innings__batting_team_id'] == team[rows.clip(min=0)])
+        np.add.at(team_boundaries[:, side], rows[batting], boundaries[batting])
+
+    # Venue history
+    venue_toss_rate = ratio(prior_sums(venue, toss_winner_won), prior_sums(venue, toss_decided))
+    venue_first_avg = ratio(prior_sums(venue, first_runs), prior_sums(venue, first_played))
+    venue_chase_rate = ratio(prior_sums(venue, chaser_won), prior_sums(venue, chase_decided))
+
+    # Head to head, keyed by the pair of teams whichever side is at home
+    low = np.minimum(home, away)
+    pair = low * (max(home.max(initial=0), away.max(initial=0)) + 1) + np.maximum(home, away)
+    low_wins = prior_sums(pair, decided * (winner == low))
+    meetings = prior_sums(pair, decided)
+    home_wins = np.where(home == low, low_wins, meetings - low_wins)
+
+    # Form over each team's last matches: both sides of every match as one
+    # row per team, interleaved so the rows stay in time order
+    teams = np.stack([home, away], axis=1).ravel()
+    wins = np.stack([home_won, decided - home_won], axis=1).ravel()
+    played = np.repeat(decided, 2)
+
+    def recent(values, counts):
+        # Per-match average of ``values`` over the last matches that count
+        totals = prior_sums(teams, values.ravel(), MOMENTUM_WINDOW)
+        counted = prior_sums(teams, counts.ravel(), MOMENTUM_WINDOW)
+        return ratio(totals, counted).reshape(count, 2)
+
+    momentum = recent(wins, played)
+    runs_avg = recent(team_runs, team_innings)
+    boundaries_avg = recent(team_boundaries, (team_innings > 0).astype(np.float64))
+
+    features = np.column_stack([
+        toss_home,
+        matches['toss_decision'],
+        venue_toss_rate,
+        venue_first_avg,
+        venue_chase_rate,
+        ratio(home_wins, meetings),
+        meetings,
+        momentum[:, 0],
+        momentum[:, 1],
+        runs_avg[:, 0],
+        runs_avg[:, 1],
+        boundaries_avg[:, 0],
+        boundaries_avg[:, 1],
+    ])
+    return {
+        'match_ids': match_ids,
+        'days': matches['date'],
+        'teams': np.column_stack([home, away]),
+        'features': features,
+        'target': target,
+        'scores': np.where(team_innings > 0, team_runs, np.nan),
+    }
+
+
+def build_features(chunk_size=CHUNK_SIZE):
+    """Read the columns the features need and compute the feature arrays."""
+    with transaction.atomic():
+        # One snapshot for all three tables where the database supports it
+        matches = fetch_columns(Match.objects.order_by('date', 'time', 'id'), {
+            'id': (np.int64, None),
+            'date': (np.int64, lambda day: day.toordinal()),
+            'team_home_id': (np.int64, None),
+            'team_away_id': (np.int64, None),
+            'venue_id': (np.int64, None),
+            'toss_winner_id': (np.int64, optional_id),
+            'toss_decision': (np.float64, toss_choice),
+            'match_winner_id': (np.int64, optional_id),
+        }, chunk_size)
+        innings = fetch_columns(Innings.objects.order_by(), {
+            'match_id': (np.int64, None),
+            'innings_number': (np.int64, None),
+            'batting_team_id': (np.int64, None),
+            'runs': (np.float64, None),
+        }, chunk_size)
+        performances = fetch_columns(PlayerPerformance.objects.order_by(), {
+            'match_id': (np.int64, None),
+            'innings__batting_team_id': (np.int64, None),
+            'fours': (np.float64, None),
+            'sixes': (np.float64, None),
+        }, chunk_size)
+    return compute_features(matches, innings, performances)
+
+
+def data_version():
+    """A digest that changes whenever a row the features read is added, changed or deleted."""
+    parts = [FEATURE_SCHEMA, MOMENTUM_WINDOW]
+    for model in (Match, Innings, PlayerPerformance):
+        stats = model.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+        parts.extend([stats['count'], stats['latest'].isoformat() if stats['latest'] else None])
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()[:16]
+
+
+class FeatureSet:
+    """The feature arrays of one data version, memory-mapped from the store."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / 'meta.json').read_text())
+        self.version = meta['version']
+        self.columns = meta['columns']
+        for name in ARRAY_NAMES:
+            setattr(self, name, np.load(self.path / f'{name}.npy', mmap_mode='r'))
+        self.order = np.argsort(self.match_ids)
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def column(self, name):
+        return self.features[:, self.columns.index(name)]
+
+    def rows(self, match_ids):
+        """The row of each of ``match_ids``, or -1 for a match not in the artifact."""
+        return match_rows(self.match_ids, np.asarray(match_ids, dtype=np.int64), self.order)
+
+
+def save_features(arrays, version):
+    """Write ``arrays`` as the artifact of ``version`` and return its directory.
+
+    The files are written to a temporary directory that is renamed into
+    place, so readers never see a partial artifact; if another process
+    saved the same version first, its copy is kept.
+    """
+    root = get_store_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / version
+    if path.exists():
+        return path
+    staging = Path(tempfile.mkdtemp(dir=root, prefix=f'.{version}-'))
+    for name in ARRAY_NAMES:
+        np.save(staging / f'{name}.npy', np.ascontiguousarray(arrays[name]))
+    (staging / 'meta.json').write_text(json.dumps({
+        'version': version,
+        'schema': FEATURE_SCHEMA,
+        'columns': FEATURE_NAMES,
+        'rows': len(arrays['match_ids']),
+        'built_at': timezone.now().isoformat(),
+    }))
+    try:
+        os.rename(staging, path)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+
+def prune_features(keep=3):
+    """Delete all but the ``keep`` most recently built artifacts."""
+    root = get_store_dir()
+    if not root.exists():
+        return []
+    artifacts = sorted(
+        (path for path in root.iterdir() if path.is_dir() and not path.name.startswith('.')),
+        key=lambda path: path.stat().st_mtime, reverse=True
+    )
+    for path in artifacts[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+    return artifacts[keep:]
+
+
+def load_features(version=None):
+    """The features of ``version``, by default the current data, building them if needed."""
+    current = version is None
+    if current:
+        version = data_version()
+    path = get_store_dir() / version
+    if not path.exists():
+        if not current:
+            raise FileNotFoundError(f'No feature artifact for version {version}')
+        path = save_features(build_features(), version)
+    return FeatureSet(path)
+
+
+current = {'generations': None, 'features': None, 'refresh': None}
+current_lock = threading.Lock()
+
+
+def current_features():
+    """load_features() for the current data, reused until a table it reads changes.
+
+    Whether anything changed is read from the API cache's generation
+    counters, which every write path bumps, so a request that finds the
+    data unchanged makes no query.
+    """
+    generations = get_generations([Match, Innings, PlayerPerformance])
+    with current_lock:
+        if current['generations'] != generations:
+            current['features'] = load_features()
+            current['generations'] = generations
+        return current['features']
+
+
+def refresh_features(generations):
+    try:
+        features = load_features()
+        with current_lock:
+            current['features'] = features
+            current['generations'] = generations
+    finally:
+        # The thread's own connection
+        connection.close()
+
+
+def serving_features():
+    """The features to serve now, and whether they reflect the latest writes.
+
+    Like current_features(), except that once features are loaded a change
+    doesn't make the caller wait for the rebuild (with
+    PREDICTION_SERVE_STALE on): the rebuild runs in the background and the
+    previous features are returned, marked stale, until it finishes.
+    """
+    generations = get_generations([Match, Innings, PlayerPerformance])
+    with current_lock:
+        if current['generations'] == generations:
+            return current['features'], True
+        if current['features'] is None or not getattr(settings, 'PREDICTION_SERVE_STALE', True):
+            current['features'] = load_features()
+            current['generations'] = generations
+            return current['features'], True
+        if current['refresh'] is None or not current['refresh'].is_alive():
+            current['refresh'] = threading.Thread(target=refresh_features, args=(generations,), daemon=True)
+            current['refresh'].start()
+        return current['features'], False
@@ -0,0 +1,247 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def match_details(home, away, day):
+    # Match.__str__ from the pre-joined columns
+    return f"{home} vs {away} - {day}"
+
+
+# Sources that call a model method, and the columns that method reads
+COMPUTED_SOURCES = {
+    'match.__str__': (['match__team_home__short_name', 'match__team_away__short_name', 'match__date'], match_details),
+}
+
+
+def parse_names(value):
+    """Names from a comma separated query parameter, or None when absent."""
+    if value is None:
+        return None
+    return tuple(name.strip() for name in value.split(',') if name.strip())
+
+
+def sparse_params(request):
+    """The ``fields`` and ``expand`` query parameters of a read, as serializer kwargs.
+
+    Writes are validated and answered with every field.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return {}
+    params = {}
+    fields = parse_names(request.query_params.get('fields'))
+    if fields:
+        params['fields'] = fields
+    expand = parse_names(request.query_params.get('expand'))
+    if expand is not None:
+        params['expand'] = expand
+    return params
+
+
+def children(names, name):
+    """The part after ``name.`` of every dotted entry in ``names`` that has one."""
+    if names is None:
+        return None
+    prefix = f'{name}.'
+    nested = tuple(entry[len(prefix):] for entry in names if entry.startswith(prefix))
+    return nested or None
+
+
+class DynamicFieldsMixin:
+    """Let clients trim a serializer's output with ``fields`` and ``expand``.
+
+    Both come from constructor kwargs or, when the serializer is given a
+    request in its context, the ``fields=`` and ``expand=`` query
+    parameters (comma separated). ``fields`` keeps only the named fields;
+    ``name.sub`` picks fields of an embedded relation. Relations in
+    ``Meta.expandable_fields`` are ids unless named in ``expand``, and
+    declared nested serializers are embedded unless ``expand`` is given
+    without them, in which case to-one relations become ids and to-many
+    relations are left out. Without either parameter the output is
+    unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.sparse_fields = kwargs.pop('fields', None)
+        self.expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        if self.sparse_fields is None and self.expand is None:
+            params = sparse_params(self.context.get('request'))
+            self.sparse_fields = params.get('fields')
+            self.expand = params.get('expand')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields is not None:
+            wanted = {name.split('.')[0] for name in self.sparse_fields}
+            fields = {name: field for name, field in fields.items() if name in wanted}
+
+        expandable = dict(getattr(self.Meta, 'expandable_fields', {}))
+        for name, field in fields.items():
+            if isinstance(field, serializers.BaseSerializer):
+                expandable[name] = None
+
+        expand = {name.split('.')[0] for name in self.expand} if self.expand is not None else None
+        for name, serializer_class in expandable.items():
+            if name not in fields:
+                continue
+            field = fields[name]
+            many = isinstance(field, serializers.ListSerializer)
+            nested = many or isinstance(field, serializers.BaseSerializer)
+            expanded = name in expand if expand is not None else nested
+            sub_fields = children(self.sparse_fields, name)
+            sub_expand = children(self.expand, name)
+
+            if expanded:
+                if nested and sub_fields is None and sub_expand is None:
+                    continue
+                if nested:
+                    serializer_class = type(field.child) if many else type(field)
+                fields[name] = serializer_class(many=many, read_only=True, fields=sub_fields, expand=sub_expand)
+            elif many:
+                del fields[name]
+            elif nested:
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+
+def lookups_of(field):
+    """The ORM lookups a non-serializer field reads, or None if unknown."""
+    if field.source == '*':
+        return None
+    if field.source in COMPUTED_SOURCES:
+        return COMPUTED_SOURCES[field.source][0]
+    if '__str__' in field.source or '()' in field.source:
+        return None
+    return [field.source.replace('.', '__')]
+
+
+def query_plan(serializer, model, prefix=''):
+    """select_related, prefetch_related and only() lookups for rendering ``serializer``.
+
+    Only relations the serializer's current fields read are joined or
+    prefetched. ``only`` is None when a field reads something that can't be
+    mapped to columns, in which case every column is loaded.
+    """
+    select = []
+    prefetch = []
+    only = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            relation = model._meta.get_field(field.source)
+            child = query_plan(field.child, relation.related_model)
+            queryset = relation.related_model.objects.all()
+            if child['select']:
+                queryset = queryset.select_related(*child['select'])
+            if child['prefetch']:
+                queryset = queryset.prefetch_related(*child['prefetch'])
+            if child['only'] is not None:
+                # The prefetch matches rows to their parent by this foreign key
+                queryset = queryset.only(*child['only'], relation.field.name)
+            prefetch.append(Prefetch(prefix + field.source, queryset=queryset))
+            continue
+
+        if isinstance(field, serializers.BaseSerializer):
+            relation = model._meta.get_field(field.source)
+            nested = query_plan(field, relation.related_model, f'{prefix}{field.source}__')
+            select.append(prefix + field.source)
+            select.extend(nested['select'])
+            prefetch.extend(nested['prefetch'])
+            if only is not None:
+                only.append(prefix + field.source)
+                only = None if nested['only'] is None else only + nested['only']
+            continue
+
+        lookups = lookups_of(field)
+        if lookups is None:
+            only = None
+            continue
+        for lookup in lookups:
+            parts = lookup.split('__')
+            try:
+                current = model
+                for part in parts[:-1]:
+                    current = current._meta.get_field(part).related_model
+                current._meta.get_field(parts[-1])
+            except (FieldDoesNotExist, AttributeError):
+                # An annotation or a property: leave the columns alone
+                only = None
+                continue
+            for depth in range(1, len(parts)):
+                select.append(prefix + '__'.join(parts[:depth]))
+            if only is not None:
+                only.append(prefix + lookup)
+                only.extend(prefix + '__'.join(parts[:depth]) for depth in range(1, len(parts)))
+
+    return {
+        'select': list(dict.fromkeys(select)),
+        'prefetch': prefetch,
+        'only': list(dict.fromkeys(only)) if only is not None else None,
+    }
+
+
+def read_models(serializer, model):
+    """Every model rendering ``serializer`` for ``model`` rows reads, ``model`` first.
+
+    Embedded serializers add their relation's model and whatever they read;
+    other fields add the models their source walks through.
+    """
+    models = [model]
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            models.extend(read_models(field.child, model._meta.get_field(field.source).related_model))
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            models.extend(read_models(field, model._meta.get_field(field.source).related_model))
+            continue
+        for lookup in lookups_of(field) or ():
+            current = model
+            for part in lookup.split('__')[:-1]:
+                try:
+                    current = current._meta.get_field(part).related_model
+                except (FieldDoesNotExist, AttributeError):
+                    break
+                if current is None:
+                    break
+                models.append(current)
+    return list(dict.fromkeys(models))
+
+
+def ordering_columns(queryset, paginator=None):
+    """Plain columns ``queryset`` and a cursor ``paginator`` order by."""
+    ordering = list(queryset.query.order_by)
+    paginator_ordering = getattr(paginator, 'ordering', None) or ()
+    if isinstance(paginator_ordering, str):
+        paginator_ordering = (paginator_ordering,)
+    ordering.extend(paginator_ordering)
+    return [field.lstrip('-') for field in ordering if isinstance(field, str) and '__' not in field and field != '?']
+
+
+class SparseFieldsMixin:
+    """Fetch only what a ``fields=``/``expand=`` request renders.
+
+    When either parameter is given, the queryset's joins and prefetches
+    are replaced by the ones the trimmed serializer actually reads, and
+    its columns restricted to the ones it renders.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not sparse_params(self.request):
+            return queryset
+
+        plan = query_plan(self.get_serializer(), queryset.model)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if plan['select']:
+            queryset = queryset.select_related(*plan['select'])
+        if plan['prefetch']:
+            queryset = queryset.prefetch_related(*plan['prefetch'])
+        if plan['only'] is not None:
+            # The paginator reads its position from the ordering columns
+            queryset = queryset.only(*plan['only'], *ordering_columns(queryset, getattr(self, 'paginator', None)))
+        return queryset
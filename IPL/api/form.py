@@ -0,0 +1,193 @@
+from datetime import date
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .cache import invalidate
+from .models import PlayerForm, PlayerPerformance
+
+# Players' recent form, folded in one match at a time.
+#
+# A PlayerForm's state holds the totals of the player's last
+# HISTORY_SIZE matches, oldest first, and the weighted averages of every
+# match before them. Saving a performance only recomputes that match's
+# totals and the columns derived from the state, so an update costs the
+# same however many matches the player has played.
+#
+# A match older than the whole history, or the removal of a match from a
+# full history, can't be folded in exactly; the rebuild_player_form
+# command recomputes every player's form from their performances.
+
+FORM_WINDOWS = (3, 5, 10)
+FORM_STATS = ('runs', 'balls_faced', 'strike_rate', 'wickets', 'economy', 'boundaries')
+HISTORY_SIZE = max(FORM_WINDOWS)
+
+FORM_FIELDS = [f'{stat}_last_{window}' for window in FORM_WINDOWS for stat in FORM_STATS]
+FORM_FIELDS += [f'{stat}_ewma' for stat in FORM_STATS]
+
+TOTAL_FIELDS = ('runs', 'balls_faced', 'boundaries', 'wickets', 'runs_conceded', 'balls_bowled')
+
+
+def get_alpha():
+    return getattr(settings, 'PLAYER_FORM_EWMA_ALPHA', 0.3)
+
+
+def overs_to_balls(overs):
+    # 3.4 overs is 3 overs and 4 balls
+    whole = int(overs)
+    return whole * 6 + round((overs - whole) * 10)
+
+
+def match_totals(performances):
+    """Each (player id, match id)'s totals over its innings, from a PlayerPerformance queryset."""
+    rows = performances.order_by().values_list(
+        'player_id', 'match_id', 'match__date', 'match__time',
+        'runs_scored', 'balls_faced', 'fours', 'sixes', 'wickets', 'runs_conceded', 'overs_bowled'
+    )
+    totals = {}
+    for player_id, match_id, day, start, runs, balls, fours, sixes, wickets, conceded, overs in rows:
+        entry = totals.get((player_id, match_id))
+        if entry is None:
+            entry = totals[(player_id, match_id)] = {
+                'match': match_id, 'date': day.isoformat(), 'time': start.isoformat(),
+                **{field: 0 for field in TOTAL_FIELDS},
+            }
+        entry['runs'] += runs
+        entry['balls_faced'] += balls
+        entry['boundaries'] += fours + sixes
+        entry['wickets'] += wickets
+        entry['runs_conceded'] += conceded
+        entry['balls_bowled'] += overs_to_balls(overs)
+    return totals
+
+
+def match_values(entry):
+    """The per-match value of each stat; rates are None without a ball faced or bowled."""
+    return {
+        'runs': entry['runs'],
+        'balls_faced': entry['balls_faced'],
+        'strike_rate': 100 * entry['runs'] / entry['balls_faced'] if entry['balls_faced'] else None,
+        'wickets': entry['wickets'],
+        'economy': 6 * entry['runs_conceded'] / entry['balls_bowled'] if entry['balls_bowled'] else None,
+        'boundaries': entry['boundaries'],
+    }
+
+
+def fold(averages, entry, alpha):
+    """Weighted averages after one more match; a stat with no value keeps its average."""
+    averages = dict(averages)
+    for stat, value in match_values(entry).items():
+        if value is None:
+            continue
+        previous = averages.get(stat)
+        averages[stat] = value if previous is None else alpha * value + (1 - alpha) * previous
+    return averages
+
+
+def order_key(entry):
+    return entry['date'], entry['time'], entry['match']
+
+
+def put_match(state, match_id, entry, alpha):
+    """Replace, add or (with ``entry`` None) remove one match in ``state``."""
+    history = [item for item in state.get('history', []) if item['match'] != match_id]
+    base = state.get('base', {})
+    if entry is not None:
+        if len(history) >= HISTORY_SIZE and order_key(entry) < order_key(history[0]):
+            # Older than every match kept: outside every window
+            base = fold(base, entry, alpha)
+        else:
+            history.append(entry)
+            history.sort(key=order_key)
+    while len(history) > HISTORY_SIZE:
+        base = fold(base, history.pop(0), alpha)
+    return {'history': history, 'base': base}
+
+
+def form_columns(state, alpha):
+    """The PlayerForm column values described by ``state``."""
+    history = state['history']
+    columns = {}
+    for window in FORM_WINDOWS:
+        recent = history[-window:]
+        count = len(recent)
+        sums = {field: sum(entry[field] for entry in recent) for field in TOTAL_FIELDS}
+        columns[f'runs_last_{window}'] = sums['runs'] / count if count else None
+        columns[f'balls_faced_last_{window}'] = sums['balls_faced'] / count if count else None
+        columns[f'strike_rate_last_{window}'] = (
+            100 * sums['runs'] / sums['balls_faced'] if sums['balls_faced'] else None
+        )
+        columns[f'wickets_last_{window}'] = sums['wickets'] / count if count else None
+        columns[f'economy_last_{window}'] = (
+            6 * sums['runs_conceded'] / sums['balls_bowled'] if sums['balls_bowled'] else None
+        )
+        columns[f'boundaries_last_{window}'] = sums['boundaries'] / count if count else None
+
+    averages = state['base']
+    for entry in history:
+        averages = fold(averages, entry, alpha)
+    for stat in FORM_STATS:
+        columns[f'{stat}_ewma'] = averages.get(stat)
+    return columns
+
+
+def set_state(form, state, alpha):
+    form.state = state
+    for field, value in form_columns(state, alpha).items():
+        setattr(form, field, value)
+    form.last_match_date = date.fromisoformat(state['history'][-1]['date']) if state['history'] else None
+    form.updated_at = timezone.now()
+
+
+def update_player_form(pairs):
+    """Fold the current performances of each (player id, match id) into the players' form.
+
+    Call after performances are created, changed or deleted; saves and
+    deletes do this through signals. Reads the changed matches' totals and
+    the players' forms in one query each, whatever the number of pairs.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    player_ids = {player_id for player_id, _ in pairs}
+    match_ids = {match_id for _, match_id in pairs}
+    # The IN filters may match other pairs of the same players and matches;
+    # only the requested pairs are used
+    totals = match_totals(PlayerPerformance.objects.filter(player_id__in=player_ids, match_id__in=match_ids))
+    alpha = get_alpha()
+
+    with transaction.atomic():
+        forms = PlayerForm.objects.select_for_update().in_bulk(player_ids)
+        changed = {}
+        for player_id, match_id in sorted(pairs):
+            form = changed.get(player_id) or forms.get(player_id)
+            entry = totals.get((player_id, match_id))
+            if form is None:
+                if entry is None:
+                    continue
+                form = PlayerForm(player_id=player_id, state={})
+            set_state(form, put_match(form.state, match_id, entry, alpha), alpha)
+            changed[player_id] = form
+
+        created = [form for player_id, form in changed.items() if player_id not in forms]
+        updated = [form for player_id, form in changed.items() if player_id in forms]
+        if created:
+            PlayerForm.objects.bulk_create(created)
+        if updated:
+            PlayerForm.objects.bulk_update(updated, FORM_FIELDS + ['state', 'last_match_date', 'updated_at'])
+    if changed:
+        invalidate(PlayerForm)
+
+
+def build_player_forms(performances):
+    """Unsaved PlayerForms computed from scratch from a PlayerPerformance queryset."""
+    alpha = get_alpha()
+    states = {}
+    for (player_id, match_id), entry in sorted(match_totals(performances).items(), key=lambda item: order_key(item[1])):
+        states[player_id] = put_match(states.get(player_id, {}), match_id, entry, alpha)
+
+    forms = []
+    for player_id, state in states.items():
+        form = PlayerForm(player_id=player_id)
+        set_state(form, state, alpha)
+        forms.append(form)
+    return forms
@@ -0,0 +1,119 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as match_time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, AsyncClient
+from django.test.utils import override_settings
+from scraper.metrics import percentile
+from api.models import Team, Player, Stadium, Match, Prediction
+
+# Read endpoints hit by the benchmark, as (synchronous path, async path)
+ENDPOINTS = [
+    ('/api/matches/', '/api/async/matches/'),
+    ('/api/matches/{match}/', '/api/async/matches/{match}/'),
+    ('/api/predictions/', '/api/async/predictions/'),
+    ('/api/teams/{team}/', '/api/async/teams/{team}/'),
+    ('/api/players/{player}/', '/api/async/players/{player}/'),
+]
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Load test the read endpoints through the WSGI and the ASGI handler and compare throughput and tail latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per run')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Concurrent requests: WSGI worker threads, or in-flight ASGI requests')
+        parser.add_argument('--rows', type=int, default=2000, help='Matches to create in the benchmark database')
+        parser.add_argument('--cache', action='store_true', help='Leave the response cache on (off by default)')
+
+    def create_rows(self, count):
+        stadiums = Stadium.objects.bulk_create([Stadium(name=f'Bench Stadium {i}', city=f'City {i}') for i in range(10)])
+        teams = Team.objects.bulk_create([Team(name=f'Bench Team {i}', short_name=f'B{i}') for i in range(10)])
+        players = Player.objects.bulk_create([
+            Player(name=f'Bench Player {i}', team=teams[i % 10], role='BAT', nationality='India') for i in range(220)
+        ])
+        matches = Match.objects.bulk_create([
+            Match(
+                match_number=i + 1, season=2000 + i // 100, date=date(2024, 3, 1) + timedelta(days=i % 365),
+                time=match_time(19, 30), team_home=teams[i % 10], team_away=teams[(i + 1) % 10],
+                venue=stadiums[i % 10], status='COMPLETED',
+            )
+            for i in range(count)
+        ])
+        Prediction.objects.bulk_create([
+            Prediction(
+                match=match, predicted_winner=match.team_home, win_probability=0.6,
+                predicted_score_team1=170, predicted_score_team2=160, model_version='bench',
+            )
+            for match in matches
+        ])
+        return {'match': matches[0].pk, 'team': teams[0].pk, 'player': players[0].pk}
+
+    def report(self, label, latencies, elapsed, failures):
+        latencies = [latency * 1000 for latency in latencies]
+        self.stdout.write(
+            f'  {label + ":":6} {len(latencies) / elapsed:8.1f} req/s   p50 {percentile(latencies, 50):7.2f} ms   '
+            f'p95 {percentile(latencies, 95):7.2f} ms   p99 {percentile(latencies, 99):7.2f} ms   {failures} failed'
+        )
+
+    def run_wsgi(self, paths, concurrency):
+        local = threading.local()
+
+        def get(path):
+            # One client per worker thread, as each WSGI worker handles one request at a time
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get(path)
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(get, paths))
+        return results, time.perf_counter() - started
+
+    async def run_asgi(self, paths, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def get(path):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(path)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get(path) for path in paths))
+        return results, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        concurrency = options['concurrency']
+
+        # A throwaway database, so the worker threads see committed rows
+        # without touching the real one
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            ids = self.create_rows(options['rows'])
+            caches = {} if options['cache'] else {'CACHES': NO_CACHE}
+            with override_settings(ALLOWED_HOSTS=['testserver'], **caches):
+                for sync_path, async_path in ENDPOINTS:
+                    sync_paths = [sync_path.format(**ids)] * count
+                    async_paths = [async_path.format(**ids)] * count
+                    self.stdout.write(f'{sync_path} ({count} requests, concurrency {concurrency})')
+
+                    results, elapsed = self.run_wsgi(sync_paths, concurrency)
+                    self.report('WSGI', [latency for latency, _ in results], elapsed,
+                                sum(1 for _, code in results if code != 200))
+                    results, elapsed = asyncio.run(self.run_asgi(async_paths, concurrency))
+                    self.report('ASGI', [latency for latency, _ in results], elapsed,
+                                sum(1 for _, code in results if code != 200))
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
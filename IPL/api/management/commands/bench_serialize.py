@@ -0,0 +1,86 @@
+import time
+from datetime import date, time as match_time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.fastpath import ValuesRowBuilder
+from api.renderers import FastJSONRenderer
+from api.models import Team, Player, Stadium, Match, Innings, PlayerPerformance
+from api.serializers import MatchSerializer, PlayerPerformanceSerializer
+
+class Command(BaseCommand):
+    help = 'Benchmark list serialization through DRF serializers vs the values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows of each model to serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best one is reported')
+
+    def create_rows(self, count):
+        stadiums = Stadium.objects.bulk_create([Stadium(name=f'Bench Stadium {i}', city=f'City {i}') for i in range(10)])
+        teams = Team.objects.bulk_create([Team(name=f'Bench Team {i}', short_name=f'B{i}') for i in range(10)])
+        players = Player.objects.bulk_create([
+            Player(name=f'Bench Player {i}', team=teams[i % 10], role='BAT', nationality='India') for i in range(220)
+        ])
+        matches = Match.objects.bulk_create([
+            Match(
+                match_number=i + 1, season=2000 + i // 100, date=date(2024, 3, 1) + timedelta(days=i % 365),
+                time=match_time(19, 30), team_home=teams[i % 10], team_away=teams[(i + 1) % 10],
+                venue=stadiums[i % 10], status='COMPLETED',
+            )
+            for i in range(count)
+        ])
+        per_match = 22
+        innings = Innings.objects.bulk_create([
+            Innings(match=match, innings_number=1, batting_team=match.team_home, bowling_team=match.team_away,
+                    runs=160, wickets=6, overs=20.0)
+            for match in matches[:count // per_match + 1]
+        ])
+        PlayerPerformance.objects.bulk_create([
+            PlayerPerformance(
+                player=players[i % len(players)], match=innings[i // per_match].match, innings=innings[i // per_match],
+                runs_scored=i % 80, balls_faced=i % 60, overs_bowled=3.4, economy=7.25,
+            )
+            for i in range(count)
+        ], batch_size=2000)
+
+    def time_best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def handle(self, *args, **options):
+        count = options['rows']
+        repeat = options['repeat']
+
+        # Everything is written inside a transaction that is rolled back
+        with transaction.atomic():
+            self.create_rows(count)
+            cases = [
+                ('Match', MatchSerializer, Match.objects.order_by('id')[:count]),
+                ('PlayerPerformance', PlayerPerformanceSerializer, PlayerPerformance.objects.order_by('id')[:count]),
+            ]
+            for label, serializer_class, queryset in cases:
+                related = [field for field in ('team_home', 'team_away', 'venue', 'player') if hasattr(queryset.model, field)]
+                builder = ValuesRowBuilder(serializer_class)
+
+                def serializer_path():
+                    rows = list(queryset.select_related(*related))
+                    return JSONRenderer().render(serializer_class(rows, many=True).data)
+
+                def fast_path():
+                    return FastJSONRenderer().render(builder.rows(builder.queryset(queryset)))
+
+                slow, expected = self.time_best(serializer_path, repeat)
+                fast, output = self.time_best(fast_path, repeat)
+                self.stdout.write(f'{label} ({count} rows)')
+                self.stdout.write(f'  Serializer: {count / slow:10.0f} rows/s ({slow:.3f}s)')
+                self.stdout.write(f'  Fast path:  {count / fast:10.0f} rows/s ({fast:.3f}s)')
+                if output == expected:
+                    self.stdout.write(self.style.SUCCESS(f'  Speedup: {slow / fast:.1f}x, output identical'))
+                else:
+                    self.stdout.write(self.style.ERROR('  Output differs between the two paths'))
+            transaction.set_rollback(True)
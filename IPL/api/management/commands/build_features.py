@@ -0,0 +1,139 @@
+import time
+import random
+import shutil
+import resource
+import tempfile
+from datetime import date, time as match_time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import override_settings
+from api.features import (
+    FeatureSet, build_features, data_version, get_store_dir, prune_features, save_features
+)
+from api.models import Team, Player, Stadium, Match, Innings, PlayerPerformance
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Build the match feature artifact for the current data, or benchmark the pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild even if the current version exists')
+        parser.add_argument('--keep', type=int, default=3, help='Artifacts to keep, newest first')
+        parser.add_argument('--bench', type=int, metavar='MATCHES',
+                            help='Benchmark on a throwaway database with this many generated matches')
+
+    def create_rows(self, count):
+        rng = random.Random(0)
+        stadiums = Stadium.objects.bulk_create([Stadium(name=f'Bench Stadium {i}', city=f'City {i}') for i in range(12)])
+        teams = Team.objects.bulk_create([Team(name=f'Bench Team {i}', short_name=f'B{i}') for i in range(10)])
+        squads = {
+            team.pk: Player.objects.bulk_create([
+                Player(name=f'Bench Player {team.pk}-{i}', team=team, role='BAT', nationality='India') for i in range(11)
+            ])
+            for team in teams
+        }
+        for start in range(0, count, 1000):
+            matches = []
+            for i in range(start, min(start + 1000, count)):
+                home, away = rng.sample(teams, 2)
+                matches.append(Match(
+                    match_number=i + 1, season=2008 + i // 80, date=date(2008, 4, 1) + timedelta(days=i // 2),
+                    time=match_time(15 + 4 * (i % 2), 30), team_home=home, team_away=away,
+                    venue=rng.choice(stadiums), toss_winner=rng.choice([home, away]),
+                    toss_decision=rng.choice(['bat', 'field']), match_winner=rng.choice([home, away]),
+                    status='COMPLETED',
+                ))
+            Match.objects.bulk_create(matches)
+            innings = [
+                Innings(match=match, innings_number=number, batting_team=batting, bowling_team=bowling,
+                        runs=rng.randint(110, 230), wickets=rng.randint(2, 10), overs=20)
+                for match in matches
+                for number, batting, bowling in ((1, match.team_home, match.team_away),
+                                                 (2, match.team_away, match.team_home))
+            ]
+            Innings.objects.bulk_create(innings)
+            PlayerPerformance.objects.bulk_create([
+                PlayerPerformance(player=player, match=row.match, innings=row, runs_scored=rng.randint(0, 60),
+                                  balls_faced=rng.randint(1, 40), fours=rng.randint(0, 5), sixes=rng.randint(0, 3))
+                for row in innings
+                for player in squads[row.batting_team_id]
+            ], batch_size=2000)
+
+    def orm_columns(self):
+        """The same columns collected by iterating model instances, for comparison."""
+        columns = []
+        for match in Match.objects.order_by('date', 'time', 'id').iterator(chunk_size=2000):
+            columns.append((match.id, match.date.toordinal(), match.team_home_id, match.team_away_id,
+                            match.venue_id, match.toss_winner_id, match.toss_decision, match.match_winner_id))
+        for innings in Innings.objects.order_by().iterator(chunk_size=2000):
+            columns.append((innings.match_id, innings.innings_number, innings.batting_team_id, innings.runs))
+        for performance in PlayerPerformance.objects.select_related('innings').order_by().iterator(chunk_size=2000):
+            columns.append((performance.match_id, performance.innings.batting_team_id, performance.fours, performance.sixes))
+        return columns
+
+    def benchmark(self, count):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Generating {count} matches...')
+            self.create_rows(count)
+            rows = Match.objects.count() + Innings.objects.count() + PlayerPerformance.objects.count()
+            self.stdout.write(f'{rows} rows in total')
+
+            # The columnar build runs first, as peak RSS only ever grows
+            baseline = peak_rss_mb()
+            started = time.perf_counter()
+            arrays = build_features()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  columnar:    {rows / elapsed:10.0f} rows/s   {elapsed:7.2f} s   '
+                f'peak RSS +{peak_rss_mb() - baseline:7.1f} MB'
+            )
+
+            with tempfile.TemporaryDirectory() as store, override_settings(FEATURE_STORE_DIR=store):
+                path = save_features(arrays, 'bench')
+                started = time.perf_counter()
+                features = FeatureSet(path)
+                features.features.sum()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  mmap reload: {elapsed * 1000:10.2f} ms to load and sum {len(features)} rows')
+
+            baseline = peak_rss_mb()
+            started = time.perf_counter()
+            self.orm_columns()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  ORM objects: {rows / elapsed:10.0f} rows/s   {elapsed:7.2f} s   '
+                f'peak RSS +{peak_rss_mb() - baseline:7.1f} MB (columns only, no features)'
+            )
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def handle(self, *args, **options):
+        if options['bench']:
+            self.benchmark(options['bench'])
+            return
+
+        version = data_version()
+        path = get_store_dir() / version
+        if path.exists() and not options['force']:
+            self.stdout.write(f'Features for data version {version} are up to date: {path}')
+        else:
+            started = time.perf_counter()
+            arrays = build_features()
+            elapsed = time.perf_counter() - started
+            if path.exists():
+                # A forced rebuild replaces the artifact rather than keeping it
+                shutil.rmtree(path)
+            save_features(arrays, version)
+            self.stdout.write(self.style.SUCCESS(
+                f'Built {len(arrays["match_ids"])} rows for data version {version} in {elapsed:.2f}s '
+                f'(peak RSS {peak_rss_mb():.1f} MB): {path}'
+            ))
+        for removed in prune_features(options['keep']):
+            self.stdout.write(f'Removed old artifact {removed.name}')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.registry import ModelNotFound, registry
+
+
+class Command(BaseCommand):
+    help = 'Make a model version the active one, or roll back to the previous one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help='Model version to activate')
+        parser.add_argument('--rollback', action='store_true', help='Reactivate the previously active version')
+        parser.add_argument('--list', action='store_true', help='List the model versions')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            active = registry.active_version()
+            for version in registry.versions():
+                self.stdout.write(f'{"*" if version == active else " "} {version}')
+            return
+        if options['rollback'] == bool(options['version']):
+            raise CommandError('Give either a version or --rollback')
+
+        try:
+            version = registry.rollback() if options['rollback'] else registry.promote(options['version'])
+        except ModelNotFound as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Model {version} is now active'))
@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.cache import invalidate
+from api.form import build_player_forms
+from api.models import PlayerForm, PlayerPerformance
+
+
+class Command(BaseCommand):
+    help = "Recompute every player's form from their performances"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        forms = build_player_forms(PlayerPerformance.objects.all())
+        with transaction.atomic():
+            PlayerForm.objects.all().delete()
+            PlayerForm.objects.bulk_create(forms, batch_size=500)
+        invalidate(PlayerForm)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the form of {len(forms)} player(s) in {time.perf_counter() - started:.2f}s'
+        ))
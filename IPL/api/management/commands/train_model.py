@@ -0,0 +1,41 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from api.features import load_features
+from api.registry import MatchModel, registry
+
+
+class Command(BaseCommand):
+    help = 'Train a match model on the current features and add it to the model registry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', help='Name of the new model version')
+        parser.add_argument('--l2', type=float, default=1.0, help='L2 penalty on the weights')
+        parser.add_argument('--promote', action='store_true', help='Make the new version the active model')
+
+    def handle(self, *args, **options):
+        version = options['version']
+        if version in registry.versions():
+            raise CommandError(f'Model version {version} already exists')
+
+        started = time.perf_counter()
+        features = load_features()
+        try:
+            model = MatchModel.fit(version, features, l2=options['l2'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        decided = ~np.isnan(features.target)
+        probability, _ = model.predict(features.features[decided], features.columns)
+        target = np.asarray(features.target[decided])
+        accuracy = ((probability >= 0.5) == target).mean()
+        self.stdout.write(
+            f'Trained on {decided.sum()} matches of data version {features.version} in '
+            f'{time.perf_counter() - started:.2f}s; training accuracy {accuracy:.3f}'
+        )
+
+        path = registry.save(model)
+        self.stdout.write(self.style.SUCCESS(f'Saved model {version} to {path}'))
+        if options['promote']:
+            registry.promote(version)
+            self.stdout.write(self.style.SUCCESS(f'Model {version} is now active'))
@@ -0,0 +1,232 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+import numpy as np
+from django.conf import settings
+from .cache import invalidate
+from .models import Player, Match, Innings, PlayerPerformance, Prediction
+
+# Memoized /api/predict/ results.
+#
+# A prediction is keyed by match, model version and a fingerprint of the
+# exact feature row it was computed from, so new data for a match, or for
+# the matches its features summarize, gives a new key rather than an old
+# answer. Results are kept in memory, bounded by count and age, and stored
+# as Prediction rows, so a restarted process or another worker finds them
+# without running the model again.
+#
+# Saves and deletes of a match, its innings and performances, or a squad
+# also expire this process's memoized predictions for the matches they
+# touch, which covers inputs the features don't capture.
+
+COUNTERS = ('hits', 'stored_hits', 'misses', 'stale_served', 'evictions', 'expirations', 'invalidations')
+
+
+def fingerprint(values, teams):
+    """Digest of one match's feature row and teams."""
+    return hashlib.blake2b(values.tobytes() + teams.tobytes(), digest_size=16).hexdigest()
+
+
+def build_predictions(match_ids, teams, probability, scores):
+    """Prediction dicts from the model's home win probabilities and (home, away) scores."""
+    winners = np.where(probability >= 0.5, teams[:, 0], teams[:, 1])
+    scores = np.rint(np.clip(scores, 0, None))
+    return [
+        {
+            'match': match_id,
+            'predicted_winner': winner,
+            'win_probability': max(home, 1 - home),
+            'home_win_probability': home,
+            'predicted_score_team1': None if np.isnan(score1) else int(score1),
+            'predicted_score_team2': None if np.isnan(score2) else int(score2),
+        }
+        for match_id, winner, home, (score1, score2) in zip(
+            match_ids, winners.tolist(), probability.tolist(), scores.tolist()
+        )
+    ]
+
+
+class PredictionMemo:
+    """Predictions by (match id, model version, feature fingerprint), LRU and TTL bounded."""
+
+    def __init__(self, capacity=None, ttl=None):
+        self._capacity = capacity
+        self._ttl = ttl
+        # key -> (expiry, marks at the time it was stored, prediction)
+        self.entries = OrderedDict()
+        # Bumped by invalidate(); an entry stored under older marks is expired
+        self.match_marks = defaultdict(int)
+        self.team_marks = defaultdict(int)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._capacity or getattr(settings, 'PREDICTION_CACHE_SIZE', 10000)
+
+    @property
+    def ttl(self):
+        return self._ttl or getattr(settings, 'PREDICTION_CACHE_TTL', 3600)
+
+    def marks(self, match_id, teams):
+        return self.match_marks[match_id], self.team_marks[teams[0]], self.team_marks[teams[1]]
+
+    def get(self, key, teams, fresh):
+        """The memoized prediction of ``key``, or None.
+
+        An entry expired by invalidate() is still returned while the
+        features are stale (``fresh`` false), as nothing newer exists yet.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expiry, marks, prediction = entry
+        if expiry <= time.monotonic():
+            del self.entries[key]
+            self.counters['expirations'] += 1
+            return None
+        if fresh and marks != self.marks(key[0], teams):
+            del self.entries[key]
+            self.counters['invalidations'] += 1
+            return None
+        self.entries.move_to_end(key)
+        return prediction
+
+    def put(self, key, teams, prediction):
+        self.entries[key] = (time.monotonic() + self.ttl, self.marks(key[0], teams), prediction)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def load_stored(self, version, keys, teams):
+        """Predictions stored for ``keys`` by earlier requests, in one query."""
+        homes = {key: pair[0] for key, pair in zip(keys, teams)}
+        rows = Prediction.objects.filter(
+            match_id__in={key[0] for key in keys}, model_version=version,
+            feature_fingerprint__in={key[2] for key in keys},
+        ).order_by('prediction_time').values_list(
+            'match_id', 'feature_fingerprint', 'predicted_winner_id', 'win_probability',
+            'predicted_score_team1', 'predicted_score_team2',
+        )
+        stored = {}
+        for match_id, digest, winner, probability, score1, score2 in rows:
+            key = (match_id, version, digest)
+            if key not in homes:
+                continue
+            # Later rows replace earlier ones
+            stored[key] = {
+                'match': match_id,
+                'predicted_winner': winner,
+                'win_probability': probability,
+                'home_win_probability': probability if winner == homes[key] else 1 - probability,
+                'predicted_score_team1': score1,
+                'predicted_score_team2': score2,
+            }
+        return stored
+
+    def store(self, version, keys, predictions):
+        """Save computed predictions as Prediction rows; ones without scores can't be."""
+        rows = [
+            Prediction(
+                match_id=prediction['match'], predicted_winner_id=prediction['predicted_winner'],
+                win_probability=prediction['win_probability'],
+                predicted_score_team1=prediction['predicted_score_team1'],
+                predicted_score_team2=prediction['predicted_score_team2'],
+                model_version=version, feature_fingerprint=key[2],
+            )
+            for key, prediction in zip(keys, predictions)
+            if prediction['predicted_score_team1'] is not None and prediction['predicted_score_team2'] is not None
+        ]
+        if rows:
+            Prediction.objects.bulk_create(rows)
+            # bulk_create sends no post_save, so cached API responses are expired here
+            invalidate(Prediction)
+
+    def predict(self, model, features, rows, fresh=True):
+        """Predictions for the matches in ``rows`` of ``features``, running the model only on new ones.
+
+        ``fresh`` is false when ``features`` are known to be behind the
+        latest writes; every prediction returned then counts as stale.
+        """
+        match_ids = features.match_ids[rows].tolist()
+        values = np.asarray(features.features[rows])
+        teams = np.asarray(features.teams[rows])
+        keys = [
+            (match_id, model.version, fingerprint(values[index], teams[index]))
+            for index, match_id in enumerate(match_ids)
+        ]
+        team_pairs = teams.tolist()
+
+        with self.lock:
+            invalidations = self.counters['invalidations']
+            results = []
+            expired = set()
+            for index, (key, pair) in enumerate(zip(keys, team_pairs)):
+                results.append(self.get(key, pair, fresh))
+                if self.counters['invalidations'] != invalidations:
+                    # Stored rows share the fingerprint, so they are as out of date
+                    invalidations = self.counters['invalidations']
+                    expired.add(index)
+            self.counters['hits'] += sum(1 for result in results if result is not None)
+        missing = [index for index, result in enumerate(results) if result is None]
+
+        if missing:
+            lookup = [index for index in missing if index not in expired]
+            stored = self.load_stored(
+                model.version, [keys[index] for index in lookup], [team_pairs[index] for index in lookup]
+            ) if lookup else {}
+            computed = [index for index in missing if keys[index] not in stored]
+            if computed:
+                probability, scores = model.predict(values[computed], features.columns)
+                predictions = build_predictions(
+                    [match_ids[index] for index in computed], teams[computed], probability, scores
+                )
+                self.store(model.version, [keys[index] for index in computed], predictions)
+                stored.update(zip((keys[index] for index in computed), predictions))
+            with self.lock:
+                for index in missing:
+                    results[index] = stored[keys[index]]
+                    self.put(keys[index], team_pairs[index], results[index])
+                self.counters['stored_hits'] += len(missing) - len(computed)
+                self.counters['misses'] += len(computed)
+
+        if not fresh:
+            with self.lock:
+                self.counters['stale_served'] += len(results)
+        return results
+
+    def invalidate(self, match_ids=(), team_ids=()):
+        """Expire the predictions of ``match_ids`` and of every match of ``team_ids``."""
+        with self.lock:
+            for match_id in match_ids:
+                self.match_marks[match_id] += 1
+            for team_id in team_ids:
+                self.team_marks[team_id] += 1
+
+    def invalidate_rows(self, model, rows):
+        """Expire the predictions that saved or deleted ``rows`` of ``model`` feed into."""
+        if model is Match:
+            self.invalidate(match_ids={row.pk for row in rows})
+        elif model in (Innings, PlayerPerformance):
+            self.invalidate(match_ids={row.match_id for row in rows})
+        elif model is Player:
+            # A squad change affects every match of the team
+            self.invalidate(team_ids={row.team_id for row in rows})
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def stats(self):
+        """The counters, with the share of predictions served without running the model."""
+        with self.lock:
+            stats = dict(self.counters, size=len(self.entries), capacity=self.capacity, ttl=self.ttl)
+        served = stats['hits'] + stats['stored_hits']
+        stats['hit_ratio'] = served / (served + stats['misses']) if served + stats['misses'] else None
+        return stats
+
+
+memo = PredictionMemo()
@@ -0,0 +1,224 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_number', models.PositiveIntegerField()),
+                ('season', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('toss_decision', models.CharField(blank=True, max_length=10, null=True)),
+                ('win_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('win_margin', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('SCHEDULED', 'Scheduled'), ('LIVE', 'Live'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], default='SCHEDULED', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Matches',
+                'ordering': ['-date', '-time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Player',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('role', models.CharField(choices=[('BAT', 'Batsman'), ('BWL', 'Bowler'), ('AR', 'All-Rounder'), ('WK', 'Wicket Keeper')], max_length=3)),
+                ('batting_style', models.CharField(blank=True, max_length=50, null=True)),
+                ('bowling_style', models.CharField(blank=True, max_length=50, null=True)),
+                ('nationality', models.CharField(max_length=50)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Stadium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=50)),
+                ('country', models.CharField(default='India', max_length=50)),
+                ('capacity', models.PositiveIntegerField(blank=True, null=True)),
+                ('pitch_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('average_first_innings_score', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Innings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('innings_number', models.PositiveIntegerField()),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('wickets', models.PositiveIntegerField(default=0)),
+                ('overs', models.FloatField(default=0)),
+                ('extras', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='innings', to='api.match')),
+            ],
+            options={
+                'verbose_name_plural': 'Innings',
+                'ordering': ['match', 'innings_number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='player_of_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='player_of_match_awards', to='api.player'),
+        ),
+        migrations.CreateModel(
+            name='PlayerPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batting_position', models.PositiveIntegerField(blank=True, null=True)),
+                ('runs_scored', models.PositiveIntegerField(default=0)),
+                ('balls_faced', models.PositiveIntegerField(default=0)),
+                ('fours', models.PositiveIntegerField(default=0)),
+                ('sixes', models.PositiveIntegerField(default=0)),
+                ('how_out', models.CharField(blank=True, max_length=50, null=True)),
+                ('overs_bowled', models.FloatField(default=0)),
+                ('maidens', models.PositiveIntegerField(default=0)),
+                ('runs_conceded', models.PositiveIntegerField(default=0)),
+                ('wickets', models.PositiveIntegerField(default=0)),
+                ('economy', models.FloatField(blank=True, null=True)),
+                ('catches', models.PositiveIntegerField(default=0)),
+                ('run_outs', models.PositiveIntegerField(default=0)),
+                ('stumpings', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('innings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_performances', to='api.innings')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_performances', to='api.match')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performances', to='api.player')),
+            ],
+            options={
+                'ordering': ['match', 'innings'],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='venue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='api.stadium'),
+        ),
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('short_name', models.CharField(max_length=10)),
+                ('logo', models.URLField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('captain', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='captain_of', to='api.player')),
+                ('home_venue', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='home_teams', to='api.stadium')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='players', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='match_winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matches_won', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='team_away',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='away_matches', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='team_home',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='home_matches', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='toss_winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='toss_won', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='innings',
+            name='batting_team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batting_innings', to='api.team'),
+        ),
+        migrations.AddField(
+            model_name='innings',
+            name='bowling_team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bowling_innings', to='api.team'),
+        ),
+        migrations.CreateModel(
+            name='PlayerPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('predicted_runs', models.PositiveIntegerField(blank=True, null=True)),
+                ('predicted_wickets', models.PositiveIntegerField(blank=True, null=True)),
+                ('predicted_economy', models.FloatField(blank=True, null=True)),
+                ('predicted_strike_rate', models.FloatField(blank=True, null=True)),
+                ('prediction_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reasoning', models.TextField(blank=True, null=True)),
+                ('model_version', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_predictions', to='api.match')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_predictions', to='api.player')),
+            ],
+            options={
+                'ordering': ['-prediction_time'],
+                'indexes': [models.Index(fields=['-prediction_time', '-id'], name='playerprediction_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Prediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('win_probability', models.FloatField()),
+                ('predicted_score_team1', models.PositiveIntegerField()),
+                ('predicted_score_team2', models.PositiveIntegerField()),
+                ('prediction_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reasoning', models.TextField(blank=True, null=True)),
+                ('model_version', models.CharField(max_length=50)),
+                ('was_correct', models.BooleanField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='api.match')),
+                ('predicted_winner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predicted_wins', to='api.team')),
+            ],
+            options={
+                'ordering': ['-prediction_time'],
+                'indexes': [models.Index(fields=['-prediction_time', '-id'], name='prediction_time_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-date', '-time', '-id'], name='match_date_time_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', '-date', '-time'], name='match_season_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['status', 'date'], name='match_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprediction',
+            index=models.Index(fields=['player', '-prediction_time'], name='playerprediction_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['match', '-prediction_time'], name='prediction_match_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='innings',
+            constraint=models.UniqueConstraint(fields=('match', 'innings_number'), name='unique_innings_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('match_number', 'season'), name='unique_match_number_season'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('name', 'team'), name='unique_player_per_team'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerperformance',
+            constraint=models.UniqueConstraint(fields=('player', 'match', 'innings'), name='unique_player_innings'),
+        ),
+        migrations.AddConstraint(
+            model_name='stadium',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_stadium_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='team',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_team_name'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_team_match_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerForm',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='form', serialize=False, to='api.player')),
+                ('runs_last_3', models.FloatField(blank=True, null=True)),
+                ('balls_faced_last_3', models.FloatField(blank=True, null=True)),
+                ('strike_rate_last_3', models.FloatField(blank=True, null=True)),
+                ('wickets_last_3', models.FloatField(blank=True, null=True)),
+                ('economy_last_3', models.FloatField(blank=True, null=True)),
+                ('boundaries_last_3', models.FloatField(blank=True, null=True)),
+                ('runs_last_5', models.FloatField(blank=True, null=True)),
+                ('balls_faced_last_5', models.FloatField(blank=True, null=True)),
+                ('strike_rate_last_5', models.FloatField(blank=True, null=True)),
+                ('wickets_last_5', models.FloatField(blank=True, null=True)),
+                ('economy_last_5', models.FloatField(blank=True, null=True)),
+                ('boundaries_last_5', models.FloatField(blank=True, null=True)),
+                ('runs_last_10', models.FloatField(blank=True, null=True)),
+                ('balls_faced_last_10', models.FloatField(blank=True, null=True)),
+                ('strike_rate_last_10', models.FloatField(blank=True, null=True)),
+                ('wickets_last_10', models.FloatField(blank=True, null=True)),
+                ('economy_last_10', models.FloatField(blank=True, null=True)),
+                ('boundaries_last_10', models.FloatField(blank=True, null=True)),
+                ('runs_ewma', models.FloatField(blank=True, null=True)),
+                ('balls_faced_ewma', models.FloatField(blank=True, null=True)),
+                ('strike_rate_ewma', models.FloatField(blank=True, null=True)),
+                ('wickets_ewma', models.FloatField(blank=True, null=True)),
+                ('economy_ewma', models.FloatField(blank=True, null=True)),
+                ('boundaries_ewma', models.FloatField(blank=True, null=True)),
+                ('state', models.JSONField(default=dict)),
+                ('last_match_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
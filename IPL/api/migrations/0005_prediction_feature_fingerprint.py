@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_player_form'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='feature_fingerprint',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['match', 'model_version', 'feature_fingerprint'], name='prediction_memo_idx'),
+        ),
+    ]
@@ -16,6 +16,9 @@ class Team(models.Model):
     
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_team_name'),
+        ]
 
 class Player(models.Model):
     """Model representing an IPL player."""
@@ -42,6 +45,9 @@ class Player(models.Model):
     
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'team'], name='unique_player_per_team'),
+        ]
 
 class Stadium(models.Model):
     """Model representing a cricket stadium."""
@@ -59,6 +65,9 @@ class Stadium(models.Model):
     
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_stadium_name'),
+        ]
 
 class Match(models.Model):
     """Model representing an IPL match."""
@@ -92,6 +101,17 @@ class Match(models.Model):
     class Meta:
         ordering = ['-date', '-time']
         verbose_name_plural = 'Matches'
+        indexes = [
+            models.Index(fields=['-date', '-time', '-id'], name='match_date_time_idx'),
+            models.Index(fields=['season', '-date', '-time'], name='match_season_date_idx'),
+            models.Index(fields=['status', 'date'], name='match_status_date_idx'),
+            # A team's fixtures: each side of the home/away OR reads its own index
+            models.Index(fields=['team_home', '-date', '-time'], name='match_home_date_idx'),
+            models.Index(fields=['team_away', '-date', '-time'], name='match_away_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['match_number', 'season'], name='unique_match_number_season'),
+        ]
 
 class Innings(models.Model):
     """Model representing an innings in a match."""
@@ -112,6 +132,9 @@ class Innings(models.Model):
     class Meta:
         ordering = ['match', 'innings_number']
         verbose_name_plural = 'Innings'
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'innings_number'], name='unique_innings_number'),
+        ]
 
 class PlayerPerformance(models.Model):
     """Model representing a player's performance in a match."""
@@ -147,6 +170,53 @@ class PlayerPerformance(models.Model):
     
     class Meta:
         ordering = ['match', 'innings']
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'match', 'innings'], name='unique_player_innings'),
+        ]
+
+class PlayerForm(models.Model):
+    """Model representing a player's recent form, kept up to date as performances are saved."""
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, primary_key=True, related_name='form')
+    
+    # Per-match averages over the last 3, 5 and 10 matches; strike rate and
+    # economy are over all balls faced and bowled in those matches
+    runs_last_3 = models.FloatField(blank=True, null=True)
+    balls_faced_last_3 = models.FloatField(blank=True, null=True)
+    strike_rate_last_3 = models.FloatField(blank=True, null=True)
+    wickets_last_3 = models.FloatField(blank=True, null=True)
+    economy_last_3 = models.FloatField(blank=True, null=True)
+    boundaries_last_3 = models.FloatField(blank=True, null=True)
+    
+    runs_last_5 = models.FloatField(blank=True, null=True)
+    balls_faced_last_5 = models.FloatField(blank=True, null=True)
+    strike_rate_last_5 = models.FloatField(blank=True, null=True)
+    wickets_last_5 = models.FloatField(blank=True, null=True)
+    economy_last_5 = models.FloatField(blank=True, null=True)
+    boundaries_last_5 = models.FloatField(blank=True, null=True)
+    
+    runs_last_10 = models.FloatField(blank=True, null=True)
+    balls_faced_last_10 = models.FloatField(blank=True, null=True)
+    strike_rate_last_10 = models.FloatField(blank=True, null=True)
+    wickets_last_10 = models.FloatField(blank=True, null=True)
+    economy_last_10 = models.FloatField(blank=True, null=True)
+    boundaries_last_10 = models.FloatField(blank=True, null=True)
+    
+    # Exponentially weighted averages over every match played
+    runs_ewma = models.FloatField(blank=True, null=True)
+    balls_faced_ewma = models.FloatField(blank=True, null=True)
+    strike_rate_ewma = models.FloatField(blank=True, null=True)
+    wickets_ewma = models.FloatField(blank=True, null=True)
+    economy_ewma = models.FloatField(blank=True, null=True)
+    boundaries_ewma = models.FloatField(blank=True, null=True)
+    
+    # The last matches' totals and the weighted averages before them, from
+    # which the columns above are updated without rereading performances
+    state = models.JSONField(default=dict)
+    last_match_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Form of {self.player}"
 
 class Prediction(models.Model):
     """Model representing a match prediction."""
@@ -158,6 +228,8 @@ class Prediction(models.Model):
     prediction_time = models.DateTimeField(default=timezone.now)
     reasoning = models.TextField(blank=True, null=True)
     model_version = models.CharField(max_length=50)
+    # Digest of the features the prediction was computed from, when scored by /api/predict/
+    feature_fingerprint = models.CharField(max_length=32, blank=True, null=True)
     was_correct = models.BooleanField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -167,6 +239,11 @@ class Prediction(models.Model):
     
     class Meta:
         ordering = ['-prediction_time']
+        indexes = [
+            models.Index(fields=['-prediction_time', '-id'], name='prediction_time_idx'),
+            models.Index(fields=['match', '-prediction_time'], name='prediction_match_time_idx'),
+            models.Index(fields=['match', 'model_version', 'feature_fingerprint'], name='prediction_memo_idx'),
+        ]
 
 class PlayerPrediction(models.Model):
     """Model representing a player performance prediction."""
@@ -187,3 +264,7 @@ class PlayerPrediction(models.Model):
     
     class Meta:
         ordering = ['-prediction_time']
+        indexes = [
+            models.Index(fields=['-prediction_time', '-id'], name='playerprediction_time_idx'),
+            models.Index(fields=['player', '-prediction_time'], name='playerprediction_player_idx'),
+        ]
@@ -0,0 +1,79 @@
+import json
+import base64
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination for large, time-ordered tables.
+
+    Pages are fetched with a WHERE on the ordering column instead of an
+    OFFSET, and without a COUNT, so every page costs the same however deep
+    the client pages. Each ordering ends with the primary key so rows with
+    equal timestamps still page in a stable order.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class MatchPagination(KeysetPagination):
+    ordering = ('-date', '-time', '-id')
+
+
+class PredictionPagination(KeysetPagination):
+    ordering = ('-prediction_time', '-id')
+
+
+class PlayerPerformancePagination(KeysetPagination):
+    ordering = ('-id',)
+
+
+# Keyset paging for views outside DRF: a cursor is the ordering values of
+# the last row on the previous page
+
+def encode_cursor(values):
+    """An opaque cursor for the row with these ordering values."""
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor, ordering):
+    """The ordering values a cursor holds; raises ValueError (or binascii.Error) if malformed."""
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def after(ordering, values):
+    """Rows that come after ``values`` in ``ordering``."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    # Implied by the OR, but lets the database seek the index on the
+    # leading column instead of reading every row before the cursor
+    first = ordering[0]
+    bound = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': values[0]})
+    return bound & condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=KeysetPagination.page_size):
+    """One page of ``queryset`` in ``ordering``, and the cursor of the next page or None.
+
+    Raises ValueError (or binascii.Error, ValidationError) for a malformed cursor.
+    """
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, ordering)))
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    columns = [field.lstrip('-') for field in ordering]
+    if isinstance(last, dict):
+        return rows, encode_cursor([last[column] for column in columns])
+    return rows, encode_cursor([getattr(last, column) for column in columns])
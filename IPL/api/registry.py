@@ -0,0 +1,258 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Versioned match models, served in process.
+#
+# Each version is a directory under MODEL_REGISTRY_DIR holding the model's
+# arrays. active.json names the version predictions use and the versions
+# active before it. It is replaced atomically, so a promotion or rollback
+# is seen whole by every process on its next request. Loaded models are
+# kept in memory, up to MODEL_REGISTRY_CAPACITY of them, least recently
+# used first out.
+
+MODEL_FILE = 'model.npz'
+ACTIVE_FILE = 'active.json'
+
+
+class ModelNotFound(LookupError):
+    pass
+
+
+def sigmoid(values):
+    return 1 / (1 + np.exp(-values))
+
+
+def write_atomic(path, text):
+    """Replace ``path`` with ``text`` so readers see the old or the new file, never part of one."""
+    handle, staging = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}-')
+    with os.fdopen(handle, 'w') as f:
+        f.write(text)
+    os.replace(staging, path)
+
+
+class MatchModel:
+    """A logistic home-win model and a linear (home, away) score model over the match features.
+
+    Features are standardized with the training means and deviations, and
+    missing values replaced by the training means.
+    """
+    ARRAYS = ('mean', 'scale', 'win_weights', 'win_bias', 'score_weights', 'score_bias')
+
+    def __init__(self, version, columns, mean, scale, win_weights, win_bias, score_weights, score_bias):
+        self.version = version
+        self.columns = list(columns)
+        self.mean = mean
+        self.scale = scale
+        self.win_weights = win_weights
+        self.win_bias = win_bias
+        self.score_weights = score_weights
+        self.score_bias = score_bias
+        self.indices = {}
+
+    @classmethod
+    def fit(cls, version, features, l2=1.0, iterations=25):
+        """Train on the decided matches of a FeatureSet."""
+        decided = ~np.isnan(features.target)
+        if not decided.any():
+            raise ValueError('No decided matches to train on')
+        values = np.asarray(features.features[decided])
+        known = (~np.isnan(values)).sum(axis=0)
+        mean = np.divide(np.nansum(values, axis=0), known, out=np.zeros(values.shape[1]), where=known > 0)
+        values = np.where(np.isnan(values), mean, values)
+        scale = values.std(axis=0)
+        scale[scale == 0] = 1
+        inputs = np.column_stack([(values - mean) / scale, np.ones(len(values))])
+        penalty = l2 * np.eye(inputs.shape[1])
+        penalty[-1, -1] = 0
+
+        # Newton's method on the L2-penalized log loss
+        target = np.asarray(features.target[decided])
+        weights = np.zeros(inputs.shape[1])
+        for _ in range(iterations):
+            probability = sigmoid(inputs @ weights)
+            gradient = inputs.T @ (probability - target) + penalty @ weights
+            hessian = inputs.T @ (inputs * (probability * (1 - probability))[:, None]) + penalty
+            step = np.linalg.solve(hessian + 1e-9 * np.eye(len(weights)), gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+
+        # Ridge regression for the scores, on matches where both sides batted
+        scores = np.asarray(features.scores[decided])
+        scored = ~np.isnan(scores).any(axis=1)
+        if scored.any():
+            rows = inputs[scored]
+            score_weights = np.linalg.solve(rows.T @ rows + penalty + 1e-9 * np.eye(len(weights)), rows.T @ scores[scored])
+        else:
+            score_weights = np.full((inputs.shape[1], 2), np.nan)
+
+        return cls(
+            version, features.columns, mean, scale,
+            weights[:-1], weights[-1:], score_weights[:-1], score_weights[-1]
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path / MODEL_FILE) as arrays:
+            return cls(
+                str(arrays['version']), arrays['columns'].tolist(),
+                **{name: arrays[name] for name in cls.ARRAYS}
+            )
+
+    def save(self, path):
+        np.savez(
+            path / MODEL_FILE, version=self.version, columns=np.array(self.columns),
+            **{name: getattr(self, name) for name in self.ARRAYS}
+        )
+
+    def select(self, values, columns):
+        """The model's columns of ``values``, whose columns are named ``columns``."""
+        key = tuple(columns)
+        if key not in self.indices:
+            missing = [column for column in self.columns if column not in columns]
+            if missing:
+                raise ValueError(f'Features are missing columns {", ".join(missing)}')
+            self.indices[key] = np.array([columns.index(column) for column in self.columns])
+        return values[:, self.indices[key]]
+
+    def predict(self, values, columns):
+        """Home win probabilities and (home, away) scores for rows of features named ``columns``."""
+        values = self.select(np.asarray(values, dtype=np.float64), columns)
+        values = (np.where(np.isnan(values), self.mean, values) - self.mean) / self.scale
+        probability = sigmoid(values @ self.win_weights + self.win_bias[0])
+        return probability, values @ self.score_weights + self.score_bias
+
+
+class ModelRegistry:
+    """Model versions on disk, loaded on first use and kept resident up to a capacity."""
+
+    def __init__(self, directory=None, capacity=None):
+        self._directory = directory
+        self._capacity = capacity
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+        # (inode, mtime) of the active file and what it said
+        self.active_stat = None
+        self.active = {'version': None, 'history': []}
+
+    @property
+    def directory(self):
+        return Path(self._directory or getattr(settings, 'MODEL_REGISTRY_DIR', settings.BASE_DIR / 'models'))
+
+    @property
+    def capacity(self):
+        return self._capacity or getattr(settings, 'MODEL_REGISTRY_CAPACITY', 3)
+
+    def versions(self):
+        if not self.directory.exists():
+            return []
+        return sorted(path.name for path in self.directory.iterdir() if (path / MODEL_FILE).exists())
+
+    def save(self, model):
+        """Add a trained model as a new version."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / model.version
+        if path.exists():
+            raise ValueError(f'Model version {model.version} already exists')
+        staging = Path(tempfile.mkdtemp(dir=self.directory, prefix=f'.{model.version}-'))
+        try:
+            model.save(staging)
+            os.rename(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return path
+
+    def read_active(self):
+        """The active file's contents, reread only when it has been replaced."""
+        path = self.directory / ACTIVE_FILE
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.active_stat = None
+            self.active = {'version': None, 'history': []}
+            return self.active
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key != self.active_stat:
+            self.active = json.loads(path.read_text())
+            self.active_stat = key
+        return self.active
+
+    def active_version(self):
+        return self.read_active()['version']
+
+    def get(self, version=None):
+        """The model of ``version``, by default the active one."""
+        with self.lock:
+            if version is None:
+                version = self.active_version()
+                if version is None:
+                    raise ModelNotFound('No model version is active')
+            model = self.models.get(version)
+            if model is not None:
+                self.models.move_to_end(version)
+                return model
+
+            path = self.directory / version
+            if os.sep in version or version.startswith('.') or not (path / MODEL_FILE).exists():
+                raise ModelNotFound(f'Unknown model version {version}')
+            model = self.models[version] = MatchModel.load(path)
+            while len(self.models) > self.capacity:
+                evicted, _ = self.models.popitem(last=False)
+                logger.info(f"Evicted model {evicted}")
+            return model
+
+    def promote(self, version):
+        """Make ``version`` the active model; the one it replaces can be rolled back to."""
+        self.get(version)
+        with self.lock:
+            active = self.read_active()
+            history = list(active['history'])
+            if active['version'] is not None and active['version'] != version:
+                history.append(active['version'])
+            write_atomic(self.directory / ACTIVE_FILE, json.dumps({'version': version, 'history': history}))
+        logger.info(f"Promoted model {version}")
+        return version
+
+    def rollback(self):
+        """Reactivate the model that was active before the current one."""
+        with self.lock:
+            history = list(self.read_active()['history'])
+            if not history:
+                raise ModelNotFound('No earlier model version to roll back to')
+            version = history.pop()
+            write_atomic(self.directory / ACTIVE_FILE, json.dumps({'version': version, 'history': history}))
+        self.get(version)
+        logger.info(f"Rolled back to model {version}")
+        return version
+
+    def warm(self):
+        """Load the active model and the current features, so the first request doesn't.
+
+        Called when a server process starts; a missing model or database
+        is logged rather than stopping the server.
+        """
+        from .features import current_features
+        try:
+            model = self.get()
+            features = current_features()
+            # Touch the mapped pages so they are resident before the first request
+            model.predict(features.features[-1:], features.columns)
+            float(np.asarray(features.features).sum())
+        except ModelNotFound as e:
+            logger.info(f"No model to warm: {e}")
+        except Exception as e:
+            logger.warning(f"Could not warm the model registry: {e}")
+
+
+registry = ModelRegistry()
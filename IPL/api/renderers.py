@@ -0,0 +1,53 @@
+import re
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson writes floats below 1e-4 in full (``0.00001`` for ``1e-05``) and
+# floats from 1e16 up without the exponent's sign (``1e16`` for ``1e+16``).
+# The search for them matches inside strings too, which only costs a fallback.
+EXPONENT = re.compile(rb'e-?\d+(?:[,\]}]|$)')
+
+
+def has_unmatched_float(content):
+    """Whether orjson's ``content`` holds a float the json module writes differently."""
+    if EXPONENT.search(content):
+        return True
+    start = content.find(b'0.0000')
+    while start != -1:
+        if start == 0 or content[start - 1] in b':,[-':
+            return True
+        start = content.find(b'0.0000', start + 1)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    orjson's compact UTF-8 output is the same as the default JSONRenderer
+    settings produce (COMPACT_JSON, UNICODE_JSON), so responses are
+    byte-identical. Floats below 1e-4 or from 1e16 up are written
+    differently by orjson, so output containing one, and integers too big
+    for orjson, is rendered again by the standard renderer. Non-string
+    keys are turned into strings, as the json module does. Indented output,
+    and everything when orjson is missing, goes through the standard
+    renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if has_unmatched_float(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape the line separators the same way JSONRenderer does
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -1,42 +1,64 @@
 from rest_framework import serializers
 from .models import (
     Team, Player, Stadium, Match, Innings, 
-    PlayerPerformance, Prediction, PlayerPrediction
+    PlayerPerformance, PlayerForm, Prediction, PlayerPrediction
 )
+from .bulk import PrefetchedPrimaryKeyRelatedField
+from .fieldsets import DynamicFieldsMixin
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Team
         fields = '__all__'
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     team_name = serializers.ReadOnlyField(source='team.name')
     
     class Meta:
         model = Player
         fields = '__all__'
+        expandable_fields = {'team': TeamSerializer}
 
-class StadiumSerializer(serializers.ModelSerializer):
+class StadiumSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Stadium
         fields = '__all__'
 
-class InningsSerializer(serializers.ModelSerializer):
+class InningsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     batting_team_name = serializers.ReadOnlyField(source='batting_team.name')
     bowling_team_name = serializers.ReadOnlyField(source='bowling_team.name')
     
     class Meta:
         model = Innings
         fields = '__all__'
+        expandable_fields = {'batting_team': TeamSerializer, 'bowling_team': TeamSerializer}
 
-class PlayerPerformanceSerializer(serializers.ModelSerializer):
+class PlayerPerformanceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     player_name = serializers.ReadOnlyField(source='player.name')
     
     class Meta:
         model = PlayerPerformance
         fields = '__all__'
+        expandable_fields = {'player': PlayerSerializer, 'innings': InningsSerializer}
 
-class MatchSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        match = attrs.get('match', getattr(self.instance, 'match', None))
+        innings = attrs.get('innings', getattr(self.instance, 'innings', None))
+        if match is not None and innings is not None and innings.match_id != match.pk:
+            raise serializers.ValidationError({'innings': [f'Innings {innings.pk} is not part of match {match.pk}.']})
+        return attrs
+
+class PlayerFormSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    player_name = serializers.ReadOnlyField(source='player.name')
+    
+    class Meta:
+        model = PlayerForm
+        exclude = ['state']
+        expandable_fields = {'player': PlayerSerializer}
+
+class MatchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     team_home_name = serializers.ReadOnlyField(source='team_home.name')
     team_away_name = serializers.ReadOnlyField(source='team_away.name')
     venue_name = serializers.ReadOnlyField(source='venue.name')
@@ -44,8 +66,21 @@ class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = '__all__'
+        expandable_fields = {'team_home': TeamSerializer, 'team_away': TeamSerializer, 'venue': StadiumSerializer}
 
-class MatchDetailSerializer(serializers.ModelSerializer):
+class TeamMatchSerializer(MatchSerializer):
+    """A match from one team's side, with the outcome for that team."""
+    is_home = serializers.ReadOnlyField()
+    opponent = serializers.ReadOnlyField(source='opponent_id')
+    opponent_name = serializers.ReadOnlyField()
+    result = serializers.ReadOnlyField()
+    margin = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Match
+        fields = '__all__'
+
+class MatchDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     team_home = TeamSerializer(read_only=True)
     team_away = TeamSerializer(read_only=True)
     venue = StadiumSerializer(read_only=True)
@@ -56,18 +91,22 @@ class MatchDetailSerializer(serializers.ModelSerializer):
         model = Match
         fields = '__all__'
 
-class PredictionSerializer(serializers.ModelSerializer):
+class PredictionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     match_details = serializers.ReadOnlyField(source='match.__str__')
     predicted_winner_name = serializers.ReadOnlyField(source='predicted_winner.name')
     
     class Meta:
         model = Prediction
         fields = '__all__'
+        expandable_fields = {'match': MatchSerializer, 'predicted_winner': TeamSerializer}
 
-class PlayerPredictionSerializer(serializers.ModelSerializer):
+class PlayerPredictionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     player_name = serializers.ReadOnlyField(source='player.name')
     match_details = serializers.ReadOnlyField(source='match.__str__')
     
     class Meta:
         model = PlayerPrediction
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        expandable_fields = {'player': PlayerSerializer, 'match': MatchSerializer}
\ No newline at end of file
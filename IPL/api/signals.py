@@ -0,0 +1,55 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_rows
+from .form import update_player_form
+from .memo import memo
+from .models import (
+    Team, Player, Stadium, Match, Innings,
+    PlayerPerformance, PlayerForm, Prediction, PlayerPrediction
+)
+
+CACHED_MODELS = [Team, Player, Stadium, Match, Innings, PlayerPerformance, PlayerForm, Prediction, PlayerPrediction]
+
+
+@receiver(pre_save)
+def remember_saved_row(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of a row about to be updated.
+
+    A save can move the row to another object, and the responses and
+    forms of the one it leaves have to be expired too.
+    """
+    if sender in CACHED_MODELS and not raw and instance.pk is not None:
+        instance._stored_row = sender._base_manager.filter(pk=instance.pk).first()
+
+
+def saved_rows(instance, signal):
+    """The saved or deleted row, and after an update the row as it was stored."""
+    stored = getattr(instance, '_stored_row', None) if signal is post_save else None
+    return [instance] if stored is None else [instance, stored]
+
+
+@receiver([post_save, post_delete])
+def invalidate_cached_responses(sender, instance, signal, **kwargs):
+    """Expire cached API responses that read the saved or deleted row."""
+    if sender in CACHED_MODELS:
+        invalidate_rows(sender, saved_rows(instance, signal))
+
+
+@receiver([post_save, post_delete], sender=PlayerPerformance)
+def update_form(sender, instance, signal, raw=False, **kwargs):
+    """Fold a saved or deleted performance into the player's form.
+
+    A save that moves the performance to another player or match refolds
+    the pair it left as well, which drops the match from that form.
+    """
+    if raw:
+        return
+    update_player_form({(row.player_id, row.match_id) for row in saved_rows(instance, signal)})
+
+
+@receiver([post_save, post_delete])
+def expire_predictions(sender, instance, signal, raw=False, **kwargs):
+    """Expire memoized predictions of the matches a saved or deleted row feeds into."""
+    if raw:
+        return
+    memo.invalidate_rows(sender, saved_rows(instance, signal))
@@ -0,0 +1,14 @@
+import re
+from django.db import connection
+
+# Helpers shared by the tests of every app
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def full_scans(queryset):
+    """Plan lines where ``queryset`` reads a whole table instead of an index."""
+    plan = queryset.explain()
+    if connection.vendor == 'sqlite':
+        return [line for line in plan.splitlines() if re.search(r'\bSCAN \w+', line) and 'USING' not in line]
+    return [line for line in plan.splitlines() if 'Seq Scan' in line or 'Full scan' in line or 'ALL' in line.split()]
@@ -1,3 +1,1023 @@
-from django.test import TestCase
+import tempfile
+import numpy as np
+from datetime import date, time
+from unittest import mock
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from .cache import generation_key, get_cache, invalidate
+from .views import (
+    InningsViewSet, MatchViewSet, PlayerPerformanceViewSet, PlayerPredictionViewSet, PlayerViewSet,
+    PredictionViewSet, StadiumViewSet, TeamViewSet
+)
+from .fastpath import ValuesRowBuilder, resolve_ordering
+from .form import FORM_FIELDS, build_player_forms
+from .features import FEATURE_NAMES, current, data_version, load_features, prior_sums
+from .registry import MatchModel, ModelNotFound, ModelRegistry, registry
+from .memo import memo
+from .renderers import FastJSONRenderer
+from .testing import LOCMEM_CACHE, full_scans
+from .serializers import MatchDetailSerializer
+from .models import (
+    Team, Player, Stadium, Match, Innings,
+    PlayerPerformance, PlayerForm, Prediction, PlayerPrediction
+)
 
-# Create your tests here.
+
+class DenyObjects(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return False
+
+
+class FixtureMixin:
+    """Teams, players and matches with innings, performances and predictions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        stadiums = [Stadium.objects.create(name=f'Stadium {i}', city=f'City {i}') for i in range(3)]
+        cls.teams = [Team.objects.create(name=f'Team {i}', short_name=f'T{i}') for i in range(4)]
+        players = [
+            Player.objects.create(name=f'Player {i}', team=cls.teams[i % 4], role='BAT', nationality='India')
+            for i in range(16)
+        ]
+        cls.stadium = stadiums[0]
+        cls.player = players[0]
+
+        matches = []
+        for i in range(14):
+            matches.append(Match.objects.create(
+                match_number=i + 1, season=2025, date=date(2025, 4, i + 1), time=time(19, 30),
+                team_home=cls.teams[i % 4], team_away=cls.teams[(i + 1) % 4], venue=stadiums[i % 3],
+            ))
+        cls.match = matches[0]
+
+        for match in matches[:3]:
+            for number in (1, 2):
+                innings = Innings.objects.create(
+                    match=match, innings_number=number,
+                    batting_team=match.team_home, bowling_team=match.team_away,
+                )
+                for player in players[:12]:
+                    PlayerPerformance.objects.create(player=player, match=match, innings=innings)
+
+        for match in matches:
+            for version in ('v1', 'v2'):
+                Prediction.objects.create(
+                    match=match, predicted_winner=match.team_home, win_probability=0.6,
+                    predicted_score_team1=180, predicted_score_team2=170, model_version=version,
+                )
+        for player in players:
+            for match in matches[:3]:
+                PlayerPrediction.objects.create(match=match, player=player, predicted_runs=30, model_version='v1')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class QueryCountTests(FixtureMixin, TestCase):
+    """Every API endpoint runs a fixed number of queries, however many rows it returns.
+
+    There are more players, matches and predictions than fit on a page, so
+    those lists serialize a full page; a missing select_related or
+    prefetch_related shows up as one extra query per row.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertQueries(self, num, url_name, *args):
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse(url_name, args=args), format='json')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_endpoints(self):
+        # One COUNT for the paginator and one SELECT for the page
+        for url_name in ('team-list', 'player-list', 'stadium-list'):
+            with self.subTest(url_name=url_name):
+                response = self.assertQueries(2, url_name)
+                self.assertTrue(response.data['results'])
+
+    def test_cursor_paginated_list_endpoints(self):
+        # Keyset pages skip the COUNT, on the first page and every later one
+        for url_name in ('match-list', 'prediction-list', 'playerprediction-list'):
+            with self.subTest(url_name=url_name):
+                with self.assertNumQueries(1):
+                    response = self.client.get(reverse(url_name), {'page_size': 5}, format='json')
+                first_page = [row['id'] for row in response.data['results']]
+                with self.assertNumQueries(1):
+                    response = self.client.get(response.data['next'], format='json')
+                next_page = [row['id'] for row in response.data['results']]
+                self.assertEqual(len(next_page), 5)
+                self.assertFalse(set(first_page) & set(next_page))
+
+    def test_detail_endpoints(self):
+        self.assertQueries(1, 'team-detail', self.teams[0].pk)
+        self.assertQueries(1, 'player-detail', self.player.pk)
+        self.assertQueries(1, 'stadium-detail', self.stadium.pk)
+        self.assertQueries(1, 'prediction-detail', Prediction.objects.first().pk)
+        self.assertQueries(1, 'playerprediction-detail', PlayerPrediction.objects.first().pk)
+
+    def test_match_detail_prefetches_innings_and_performances(self):
+        response = self.assertQueries(3, 'match-detail', self.match.pk)
+        self.assertEqual(len(response.data['innings']), 2)
+        self.assertEqual(len(response.data['player_performances']), 24)
+
+    def test_detail_actions(self):
+        # One query for the object and one for the related rows
+        actions = [
+            ('team-players', self.teams[0].pk),
+            ('team-matches', self.teams[0].pk),
+            ('player-performances', self.player.pk),
+            ('player-predictions', self.player.pk),
+            ('stadium-matches', self.stadium.pk),
+            ('match-innings', self.match.pk),
+            ('match-performances', self.match.pk),
+            ('match-predictions', self.match.pk),
+        ]
+        for url_name, pk in actions:
+            with self.subTest(url_name=url_name):
+                response = self.assertQueries(2, url_name, pk)
+                self.assertTrue(response.data)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        stadium = Stadium.objects.create(name='Wankhede', city='Mumbai')
+        cls.home = Team.objects.create(name='Mumbai Indians', short_name='MI')
+        cls.away = Team.objects.create(name='Chennai Super Kings', short_name='CSK')
+        cls.match = Match.objects.create(
+            match_number=1, season=2025, date=date(2025, 4, 1), time=time(19, 30),
+            team_home=cls.home, team_away=cls.away, venue=stadium,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('match-list')
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get(self.url, format='json')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, format='json')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get(self.url, format='json')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_save_of_related_model_expires_response(self):
+        etag = self.client.get(self.url, format='json')['ETag']
+        self.home.name = 'MI'
+        self.home.save()
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['team_home_name'], 'MI')
+
+    def test_unrelated_change_keeps_response(self):
+        etag = self.client.get(self.url, format='json')['ETag']
+        PlayerPrediction.objects.create(match=self.match, player=Player.objects.create(
+            name='Rohit Sharma', team=self.home, role='BAT', nationality='India'
+        ), model_version='v1')
+        response = self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalidate_after_queryset_update(self):
+        self.client.get(self.url, format='json')
+        Match.objects.filter(id=self.match.id).update(status='LIVE')
+        invalidate(Match)
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'LIVE')
+
+    def test_generation_is_bumped_again_on_commit(self):
+        self.client.get(self.url, format='json')
+        key = generation_key(Match)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.match.save()
+            saved = get_cache().get(key)
+        # A response cached by another connection before the commit is unreachable afterwards
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertGreater(get_cache().get(key), saved)
+
+    def test_match_save_keeps_other_matches_responses(self):
+        stadium = self.match.venue
+        other = Match.objects.create(
+            match_number=2, season=2025, date=date(2025, 4, 2), time=time(19, 30),
+            team_home=Team.objects.create(name='Royal Challengers Bengaluru', short_name='RCB'),
+            team_away=Team.objects.create(name='Kolkata Knight Riders', short_name='KKR'), venue=stadium,
+        )
+        urls = [reverse('team-matches', args=[self.home.pk]), reverse('match-detail', args=[self.match.pk]),
+                reverse('match-innings', args=[self.match.pk])]
+        etags = [self.client.get(url, format='json')['ETag'] for url in urls]
+        list_etag = self.client.get(self.url, format='json')['ETag']
+        other.status = 'LIVE'
+        other.save()
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A list reads every match
+        self.assertEqual(self.client.get(self.url, format='json', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        self.match.status = 'LIVE'
+        self.match.save()
+        for url, etag in zip(urls[:2], etags):
+            self.assertEqual(self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # The innings don't read the match row
+        self.assertEqual(self.client.get(urls[2], format='json', HTTP_IF_NONE_MATCH=etags[2]).status_code, 304)
+
+    def test_moved_row_expires_the_object_it_left(self):
+        url = reverse('team-matches', args=[self.away.pk])
+        self.assertEqual(len(self.client.get(url, format='json').data['results']), 1)
+        self.match.team_away = Team.objects.create(name='Delhi Capitals', short_name='DC')
+        self.match.save()
+        self.assertEqual(self.client.get(url, format='json').data['results'], [])
+
+    def test_queryset_update_expires_scoped_responses(self):
+        url = reverse('match-detail', args=[self.match.pk])
+        self.client.get(url, format='json')
+        Match.objects.filter(id=self.match.id).update(status='LIVE')
+        invalidate(Match)
+        self.assertEqual(self.client.get(url, format='json').data['status'], 'LIVE')
+
+    def test_object_permissions_apply_to_cached_responses(self):
+        url = reverse('match-detail', args=[self.match.pk])
+        etag = self.client.get(url, format='json')['ETag']
+        innings_url = reverse('match-innings', args=[self.match.pk])
+        self.client.get(innings_url, format='json')
+        with mock.patch.object(MatchViewSet, 'permission_classes', [DenyObjects]):
+            self.assertEqual(self.client.get(url, format='json').status_code, 403)
+            self.assertEqual(self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag).status_code, 403)
+            self.assertEqual(self.client.get(innings_url, format='json').status_code, 403)
+        self.assertEqual(self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FastListTests(FixtureMixin, TestCase):
+    """The values() fast path renders the same bytes as the serializers."""
+
+    def test_responses_match_serializer_path(self):
+        Player.objects.filter(pk=self.player.pk).update(name='Ravindra Jadeja \u2028', batting_style='Left-hand bat')
+        # Later matches have higher ids, but Match orders newest first: ordering
+        # innings by match must not order by match id
+        cases = [
+            (TeamViewSet, 'team-list', {}),
+            (PlayerViewSet, 'player-list', {'ordering': 'team__name'}),
+            (StadiumViewSet, 'stadium-list', {}),
+            (MatchViewSet, 'match-list', {'page_size': 5}),
+            (InningsViewSet, 'innings-list', {}),
+            (InningsViewSet, 'innings-list', {'ordering': '-match'}),
+            (InningsViewSet, 'innings-list', {'fields': 'id,runs', 'ordering': 'match'}),
+            (PlayerPerformanceViewSet, 'playerperformance-list', {'page_size': 500}),
+            (PlayerPerformanceViewSet, 'playerperformance-list', {'fields': 'player_name,runs_scored'}),
+            (PredictionViewSet, 'prediction-list', {'page_size': 500}),
+            (PlayerPredictionViewSet, 'playerprediction-list', {'page_size': 500}),
+        ]
+        for viewset, url_name, params in cases:
+            with self.subTest(url_name=url_name, **params):
+                responses = []
+                for fast_list in (True, False):
+                    cache.clear()
+                    with mock.patch.object(viewset, 'fast_list', fast_list):
+                        responses.append(self.client.get(reverse(url_name), {**params, 'format': 'json'}))
+                self.assertEqual(responses[0].status_code, 200)
+                self.assertEqual(responses[0].content, responses[1].content)
+
+    def test_relation_orderings_are_spelled_out(self):
+        self.assertEqual(
+            resolve_ordering(Innings, Innings._meta.ordering), ['-match__date', '-match__time', 'innings_number']
+        )
+        self.assertEqual(resolve_ordering(PlayerPerformance, ['-innings']), [
+            'innings__match__date', 'innings__match__time', '-innings__innings_number',
+        ])
+        self.assertEqual(resolve_ordering(Innings, ['match_id', '-runs', 'pk']), ['match_id', '-runs', 'pk'])
+
+    def test_unsupported_serializer_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ValuesRowBuilder(MatchDetailSerializer)
+
+    def test_renderer_matches_json_renderer_for_any_float(self):
+        values = [0.0, -0.0, 1e-4, 9.999e-05, 1e-05, -3e-06, 1.5e-07, 5e-324, 0.1, 2.5, 123456.789,
+                  9999999999999998.0, 1e16, -1.2345678901234568e+17, 1.7976931348623157e+308]
+        cases = [values, {'probability': 1e-05, 'hash': '1e16,0.00001', 'ok': 0.5}, 1e16, 2 ** 70, [2 ** 70, 1.5]]
+        for data in cases + [[value] for value in values]:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncViewTests(FixtureMixin, TestCase):
+    """The async endpoints return what the synchronous ones do."""
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_details_match_sync_endpoints(self):
+        cases = [
+            ('match-detail', 'async-match-detail', self.match.pk),
+            ('team-detail', 'async-team-detail', self.teams[0].pk),
+            ('player-detail', 'async-player-detail', self.player.pk),
+        ]
+        for sync_name, async_name, pk in cases:
+            with self.subTest(async_name):
+                expected = await self.async_client.get(reverse(sync_name, args=[pk]), {'format': 'json'})
+                response = await self.async_client.get(reverse(async_name, args=[pk]))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_lists_match_sync_endpoints(self):
+        for sync_name, async_name in (('match-list', 'async-match-list'), ('prediction-list', 'async-prediction-list')):
+            with self.subTest(async_name):
+                expected = self.client.get(reverse(sync_name), {'format': 'json', 'season': 2025}).json()
+                with self.assertNumQueries(1):
+                    response = self.client.get(reverse(async_name))
+                self.assertEqual(response.json()['results'], expected['results'])
+
+    def test_keyset_pages(self):
+        seen = []
+        url = reverse('async-match-list') + '?page_size=5'
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).json()
+            seen.extend(row['id'] for row in page['results'])
+            url = page['next']
+        expected = list(Match.objects.order_by('-date', '-time', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters(self):
+        response = self.client.get(reverse('async-player-list'), {'team': self.teams[1].pk})
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Player 1', 'Player 13', 'Player 5', 'Player 9'])
+        response = self.client.get(reverse('async-prediction-list'), {'model_version': 'v2', 'page_size': 100})
+        self.assertEqual(len(response.json()['results']), 14)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(reverse('async-match-list'), {'season': 'latest'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('async-prediction-list'), {'was_correct': 'maybe'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('async-match-list'), {'cursor': 'nonsense'}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('async-team-detail', args=[999])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('async-match-list')).status_code, 405)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkWriteTests(FixtureMixin, TestCase):
+    """A match's scorecard loads in one request per model and a fixed number of queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('loader'))
+        self.match = Match.objects.get(match_number=10)
+        self.players = list(Player.objects.order_by('id'))
+
+    def post(self, url_name, items):
+        return self.client.post(reverse(url_name), items, format='json')
+
+    def load_innings(self, runs=160):
+        return self.post('innings-bulk', [
+            {'match': self.match.pk, 'innings_number': number, 'batting_team': batting.pk,
+             'bowling_team': bowling.pk, 'runs': runs + number, 'wickets': 6, 'overs': 20.0}
+            for number, batting, bowling in ((1, self.match.team_home, self.match.team_away),
+                                             (2, self.match.team_away, self.match.team_home))
+        ])
+
+    def performances(self, innings_ids, runs=10):
+        return [
+            {'player': player.pk, 'match': self.match.pk, 'innings': innings_ids[i % 2], 'runs_scored': runs + i}
+            for i, player in enumerate(self.players)
+        ]
+
+    def test_scorecard_is_written_in_a_handful_of_queries(self):
+        response = self.load_innings()
+        self.assertEqual(response.status_code, 201)
+        innings_ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(Innings.objects.get(pk=innings_ids[1]).runs, 162)
+
+        # One query per related model, the key lookup and the insert, in a
+        # savepoint; then the players' totals, forms and their writes in another
+        with self.assertNumQueries(13):
+            response = self.post('playerperformance-bulk', self.performances(innings_ids))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['updated']), (16, 0))
+        self.assertEqual(PlayerPerformance.objects.filter(match=self.match).count(), 16)
+
+    def test_posting_again_updates_by_key(self):
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        self.post('playerperformance-bulk', self.performances(innings_ids))
+
+        response = self.load_innings(runs=170)
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 2))
+        self.assertEqual([row['id'] for row in response.data['results']], innings_ids)
+        response = self.post('playerperformance-bulk', self.performances(innings_ids, runs=50))
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 16))
+        self.assertEqual(Innings.objects.get(pk=innings_ids[0]).runs, 171)
+        self.assertEqual(PlayerPerformance.objects.get(player=self.players[0], innings=innings_ids[0]).runs_scored, 50)
+
+    def test_invalid_items_are_reported_and_nothing_is_written(self):
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        items = self.performances(innings_ids)
+        items[1]['player'] = 999999
+        items[3]['runs_scored'] = -1
+        items[4]['innings'] = 'first'
+        response = self.post('playerperformance-bulk', items)
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual([index for index, error in enumerate(errors) if error], [1, 3, 4])
+        self.assertIn('player', errors[1])
+        self.assertIn('runs_scored', errors[3])
+        self.assertIn('innings', errors[4])
+        self.assertFalse(PlayerPerformance.objects.filter(match=self.match).exists())
+
+    def test_duplicate_keys_in_one_request(self):
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        items = self.performances(innings_ids)
+        response = self.post('playerperformance-bulk', items + items[:1])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('item 0', response.data['errors'][16]['non_field_errors'][0])
+
+    def test_predictions_are_created(self):
+        items = [
+            {'match': self.match.pk, 'player': player.pk, 'predicted_runs': 25, 'model_version': 'v3'}
+            for player in self.players
+        ]
+        response = self.post('playerprediction-bulk', items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(PlayerPrediction.objects.filter(model_version='v3').count(), 16)
+        response = self.post('prediction-bulk', [{
+            'match': self.match.pk, 'predicted_winner': self.match.team_home.pk, 'win_probability': 0.7,
+            'predicted_score_team1': 190, 'predicted_score_team2': 175, 'model_version': 'v3',
+        }])
+        self.assertEqual(response.data['created'], 1)
+
+    def test_bulk_write_expires_cached_lists(self):
+        self.client.get(reverse('playerprediction-list'), format='json')
+        self.post('playerprediction-bulk', [{'match': self.match.pk, 'player': self.player.pk, 'model_version': 'v3'}])
+        response = self.client.get(reverse('playerprediction-list'), {'model_version': 'v3'}, format='json')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_innings_must_belong_to_the_match(self):
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        items = self.performances(innings_ids)
+        items[2]['innings'] = Innings.objects.exclude(match=self.match).values_list('pk', flat=True).first()
+        response = self.post('playerperformance-bulk', items)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([index for index, error in enumerate(response.data['errors']) if error], [2])
+        self.assertIn('innings', response.data['errors'][2])
+
+    def test_concurrent_write_of_the_same_keys_conflicts(self):
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        self.post('playerperformance-bulk', self.performances(innings_ids))
+        # As if another request inserted the rows after this one looked the keys up
+        with mock.patch.object(PlayerPerformanceViewSet, 'existing_keys', return_value={}):
+            response = self.post('playerperformance-bulk', self.performances(innings_ids, runs=50))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(PlayerPerformance.objects.filter(match=self.match).count(), 16)
+        self.assertFalse(PlayerPerformance.objects.filter(match=self.match, runs_scored__gte=50).exists())
+
+    def test_bulk_write_expires_memoized_predictions(self):
+        marks = memo.match_marks[self.match.pk]
+        innings_ids = [row['id'] for row in self.load_innings().data['results']]
+        self.assertEqual(memo.match_marks[self.match.pk], marks + 1)
+        self.post('playerperformance-bulk', self.performances(innings_ids))
+        self.assertEqual(memo.match_marks[self.match.pk], marks + 2)
+
+    def test_rejects_non_lists(self):
+        self.assertEqual(self.post('innings-bulk', {'match': self.match.pk}).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SparseFieldsTests(FixtureMixin, TestCase):
+    """fields= and expand= trim both the output and the queries behind it."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, num, url, **params):
+        with self.assertNumQueries(num):
+            response = self.client.get(url, {**params, 'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_match_detail_fields(self):
+        url = reverse('match-detail', args=[self.match.pk])
+        self.assertEqual(self.get(3, url)['team_home']['name'], 'Team 0')
+        self.assertEqual(self.get(1, url, fields='id,date,status'), {'id': self.match.pk, 'date': '2025-04-01', 'status': 'SCHEDULED'})
+
+    def test_match_detail_expand(self):
+        url = reverse('match-detail', args=[self.match.pk])
+        data = self.get(2, url, expand='innings', fields='id,team_home,innings.innings_number,innings.batting_team_name')
+        self.assertEqual(data, {
+            'id': self.match.pk,
+            'team_home': self.teams[0].pk,
+            'innings': [
+                {'innings_number': 1, 'batting_team_name': 'Team 0'},
+                {'innings_number': 2, 'batting_team_name': 'Team 0'},
+            ],
+        })
+        data = self.get(1, url, expand='team_home', fields='id,team_home.short_name,venue')
+        self.assertEqual(data, {'id': self.match.pk, 'team_home': {'short_name': 'T0'}, 'venue': self.stadium.pk})
+        data = self.get(1, url, expand='')
+        self.assertEqual(data['team_away'], self.teams[1].pk)
+        self.assertNotIn('innings', data)
+
+    def test_expanded_relations_expire_cached_responses(self):
+        performance = PlayerPerformance.objects.select_related('innings', 'player__team').first()
+        prediction = Prediction.objects.select_related('match__venue').first()
+        performances = {'player': performance.player_id, 'innings': performance.innings_id}
+        cases = [
+            ('playerperformance-list', performances, 'innings', performance.innings, 'runs', 999),
+            ('playerperformance-list', performances, 'player', performance.player.team, 'name', 'Renamed XI'),
+            ('prediction-list', {'match': prediction.match_id}, 'match', prediction.match.venue, 'name', 'Renamed Ground'),
+        ]
+        for url_name, filters, expand, related, field, value in cases:
+            with self.subTest(url_name=url_name, expand=expand):
+                def embedded():
+                    data = self.client.get(reverse(url_name), {**filters, 'expand': expand, 'format': 'json'}).json()
+                    return data['results'][0][expand]
+
+                self.assertNotIn(value, embedded().values())
+                setattr(related, field, value)
+                related.save()
+                self.assertIn(value, embedded().values())
+
+    def test_list_fields_stay_on_fast_path(self):
+        data = self.get(1, reverse('match-list'), fields='id,season', page_size=5)
+        self.assertEqual(data['results'][0], {'id': 14, 'season': 2025})
+        data = self.client.get(data['next']).json()
+        self.assertEqual(data['results'], [{'id': i, 'season': 2025} for i in (9, 8, 7, 6, 5)])
+
+    def test_list_expand(self):
+        # Players are page-number paginated, which adds a COUNT
+        data = self.get(2, reverse('player-list'), expand='team', fields='name,team.short_name')
+        self.assertEqual(data['results'][0], {'name': 'Player 0', 'team': {'short_name': 'T0'}})
+        data = self.get(1, reverse('prediction-list'), expand='match', fields='id,match.team_home_name', page_size=2)
+        self.assertEqual(set(data['results'][0]['match']), {'team_home_name'})
+
+    def test_writes_ignore_fields(self):
+        user = User.objects.create_user('editor')
+        self.client.force_authenticate(user)
+        url = reverse('team-detail', args=[self.teams[0].pk]) + '?fields=id'
+        response = self.client.patch(url, {'short_name': 'X0'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['short_name'], 'X0')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TeamMatchesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        stadium = Stadium.objects.create(name='Eden Gardens', city='Kolkata')
+        cls.kkr = Team.objects.create(name='Kolkata Knight Riders', short_name='KKR')
+        cls.rcb = Team.objects.create(name='Royal Challengers Bengaluru', short_name='RCB')
+        cls.srh = Team.objects.create(name='Sunrisers Hyderabad', short_name='SRH')
+        fixtures = [
+            (1, 2024, date(2024, 4, 1), cls.kkr, cls.rcb, cls.kkr, 'runs', 7, 'COMPLETED'),
+            (2, 2024, date(2024, 4, 8), cls.srh, cls.kkr, cls.srh, 'wickets', 4, 'COMPLETED'),
+            (3, 2025, date(2025, 4, 2), cls.rcb, cls.kkr, None, None, None, 'COMPLETED'),
+            (4, 2025, date(2025, 4, 9), cls.kkr, cls.srh, None, None, None, 'SCHEDULED'),
+            (5, 2025, date(2025, 4, 10), cls.rcb, cls.srh, None, None, None, 'SCHEDULED'),
+        ]
+        for number, season, day, home, away, winner, win_type, margin, match_status in fixtures:
+            Match.objects.create(
+                match_number=number, season=season, date=day, time=time(19, 30), team_home=home, team_away=away,
+                venue=stadium, match_winner=winner, win_type=win_type, win_margin=margin, status=match_status,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('team-matches', args=[self.kkr.pk])
+
+    def test_outcomes_from_the_team_side(self):
+        response = self.client.get(self.url, format='json')
+        rows = {row['match_number']: row for row in response.data['results']}
+        self.assertEqual(sorted(rows), [1, 2, 3, 4])
+        self.assertEqual(
+            [(rows[n]['is_home'], rows[n]['opponent_name'], rows[n]['result'], rows[n]['margin']) for n in (1, 2, 3, 4)],
+            [
+                (True, 'Royal Challengers Bengaluru', 'WON', '7 runs'),
+                (False, 'Sunrisers Hyderabad', 'LOST', '4 wickets'),
+                (False, 'Royal Challengers Bengaluru', 'NO_RESULT', None),
+                (True, 'Sunrisers Hyderabad', None, None),
+            ],
+        )
+        self.assertEqual(rows[4]['opponent'], self.srh.pk)
+
+    def test_filters(self):
+        response = self.client.get(self.url, {'season': 2025}, format='json')
+        self.assertEqual([row['match_number'] for row in response.data['results']], [4, 3])
+        response = self.client.get(self.url, {'start_date': '2024-04-05', 'end_date': '2025-04-05'}, format='json')
+        self.assertEqual([row['match_number'] for row in response.data['results']], [3, 2])
+        response = self.client.get(self.url, {'status': 'SCHEDULED'}, format='json')
+        self.assertEqual([row['match_number'] for row in response.data['results']], [4])
+
+    def test_invalid_filters(self):
+        for params in ({'season': 'latest'}, {'start_date': '2025-02-30'}, {'end_date': 'tomorrow'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params, format='json').status_code, 400)
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'page_size': 3}, format='json')
+        self.assertEqual([row['match_number'] for row in response.data['results']], [4, 3, 2])
+        response = self.client.get(response.data['next'], format='json')
+        self.assertEqual([row['match_number'] for row in response.data['results']], [1])
+
+
+class PlayerFormTests(TestCase):
+    """Players' rolling form follows their performances without being recomputed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        stadium = Stadium.objects.create(name='Form Stadium', city='City')
+        cls.home = Team.objects.create(name='Home', short_name='HOM')
+        cls.away = Team.objects.create(name='Away', short_name='AWY')
+        cls.batter = Player.objects.create(name='Batter', team=cls.home, role='BAT', nationality='India')
+        cls.bowler = Player.objects.create(name='Bowler', team=cls.away, role='BWL', nationality='India')
+        cls.matches = [
+            Match.objects.create(
+                match_number=i + 1, season=2025, date=date(2025, 4, i + 1), time=time(19, 30),
+                team_home=cls.home, team_away=cls.away, venue=stadium,
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def perform(self, match, player, number=1, **stats):
+        innings, _ = Innings.objects.get_or_create(
+            match=match, innings_number=number,
+            defaults={'batting_team': self.home, 'bowling_team': self.away},
+        )
+        return PlayerPerformance.objects.create(player=player, match=match, innings=innings, **stats)
+
+    def assertMatchesRebuild(self, player):
+        form = PlayerForm.objects.get(player=player)
+        rebuilt = {form.player_id: form for form in build_player_forms(PlayerPerformance.objects.all())}[player.pk]
+        for field in FORM_FIELDS + ['last_match_date']:
+            with self.subTest(field=field):
+                expected = getattr(rebuilt, field)
+                if isinstance(expected, float):
+                    self.assertAlmostEqual(getattr(form, field), expected)
+                else:
+                    self.assertEqual(getattr(form, field), expected)
+
+    def test_windows_and_averages(self):
+        for i, match in enumerate(self.matches):
+            self.perform(match, self.batter, runs_scored=10 * i, balls_faced=10, fours=i % 3)
+        form = PlayerForm.objects.get(player=self.batter)
+        self.assertEqual(form.runs_last_3, 100)
+        self.assertEqual(form.runs_last_10, 65)
+        self.assertEqual(form.strike_rate_last_5, 900)
+        self.assertEqual(form.boundaries_last_3, 1)
+        self.assertIsNone(form.economy_last_10)
+        self.assertEqual(form.last_match_date, date(2025, 4, 12))
+        self.assertEqual(len(form.state['history']), 10)
+        self.assertMatchesRebuild(self.batter)
+
+    def test_innings_of_a_match_are_combined(self):
+        match = self.matches[0]
+        self.perform(match, self.bowler, number=1, runs_scored=12, balls_faced=6)
+        self.perform(match, self.bowler, number=2, overs_bowled=3.4, runs_conceded=33, wickets=2)
+        form = PlayerForm.objects.get(player=self.bowler)
+        self.assertEqual((form.runs_last_3, form.wickets_last_3), (12, 2))
+        self.assertEqual(form.economy_last_3, 9)
+        self.assertEqual(form.strike_rate_ewma, 200)
+
+    def test_out_of_order_changes_and_deletes(self):
+        performances = {}
+        for i in (5, 1, 9, 0, 7, 3, 11, 2):
+            performances[i] = self.perform(self.matches[i], self.batter, runs_scored=i * 7 % 50, balls_faced=20, wickets=i % 2)
+        self.assertMatchesRebuild(self.batter)
+
+        performances[9].runs_scored = 99
+        performances[9].save()
+        self.assertMatchesRebuild(self.batter)
+        performances[11].delete()
+        self.assertMatchesRebuild(self.batter)
+        self.assertEqual(PlayerForm.objects.get(player=self.batter).last_match_date, date(2025, 4, 10))
+
+    def test_moved_performance_leaves_old_form(self):
+        performance = self.perform(self.matches[0], self.batter, runs_scored=30, balls_faced=20)
+        self.perform(self.matches[1], self.batter, runs_scored=10, balls_faced=10)
+        performance.player = self.bowler
+        performance.save()
+        self.assertEqual(PlayerForm.objects.get(player=self.batter).runs_last_3, 10)
+        self.assertEqual(PlayerForm.objects.get(player=self.bowler).runs_last_3, 30)
+        self.assertMatchesRebuild(self.batter)
+        self.assertMatchesRebuild(self.bowler)
+
+        performance.match = self.matches[2]
+        performance.save()
+        form = PlayerForm.objects.get(player=self.bowler)
+        self.assertEqual([entry['date'] for entry in form.state['history']], ['2025-04-03'])
+        self.assertMatchesRebuild(self.bowler)
+
+    def test_bulk_load_updates_form(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('loader'))
+        match = self.matches[0]
+        innings = Innings.objects.create(match=match, innings_number=1, batting_team=self.home, bowling_team=self.away)
+        response = client.post(reverse('playerperformance-bulk'), [
+            {'player': self.batter.pk, 'match': match.pk, 'innings': innings.pk, 'runs_scored': 40, 'balls_faced': 25},
+            {'player': self.bowler.pk, 'match': match.pk, 'innings': innings.pk, 'overs_bowled': 4.0, 'runs_conceded': 30},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        forms = PlayerForm.objects.in_bulk([self.batter.pk, self.bowler.pk])
+        self.assertEqual(forms[self.batter.pk].strike_rate_last_3, 160)
+        self.assertEqual(forms[self.bowler.pk].economy_last_10, 7.5)
+
+    def test_matchup_form_is_read_in_one_query(self):
+        self.perform(self.matches[0], self.batter, runs_scored=30, balls_faced=20)
+        # The match itself, then both squads with their forms
+        with self.assertNumQueries(2):
+            response = APIClient().get(reverse('match-form', args=[self.matches[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['player_name'] for row in response.data['team_home']], ['Batter'])
+        self.assertEqual(response.data['team_home'][0]['strike_rate_last_3'], 150)
+        self.assertEqual(response.data['team_away'][0]['player'], self.bowler.pk)
+        self.assertIsNone(response.data['team_away'][0]['runs_last_3'])
+        self.assertNotIn('state', response.data['team_home'][0])
+
+
+class FeatureFixtureMixin:
+    """Four meetings of two teams at one venue, with feature and model stores in a temporary directory."""
+    # Stale serving rebuilds features on a thread, which needs committed rows
+    serve_stale = False
+
+    @classmethod
+    def setUpTestData(cls):
+        stadium = Stadium.objects.create(name='Feature Stadium', city='City')
+        cls.a = Team.objects.create(name='Alpha', short_name='ALP')
+        cls.b = Team.objects.create(name='Beta', short_name='BET')
+        batter = Player.objects.create(name='Alpha Batter', team=cls.a, role='BAT', nationality='India')
+        # (home, away, toss winner, decision, winner, first innings runs)
+        fixtures = [
+            (cls.a, cls.b, cls.a, 'bat', cls.a, 180),
+            (cls.b, cls.a, cls.a, 'field', cls.b, 160),
+            (cls.a, cls.b, cls.b, 'Bowl', cls.a, 200),
+            (cls.b, cls.a, None, None, None, None),
+        ]
+        cls.matches = []
+        for i, (home, away, toss, decision, winner, runs) in enumerate(fixtures):
+            match = Match.objects.create(
+                match_number=i + 1, season=2025, date=date(2025, 4, i + 1), time=time(19, 30),
+                team_home=home, team_away=away, venue=stadium, toss_winner=toss, toss_decision=decision,
+                match_winner=winner, status='COMPLETED' if winner else 'SCHEDULED',
+            )
+            cls.matches.append(match)
+            if runs is None:
+                continue
+            first = Innings.objects.create(match=match, innings_number=1, batting_team=home, bowling_team=away, runs=runs)
+            second = Innings.objects.create(match=match, innings_number=2, batting_team=away, bowling_team=home, runs=runs - 10)
+            PlayerPerformance.objects.create(
+                player=batter, match=match, innings=first if home == cls.a else second, fours=i + 1, sixes=1
+            )
+
+    def setUp(self):
+        cache.clear()
+        store = tempfile.TemporaryDirectory()
+        self.addCleanup(store.cleanup)
+        settings = override_settings(
+            FEATURE_STORE_DIR=f'{store.name}/features', MODEL_REGISTRY_DIR=f'{store.name}/models',
+            PREDICTION_SERVE_STALE=self.serve_stale,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        registry.models.clear()
+        memo.clear()
+        current['generations'] = None
+        current['features'] = None
+
+
+class FeatureTests(FeatureFixtureMixin, TestCase):
+    """Match features are computed column-wise from earlier matches only."""
+
+    def test_prior_sums(self):
+        keys = np.array([1, 2, 1, 1, 2, 1])
+        values = np.array([1.0, 10.0, 2.0, 3.0, 20.0, 4.0])
+        self.assertEqual(prior_sums(keys, values).tolist(), [0, 0, 1, 3, 10, 6])
+        self.assertEqual(prior_sums(keys, values, window=2).tolist(), [0, 0, 1, 3, 10, 5])
+
+    def test_features_only_use_earlier_matches(self):
+        features = load_features()
+        self.assertEqual(features.match_ids.tolist(), [match.pk for match in self.matches])
+        self.assertEqual(features.columns, FEATURE_NAMES)
+        self.assertTrue(np.isnan(features.target[3]))
+        self.assertEqual(features.target[:3].tolist(), [1, 1, 1])
+
+        self.assertEqual(features.column('toss_home').tolist()[:3], [1, 0, 0])
+        self.assertEqual(features.column('toss_bat_first').tolist()[:3], [1, 0, 0])
+        self.assertTrue(np.isnan(features.column('venue_first_innings_avg')[0]))
+        self.assertEqual(features.column('venue_first_innings_avg').tolist()[1:], [180, 170, 180])
+        # The toss winner won the first match and lost the second and third
+        self.assertEqual(features.column('venue_toss_win_rate').tolist()[1:], [1, 0.5, 1 / 3])
+        # The side batting second lost every match
+        self.assertEqual(features.column('venue_chasing_win_rate').tolist()[1:], [0, 0, 0])
+        self.assertEqual(features.column('head_to_head_matches').tolist(), [0, 1, 2, 3])
+        self.assertEqual(features.column('head_to_head_home_win_rate').tolist()[1:], [0, 0.5, 1 / 3])
+        self.assertEqual(features.column('home_momentum').tolist()[1:], [0, 0.5, 1 / 3])
+        self.assertEqual(features.column('away_momentum').tolist()[1:], [1, 0.5, 2 / 3])
+        self.assertEqual(features.column('home_runs_avg').tolist()[3], (170 + 160 + 190) / 3)
+        self.assertEqual(features.column('away_boundaries_avg').tolist()[3], (2 + 3 + 4) / 3)
+
+    def test_artifact_is_memory_mapped_and_versioned(self):
+        version = data_version()
+        features = load_features()
+        self.assertIsInstance(features.features, np.memmap)
+        self.assertEqual(features.version, version)
+        self.assertEqual(load_features(version).path, features.path)
+
+        Match.objects.filter(pk=self.matches[3].pk).update(toss_winner=self.a, updated_at=self.matches[3].updated_at.replace(year=2030))
+        self.assertNotEqual(data_version(), version)
+        self.assertEqual(load_features().column('toss_home')[3], 0)
+
+
+class ModelRegistryTests(FeatureFixtureMixin, TestCase):
+    """Model versions load lazily, stay resident up to a bound and switch atomically."""
+
+    def train(self, *versions, target=registry):
+        features = load_features()
+        for version in versions:
+            target.save(MatchModel.fit(version, features))
+
+    def test_lru_promotion_and_rollback(self):
+        models = ModelRegistry(capacity=2)
+        self.train('v1', 'v2', 'v3', target=models)
+        for version in ('v1', 'v2', 'v3', 'v2'):
+            self.assertEqual(models.get(version).version, version)
+        self.assertEqual(list(models.models), ['v3', 'v2'])
+        with self.assertRaises(ModelNotFound):
+            models.get()
+        with self.assertRaises(ModelNotFound):
+            models.get('../v1')
+
+        models.promote('v1')
+        models.promote('v2')
+        # Another process sees the promotion on its next read
+        self.assertEqual(ModelRegistry().active_version(), 'v2')
+        self.assertEqual(models.get().version, 'v2')
+        self.assertEqual(models.rollback(), 'v1')
+        self.assertEqual(ModelRegistry().get().version, 'v1')
+        with self.assertRaises(ModelNotFound):
+            models.rollback()
+
+    def test_saved_model_predicts_like_the_trained_one(self):
+        features = load_features()
+        model = MatchModel.fit('v1', features)
+        registry.save(model)
+        probability, scores = model.predict(features.features, features.columns)
+        loaded_probability, loaded_scores = registry.get('v1').predict(features.features, features.columns)
+        np.testing.assert_allclose(loaded_probability, probability)
+        np.testing.assert_allclose(loaded_scores, scores)
+        self.assertTrue(((probability > 0) & (probability < 1)).all())
+
+    def test_predict_scores_a_batch(self):
+        self.train('v1', 'v2')
+        registry.promote('v1')
+        registry.warm()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('scorer'))
+        ids = [self.matches[3].pk, self.matches[0].pk, 999999]
+
+        # The stored prediction lookup and the insert of the new ones
+        with self.assertNumQueries(2):
+            response = client.post(reverse('predict'), {'matches': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['model_version'], 'v1')
+        self.assertEqual([row['match'] for row in response.data['predictions']], ids[:2])
+        self.assertEqual(response.data['missing'], [999999])
+        for row in response.data['predictions']:
+            self.assertIn(row['predicted_winner'], [self.a.pk, self.b.pk])
+            self.assertGreaterEqual(row['win_probability'], 0.5)
+            self.assertIsInstance(row['predicted_score_team1'], int)
+
+        response = client.post(reverse('predict'), {'matches': ids[:1], 'model_version': 'v2'}, format='json')
+        self.assertEqual(response.data['model_version'], 'v2')
+        response = client.post(reverse('predict'), {'matches': ids[:1], 'model_version': 'v9'}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = client.post(reverse('predict'), {'matches': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PredictionMemoTests(FeatureFixtureMixin, TestCase):
+    """Repeated predictions come from memory or stored rows, and saves expire them."""
+
+    def setUp(self):
+        super().setUp()
+        registry.save(MatchModel.fit('v1', load_features()))
+        registry.promote('v1')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('scorer'))
+        self.ids = [self.matches[3].pk, self.matches[2].pk]
+
+    def predict(self):
+        response = self.client.post(reverse('predict'), {'matches': self.ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['predictions']
+
+    def test_repeated_requests_are_served_from_memory(self):
+        first = self.predict()
+        self.assertEqual(Prediction.objects.filter(model_version='v1', feature_fingerprint__isnull=False).count(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.predict(), first)
+        stats = self.client.get(reverse('predict')).data
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 2, 2))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_restarted_process_reads_stored_predictions(self):
+        first = self.predict()
+        memo.clear()
+        with self.assertNumQueries(1):
+            second = self.predict()
+        for computed, stored in zip(first, second):
+            self.assertEqual(stored['predicted_winner'], computed['predicted_winner'])
+            self.assertAlmostEqual(stored['home_win_probability'], computed['home_win_probability'])
+        self.assertEqual((memo.stats()['stored_hits'], memo.stats()['misses']), (2, 0))
+
+    def test_squad_changes_expire_predictions(self):
+        self.predict()
+        Player.objects.create(name='New Signing', team=self.a, role='BWL', nationality='India')
+        self.predict()
+        stats = memo.stats()
+        self.assertEqual((stats['invalidations'], stats['misses'], stats['stored_hits']), (2, 4, 0))
+
+    def test_entries_are_bounded(self):
+        with override_settings(PREDICTION_CACHE_SIZE=1):
+            self.predict()
+            self.assertEqual((memo.stats()['size'], memo.stats()['evictions']), (1, 1))
+        memo.clear()
+        with override_settings(PREDICTION_CACHE_TTL=-1):
+            self.predict()
+            self.predict()
+            self.assertEqual((memo.stats()['expirations'], memo.stats()['stored_hits']), (2, 4))
+
+
+class StalePredictionTests(FeatureFixtureMixin, TransactionTestCase):
+    """After new data, the previous features are served, marked stale, while they are rebuilt."""
+    serve_stale = True
+
+    def setUp(self):
+        self.setUpTestData()
+        super().setUp()
+        registry.save(MatchModel.fit('v1', load_features()))
+        registry.promote('v1')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('scorer'))
+
+    def predict(self):
+        return self.client.post(reverse('predict'), {'matches': [self.matches[3].pk]}, format='json').data
+
+    def test_stale_features_are_served_while_rebuilding(self):
+        first = self.predict()
+        self.assertFalse(first['stale'])
+        Innings.objects.filter(match=self.matches[2], innings_number=1).update(runs=250, updated_at=timezone.now())
+        invalidate(Innings)
+
+        second = self.predict()
+        self.assertTrue(second['stale'])
+        self.assertEqual(second['predictions'], first['predictions'])
+        self.assertEqual(memo.stats()['stale_served'], 1)
+
+        current['refresh'].join()
+        third = self.predict()
+        self.assertFalse(third['stale'])
+        self.assertNotEqual(third['data_version'], first['data_version'])
+
+
+class IndexUsageTests(FixtureMixin, TestCase):
+    """The hot queries of the viewsets, scrapers and scheduler are served by an index."""
+
+    def assertUsesIndex(self, queryset):
+        self.assertEqual(full_scans(queryset), [], queryset.explain())
+
+    def test_hot_queries_use_indexes(self):
+        match = self.match
+        queries = {
+            'match list by season': Match.objects.filter(season=2025).order_by('-date', '-time')[:50],
+            'match keyset page': Match.objects.filter(date__lt=match.date).order_by('-date', '-time', '-id')[:50],
+            'match upsert key': Match.objects.filter(match_number=1, season=2025),
+            'team fixtures': TeamViewSet().team_matches(self.teams[0]).order_by('-date', '-time', '-id')[:50],
+            'match calendar': Match.objects.filter(status__in=['SCHEDULED', 'LIVE'], date__gte=date(2025, 4, 1)),
+            'team by name': Team.objects.filter(name__in=['Team 1', 'Team 2']),
+            'stadium by name': Stadium.objects.filter(name='Stadium 1'),
+            'player upsert key': Player.objects.filter(name='Player 1', team=self.teams[1]),
+            'player performances': PlayerPerformance.objects.filter(player=self.player, match=match),
+            'match performances': PlayerPerformance.objects.filter(match=match),
+            'match innings': Innings.objects.filter(match=match, innings_number=1),
+            'match predictions': Prediction.objects.filter(match=match).order_by('-prediction_time'),
+            'player predictions': PlayerPrediction.objects.filter(player=self.player).order_by('-prediction_time'),
+            'matchup form': Player.objects.filter(team_id__in=[match.team_home_id, match.team_away_id]).select_related('form'),
+        }
+        for label, queryset in queries.items():
+            with self.subTest(query=label):
+                self.assertUsesIndex(queryset)
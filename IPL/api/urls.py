@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     TeamViewSet, PlayerViewSet, StadiumViewSet, MatchViewSet,
-    PredictionViewSet, PlayerPredictionViewSet
+    InningsViewSet, PlayerPerformanceViewSet, PredictionViewSet, PlayerPredictionViewSet,
+    PredictView
 )
 
 router = DefaultRouter()
@@ -10,9 +12,24 @@ router.register(r'teams', TeamViewSet)
 router.register(r'players', PlayerViewSet)
 router.register(r'stadiums', StadiumViewSet)
 router.register(r'matches', MatchViewSet)
+router.register(r'innings', InningsViewSet)
+router.register(r'player-performances', PlayerPerformanceViewSet)
 router.register(r'predictions', PredictionViewSet)
 router.register(r'player-predictions', PlayerPredictionViewSet)
 
+# Async ORM versions of the hot read endpoints, for ASGI deployments
+async_urlpatterns = [
+    path('matches/', async_views.match_list, name='async-match-list'),
+    path('matches/<int:pk>/', async_views.match_detail, name='async-match-detail'),
+    path('predictions/', async_views.prediction_list, name='async-prediction-list'),
+    path('teams/', async_views.team_list, name='async-team-list'),
+    path('teams/<int:pk>/', async_views.team_detail, name='async-team-detail'),
+    path('players/', async_views.player_list, name='async-player-list'),
+    path('players/<int:pk>/', async_views.player_detail, name='async-player-detail'),
+]
+
 urlpatterns = [
+    path('async/', include(async_urlpatterns)),
+    path('predict/', PredictView.as_view(), name='predict'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,147 +1,346 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Prefetch, Q, F, Case, When, Value, CharField, BooleanField
+from django.db.models.functions import Cast, Concat
+from django.utils.dateparse import parse_date
 from .models import (
     Team, Player, Stadium, Match, Innings, 
-    PlayerPerformance, Prediction, PlayerPrediction
+    PlayerPerformance, PlayerForm, Prediction, PlayerPrediction
 )
 from .serializers import (
     TeamSerializer, PlayerSerializer, StadiumSerializer, 
-    MatchSerializer, MatchDetailSerializer, InningsSerializer, 
-    PlayerPerformanceSerializer, PredictionSerializer, PlayerPredictionSerializer
+    MatchSerializer, MatchDetailSerializer, TeamMatchSerializer, InningsSerializer, 
+    PlayerPerformanceSerializer, PlayerFormSerializer, PredictionSerializer, PlayerPredictionSerializer
 )
+from .pagination import MatchPagination, PredictionPagination, PlayerPerformancePagination
+from .cache import CachedResponseMixin, Rows, cache_response
+from .fastpath import FastListMixin
+from .fieldsets import SparseFieldsMixin, ordering_columns
+from .bulk import BulkWriteMixin
+from .form import update_player_form
+from .features import serving_features
+from .memo import memo
+from .registry import registry, ModelNotFound
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for teams.
     """
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
+    cache_models = [Team]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'short_name']
     search_fields = ['name', 'short_name']
     ordering_fields = ['name', 'created_at']
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(Player, 'team'), Rows(Team))
     def players(self, request, pk=None):
         """Get all players for a team."""
         team = self.get_object()
-        players = Player.objects.filter(team=team)
+        players = Player.objects.filter(team=team).select_related('team')
         serializer = PlayerSerializer(players, many=True)
         return Response(serializer.data)
     
+    def team_matches(self, team):
+        """A team's home and away matches in one query, with its result in each."""
+        is_home = Q(team_home=team)
+        return Match.objects.filter(is_home | Q(team_away=team)).annotate(
+            is_home=Case(When(is_home, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            opponent_id=Case(When(is_home, then=F('team_away')), default=F('team_home')),
+            opponent_name=Case(When(is_home, then=F('team_away__name')), default=F('team_home__name')),
+            result=Case(
+                When(match_winner=team, then=Value('WON')),
+                When(match_winner__isnull=False, then=Value('LOST')),
+                When(status='COMPLETED', then=Value('NO_RESULT')),
+                default=None,
+                output_field=CharField(),
+            ),
+            margin=Case(
+                When(
+                    win_margin__isnull=False, win_type__isnull=False,
+                    then=Concat(Cast('win_margin', CharField()), Value(' '), F('win_type')),
+                ),
+                default=None,
+                output_field=CharField(),
+            ),
+        )
+    
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(Match, 'team_home', 'team_away'), Team, Stadium)
     def matches(self, request, pk=None):
-        """Get all matches for a team."""
+        """Get a team's fixtures and results, newest first.
+        
+        Filter with ``season``, ``status``, ``start_date`` and ``end_date``
+        (YYYY-MM-DD); ``fields=`` trims each match. Each match carries ``is_home``, ``opponent``,
+        ``opponent_name``, ``result`` (WON, LOST, NO_RESULT or null) and
+        ``margin``. Results are cursor paginated.
+        """
         team = self.get_object()
-        matches = Match.objects.filter(team_home=team) | Match.objects.filter(team_away=team)
-        serializer = MatchSerializer(matches, many=True)
-        return Response(serializer.data)
+        matches = self.team_matches(team)
+        
+        season = request.query_params.get('season')
+        if season:
+            if not season.isdigit():
+                return Response({'error': 'season must be a year'}, status=status.HTTP_400_BAD_REQUEST)
+            matches = matches.filter(season=int(season))
+        if request.query_params.get('status'):
+            matches = matches.filter(status=request.query_params['status'])
+        for param, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    return Response({'error': f'{param} must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+                matches = matches.filter(**{lookup: day})
+        
+        builder = self.get_row_builder(TeamMatchSerializer)
+        paginator = MatchPagination()
+        page = paginator.paginate_queryset(
+            builder.queryset(matches, extra=ordering_columns(matches, paginator)), request, view=self
+        )
+        return paginator.get_paginated_response(builder.rows(page))
 
-class PlayerViewSet(viewsets.ModelViewSet):
+class PlayerViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for players.
     """
-    queryset = Player.objects.all()
+    queryset = Player.objects.select_related('team')
     serializer_class = PlayerSerializer
+    cache_models = [Player, Team]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'team', 'role', 'nationality']
     search_fields = ['name', 'team__name', 'nationality']
     ordering_fields = ['name', 'team__name', 'created_at']
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(PlayerPerformance, 'player'), Rows(Player))
     def performances(self, request, pk=None):
         """Get all performances for a player."""
         player = self.get_object()
-        performances = PlayerPerformance.objects.filter(player=player)
+        performances = PlayerPerformance.objects.filter(player=player).select_related('player')
         serializer = PlayerPerformanceSerializer(performances, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(PlayerPrediction, 'player'), Rows(Player), Match, Team)
     def predictions(self, request, pk=None):
         """Get all predictions for a player."""
         player = self.get_object()
-        predictions = PlayerPrediction.objects.filter(player=player)
+        predictions = PlayerPrediction.objects.filter(player=player).select_related(
+            'player', 'match__team_home', 'match__team_away'
+        )
         serializer = PlayerPredictionSerializer(predictions, many=True)
         return Response(serializer.data)
 
-class StadiumViewSet(viewsets.ModelViewSet):
+class StadiumViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for stadiums.
     """
     queryset = Stadium.objects.all()
     serializer_class = StadiumSerializer
+    cache_models = [Stadium]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'city', 'country']
     search_fields = ['name', 'city', 'country']
     ordering_fields = ['name', 'city', 'created_at']
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(Match, 'venue'), Team, Rows(Stadium))
     def matches(self, request, pk=None):
         """Get all matches at a stadium."""
         stadium = self.get_object()
-        matches = Match.objects.filter(venue=stadium)
+        matches = Match.objects.filter(venue=stadium).select_related('team_home', 'team_away', 'venue')
         serializer = MatchSerializer(matches, many=True)
         return Response(serializer.data)
 
-class MatchViewSet(viewsets.ModelViewSet):
+class MatchViewSet(CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for matches.
     """
-    queryset = Match.objects.all()
+    queryset = Match.objects.select_related('team_home', 'team_away', 'venue')
+    pagination_class = MatchPagination
+    cache_models = [Match, Team, Stadium]
+    fast_list = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['season', 'team_home', 'team_away', 'venue', 'status']
     search_fields = ['team_home__name', 'team_away__name', 'venue__name']
     ordering_fields = ['date', 'time', 'match_number', 'season']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch('innings', queryset=Innings.objects.select_related('batting_team', 'bowling_team')),
+                Prefetch('player_performances', queryset=PlayerPerformance.objects.select_related('player')),
+            )
+        return queryset
+    
+    def get_cache_models(self):
+        if self.action == 'retrieve':
+            return self.cache_models + [Rows(Innings, 'match'), Rows(PlayerPerformance, 'match'), Player]
+        return self.cache_models
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return MatchDetailSerializer
         return MatchSerializer
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(Innings, 'match'), Team)
     def innings(self, request, pk=None):
         """Get all innings for a match."""
         match = self.get_object()
-        innings = Innings.objects.filter(match=match)
+        innings = Innings.objects.filter(match=match).select_related('batting_team', 'bowling_team')
         serializer = InningsSerializer(innings, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(PlayerPerformance, 'match'), Player)
     def performances(self, request, pk=None):
         """Get all player performances for a match."""
         match = self.get_object()
-        performances = PlayerPerformance.objects.filter(match=match)
+        performances = PlayerPerformance.objects.filter(match=match).select_related('player')
         serializer = PlayerPerformanceSerializer(performances, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @cache_response(Rows(Match), PlayerForm, Player, Team)
+    def form(self, request, pk=None):
+        """Get the recent form of both teams' players."""
+        match = self.get_object()
+        teams = {'team_home': match.team_home_id, 'team_away': match.team_away_id}
+        # Both squads and their forms in one query on the player team index
+        players = Player.objects.filter(team_id__in=teams.values()).select_related('form').order_by('name', 'id')
+        forms = {side: [] for side in teams}
+        for player in players:
+            try:
+                form = player.form
+            except PlayerForm.DoesNotExist:
+                # No performances yet
+                form = PlayerForm(player=player)
+            forms['team_home' if player.team_id == match.team_home_id else 'team_away'].append(form)
+        return Response({
+            side: PlayerFormSerializer(side_forms, many=True, context={'request': request}).data
+            for side, side_forms in forms.items()
+        })
+    
+    @action(detail=True, methods=['get'])
+    @cache_response(Rows(Prediction, 'match'), Rows(Match), Team)
     def predictions(self, request, pk=None):
         """Get all predictions for a match."""
         match = self.get_object()
-        predictions = Prediction.objects.filter(match=match)
+        predictions = Prediction.objects.filter(match=match).select_related(
+            'match__team_home', 'match__team_away', 'predicted_winner'
+        )
         serializer = PredictionSerializer(predictions, many=True)
         return Response(serializer.data)
 
-class PredictionViewSet(viewsets.ModelViewSet):
+class InningsViewSet(BulkWriteMixin, CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
+    """
+    API endpoint for innings.
+    """
+    queryset = Innings.objects.select_related('batting_team', 'bowling_team')
+    serializer_class = InningsSerializer
+    cache_models = [Innings, Team]
+    fast_list = True
+    bulk_key_fields = ('match', 'innings_number')
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['match', 'batting_team', 'bowling_team', 'innings_number']
+    ordering_fields = ['match', 'innings_number', 'runs']
+
+class PlayerPerformanceViewSet(BulkWriteMixin, CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
+    """
+    API endpoint for player performances.
+    """
+    queryset = PlayerPerformance.objects.select_related('player')
+    pagination_class = PlayerPerformancePagination
+    serializer_class = PlayerPerformanceSerializer
+    cache_models = [PlayerPerformance, Player]
+    fast_list = True
+    bulk_key_fields = ('player', 'match', 'innings')
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['match', 'player', 'innings']
+    ordering_fields = ['runs_scored', 'wickets']
+    
+    def bulk_write(self, rows):
+        results = super().bulk_write(rows)
+        # bulk writes send no post_save, so the players' form is updated here
+        update_player_form((values['player'].pk, values['match'].pk) for values in rows)
+        return results
+
+class PredictionViewSet(BulkWriteMixin, CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for match predictions.
     """
-    queryset = Prediction.objects.all()
+    queryset = Prediction.objects.select_related('match__team_home', 'match__team_away', 'predicted_winner')
+    pagination_class = PredictionPagination
     serializer_class = PredictionSerializer
+    cache_models = [Prediction, Match, Team]
+    fast_list = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['match', 'predicted_winner', 'model_version', 'was_correct']
     search_fields = ['match__team_home__name', 'match__team_away__name', 'predicted_winner__name']
     ordering_fields = ['prediction_time', 'win_probability']
 
-class PlayerPredictionViewSet(viewsets.ModelViewSet):
+class PlayerPredictionViewSet(BulkWriteMixin, CachedResponseMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for player performance predictions.
     """
-    queryset = PlayerPrediction.objects.all()
+    queryset = PlayerPrediction.objects.select_related('player', 'match__team_home', 'match__team_away')
+    pagination_class = PredictionPagination
     serializer_class = PlayerPredictionSerializer
+    cache_models = [PlayerPrediction, Player, Match, Team]
+    fast_list = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['match', 'player', 'model_version']
     search_fields = ['player__name', 'match__team_home__name', 'match__team_away__name']
     ordering_fields = ['prediction_time', 'predicted_runs', 'predicted_wickets']
+
+class PredictView(APIView):
+    """
+    API endpoint that scores a batch of matches with the active model.
+    
+    POST {"matches": [ids], "model_version": optional}. Matches already
+    scored on the same features are answered from the prediction cache; the
+    rest are scored in one vectorized call on the in-memory features. GET
+    returns this process's prediction cache counters.
+    """
+    max_matches = 1000
+    
+    def get(self, request):
+        return Response(memo.stats())
+    
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        match_ids = data.get('matches')
+        if not isinstance(match_ids, list) or not all(type(match_id) is int for match_id in match_ids):
+            return Response({'error': 'matches must be a list of match ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(match_ids) > self.max_matches:
+            return Response(
+                {'error': f'At most {self.max_matches} matches per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            model = registry.get(data.get('model_version'))
+        except ModelNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        
+        features, fresh = serving_features()
+        rows = features.rows(match_ids)
+        return Response({
+            'model_version': model.version,
+            'data_version': features.version,
+            # True while newer features are being built
+            'stale': not fresh,
+            'predictions': memo.predict(model, features, rows[rows >= 0], fresh),
+            'missing': [match_id for match_id, row in zip(match_ids, rows.tolist()) if row < 0],
+        })
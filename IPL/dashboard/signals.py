@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from scraper.models import ScraperJob
+from .summary import expire_summary
+
+
+@receiver([post_save, post_delete], sender=ScraperJob)
+def expire_dashboard_summary(sender, **kwargs):
+    """Recount job statuses on the next dashboard load after a job changes."""
+    expire_summary()
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from scraper.models import ScraperJob
+from api.models import Team, Player, Match, Stadium
+
+SUMMARY_CACHE_KEY = 'dashboard:summary'
+
+# Context key and the model whose rows it counts
+MODEL_COUNTS = [
+    ('team_count', Team),
+    ('player_count', Player),
+    ('match_count', Match),
+    ('stadium_count', Stadium),
+]
+
+# Context key and the job status it counts
+JOB_STATUS_COUNTS = [
+    ('pending_jobs', 'PENDING'),
+    ('running_jobs', 'RUNNING'),
+    ('completed_jobs', 'COMPLETED'),
+    ('failed_jobs', 'FAILED'),
+]
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def compute_summary():
+    """Model counts and scraper job counts per status, in one query.
+
+    The model counts are scalar subqueries and the job counts conditional
+    aggregates over a single pass of the job table.
+    """
+    quote = connection.ops.quote_name
+    columns = [f'(SELECT COUNT(*) FROM {quote(model._meta.db_table)})' for _, model in MODEL_COUNTS]
+    columns.append('COUNT(*)')
+    columns.extend(f'COUNT(CASE WHEN {quote("status")} = %s THEN 1 END)' for _ in JOB_STATUS_COUNTS)
+    sql = f'SELECT {", ".join(columns)} FROM {quote(ScraperJob._meta.db_table)}'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [status for _, status in JOB_STATUS_COUNTS])
+        row = cursor.fetchone()
+
+    keys = [key for key, _ in MODEL_COUNTS] + ['scraper_job_count'] + [key for key, _ in JOB_STATUS_COUNTS]
+    return dict(zip(keys, row))
+
+
+def get_summary():
+    """The dashboard summary from a snapshot at most DASHBOARD_SUMMARY_TTL seconds old.
+
+    The snapshot is also expired whenever a scraper job is saved or
+    deleted, so job status changes show up immediately.
+    """
+    cache = get_cache()
+    summary = cache.get(SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = compute_summary()
+        cache.set(SUMMARY_CACHE_KEY, summary, getattr(settings, 'DASHBOARD_SUMMARY_TTL', 30))
+    return summary
+
+
+def expire_summary():
+    get_cache().delete(SUMMARY_CACHE_KEY)
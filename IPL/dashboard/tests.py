@@ -1,3 +1,117 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from api.models import Team, Player, Stadium
+from api.pagination import keyset_page, after, decode_cursor
+from api.testing import LOCMEM_CACHE, full_scans
+from scraper.models import ScraperJob, ScraperLog, DataSource
+from .summary import get_summary
+from .views import LOG_ORDERING, scraper_metrics
 
-# Create your tests here.
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        teams = [Team.objects.create(name=f'Team {i}', short_name=f'T{i}') for i in range(3)]
+        Player.objects.create(name='Player 0', team=teams[0])
+        Stadium.objects.create(name='Stadium 0', city='City 0')
+        for status, count in (('PENDING', 3), ('RUNNING', 1), ('COMPLETED', 5), ('FAILED', 2)):
+            for _ in range(count):
+                ScraperJob.objects.create(job_type='TEAM', url='http://example.com/', status=status)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_summary_is_one_query(self):
+        with self.assertNumQueries(1):
+            summary = get_summary()
+        self.assertEqual(summary, {
+            'team_count': 3, 'player_count': 1, 'match_count': 0, 'stadium_count': 1,
+            'scraper_job_count': 11, 'pending_jobs': 3, 'running_jobs': 1, 'completed_jobs': 5, 'failed_jobs': 2,
+        })
+
+    def test_snapshot_is_reused_until_a_job_changes(self):
+        get_summary()
+        with self.assertNumQueries(0):
+            get_summary()
+
+        job = ScraperJob.objects.filter(status='PENDING').first()
+        job.status = 'RUNNING'
+        job.save()
+        summary = get_summary()
+        self.assertEqual((summary['pending_jobs'], summary['running_jobs']), (2, 2))
+
+
+class JobLogPageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = ScraperJob.objects.create(job_type='TEAM', url='http://example.com/')
+        other = ScraperJob.objects.create(job_type='TEAM', url='http://example.com/')
+        start = timezone.now()
+        # Pairs of rows share a timestamp, so pages must break ties by id
+        ScraperLog.objects.bulk_create([
+            ScraperLog(job=job, timestamp=start + timedelta(seconds=i // 2), level='INFO', message=f'Row {i}')
+            for i in range(25)
+            for job in (cls.job, other)
+        ])
+
+    def test_pages_cover_every_log_once_in_order(self):
+        logs = ScraperLog.objects.filter(job=self.job)
+        seen = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                page, cursor = keyset_page(logs, LOG_ORDERING, cursor, 10)
+            seen.extend(log.id for log in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(logs.order_by('-timestamp', '-id').values_list('id', flat=True)))
+
+    def test_pages_use_the_job_log_index(self):
+        logs = ScraperLog.objects.filter(job=self.job)
+        page, cursor = keyset_page(logs, LOG_ORDERING, None, 10)
+        deep = logs.filter(after(LOG_ORDERING, decode_cursor(cursor, LOG_ORDERING))).order_by(*LOG_ORDERING)[:11]
+        self.assertEqual(full_scans(deep), [])
+
+
+class ScraperMetricsViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff')
+        source = DataSource.objects.create(name='Fixtures', base_url='http://example.com')
+        metrics = {
+            'total_seconds': 2.5, 'queries': 12,
+            'phases': {phase: {'seconds': 0.5, 'queries': 3} for phase in ('fetch', 'parse', 'resolve', 'write', 'other')},
+        }
+        for job_type in ('TEAM', 'MATCH'):
+            ScraperJob.objects.create(
+                job_type=job_type, url='http://example.com/', status='COMPLETED', data_source=source,
+                end_time=timezone.now(), metrics=metrics,
+            )
+
+    def get(self, **params):
+        request = RequestFactory().get('/dashboard/metrics/', params)
+        request.user = self.user
+        return scraper_metrics(request)
+
+    def test_renders_both_groupings(self):
+        response = self.get(days='7')
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('last 7 days', content)
+        self.assertIn('<td>Fixtures</td>', content)
+        self.assertIn('<td>Team Data</td>', content)
+        self.assertIn('2.50 / 2.50', content)
+
+    def test_without_jobs(self):
+        ScraperJob.objects.all().delete()
+        response = self.get(days='bad')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('last 14 days', response.content.decode())
+        self.assertIn('No completed jobs', response.content.decode())
@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    path('', views.index, name='index'),
+    path('jobs/', views.scraper_jobs, name='scraper_jobs'),
+    path('jobs/<int:job_id>/', views.scraper_job_detail, name='scraper_job_detail'),
+    path('metrics/', views.scraper_metrics, name='scraper_metrics'),
+    path('sources/', views.data_sources, name='data_sources'),
+    path('sources/<int:source_id>/', views.data_source_detail, name='data_source_detail'),
+    path('configs/', views.scraper_configs, name='scraper_configs'),
+]
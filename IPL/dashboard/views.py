@@ -1,37 +1,38 @@
+import binascii
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from datetime import timedelta
 from scraper.models import ScraperJob, ScraperLog, DataSource, ScraperConfig
-from api.models import Team, Player, Match, Stadium
+from scraper.metrics import PHASES, summarize
+from scraper.pagination import ScraperLogPagination
+from api.pagination import keyset_page
+from .summary import get_summary
+
+JOBS_PER_PAGE = 50
+LOGS_PER_PAGE = 100
+METRICS_DAY_OPTIONS = [7, 14, 30, 90]
+LOG_ORDERING = ScraperLogPagination.ordering
 
 def index(request):
     """Dashboard home page."""
-    # Get counts of various models
     context = {
-        'team_count': Team.objects.count(),
-        'player_count': Player.objects.count(),
-        'match_count': Match.objects.count(),
-        'stadium_count': Stadium.objects.count(),
-        
-        # Scraper stats
-        'scraper_job_count': ScraperJob.objects.count(),
-        'pending_jobs': ScraperJob.objects.filter(status='PENDING').count(),
-        'running_jobs': ScraperJob.objects.filter(status='RUNNING').count(),
-        'completed_jobs': ScraperJob.objects.filter(status='COMPLETED').count(),
-        'failed_jobs': ScraperJob.objects.filter(status='FAILED').count(),
+        # Model and scraper job counts, from a short-lived snapshot
+        **get_summary(),
         
         # Recent activity
         'recent_jobs': ScraperJob.objects.order_by('-created_at')[:10],
-        'recent_logs': ScraperLog.objects.order_by('-timestamp')[:10],
+        'recent_logs': ScraperLog.objects.select_related('job').order_by('-timestamp')[:10],
     }
     
     return render(request, 'dashboard/index.html', context)
 
 @login_required
 def scraper_jobs(request):
-    """View all scraper jobs."""
-    jobs = ScraperJob.objects.all().order_by('-created_at')
+    """View scraper jobs, a page at a time."""
+    jobs = ScraperJob.objects.all().order_by('-created_at', '-id')
     
     # Filter by status if provided
     status_filter = request.GET.get('status')
@@ -43,8 +44,11 @@ def scraper_jobs(request):
     if job_type_filter:
         jobs = jobs.filter(job_type=job_type_filter)
     
+    page = Paginator(jobs, JOBS_PER_PAGE).get_page(request.GET.get('page'))
+    
     context = {
-        'jobs': jobs,
+        'jobs': page,
+        'page_obj': page,
         'status_choices': ScraperJob.STATUS_CHOICES,
         'job_type_choices': ScraperJob.TYPE_CHOICES,
         'selected_status': status_filter,
@@ -55,17 +59,29 @@ def scraper_jobs(request):
 
 @login_required
 def scraper_job_detail(request, job_id):
-    """View details of a specific scraper job."""
+    """View details of a specific scraper job, with its logs a page at a time.
+    
+    Logs are keyset paginated, newest first: ``cursor`` continues after
+    the last row of the previous page, so deep pages cost the same as the
+    first however many rows the job logged.
+    """
     try:
         job = ScraperJob.objects.get(id=job_id)
     except ScraperJob.DoesNotExist:
         return redirect('dashboard:scraper_jobs')
     
-    logs = ScraperLog.objects.filter(job=job).order_by('-timestamp')
+    logs = ScraperLog.objects.filter(job=job)
+    try:
+        logs, next_cursor = keyset_page(logs, LOG_ORDERING, request.GET.get('cursor'), LOGS_PER_PAGE)
+    except (ValueError, binascii.Error, ValidationError):
+        # A mangled cursor starts over from the newest logs
+        logs, next_cursor = keyset_page(logs, LOG_ORDERING, None, LOGS_PER_PAGE)
     
     context = {
         'job': job,
         'logs': logs,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
     }
     
     return render(request, 'dashboard/scraper_job_detail.html', context)
@@ -108,3 +124,29 @@ def scraper_configs(request):
     }
     
     return render(request, 'dashboard/scraper_configs.html', context)
+
+@login_required
+def scraper_metrics(request):
+    """p50/p95 job and phase durations per day, by job type and by data source."""
+    try:
+        days = max(1, min(int(request.GET.get('days', 14)), 90))
+    except ValueError:
+        days = 14
+    
+    jobs = list(ScraperJob.objects.filter(
+        status='COMPLETED',
+        end_time__gte=timezone.now() - timedelta(days=days),
+        metrics__isnull=False,
+    ).values('job_type', 'data_source__name', 'end_time', 'metrics'))
+    
+    type_labels = dict(ScraperJob.TYPE_CHOICES)
+    context = {
+        'days': days,
+        'day_options': METRICS_DAY_OPTIONS,
+        'phases': PHASES + ['other'],
+        'by_job_type': summarize(jobs, lambda job: type_labels.get(job['job_type'], job['job_type'])),
+        'by_data_source': summarize(jobs, lambda job: job['data_source__name'] or 'Unknown'),
+    }
+    context['tables'] = [('job type', context['by_job_type']), ('data source', context['by_data_source'])]
+    
+    return render(request, 'dashboard/scraper_metrics.html', context)
@@ -17,7 +17,7 @@ class ScraperLogAdmin(admin.ModelAdmin):
 
 @admin.register(DataSource)
 class DataSourceAdmin(admin.ModelAdmin):
-    list_display = ('name', 'base_url', 'is_active')
+    list_display = ('name', 'base_url', 'requests_per_second', 'max_concurrency', 'is_active')
     search_fields = ('name', 'base_url')
     list_filter = ('is_active',)
 
@@ -0,0 +1,257 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from django.conf import settings
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+
+def create_chrome_driver():
+    """Start a headless Chrome WebDriver."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=chrome_options)
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and all its descendants.
+
+    Reads /proc, so it returns None on platforms without it.
+    """
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+    except (OSError, ValueError):
+        return total or None
+    return total
+
+
+class PooledDriver:
+    """A WebDriver owned by a DriverPool, with its usage counters."""
+
+    def __init__(self, driver, startup_seconds):
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+        self.created_at = time.monotonic()
+        self.pages = 0
+
+    def rss_bytes(self):
+        """Memory used by the driver service and the browser it started."""
+        try:
+            pid = self.driver.service.process.pid
+        except AttributeError:
+            return None
+        return process_tree_rss(pid)
+
+    def is_healthy(self):
+        """Check the browser still answers commands."""
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting WebDriver: {str(e)}")
+
+
+class DriverPool:
+    """A bounded pool of warm WebDrivers that scrapers lease and return.
+
+    At most ``size`` drivers exist at once, and ``warm()`` starts
+    ``min_size`` of them before the first lease. A driver is health-checked when
+    leased, and recycled after ``max_pages`` leases, when its memory use goes
+    over ``max_rss_mb``, or when the code using it raises and the browser
+    no longer answers. A page that merely times out or lacks an element
+    leaves a healthy driver in the pool.
+    """
+
+    def __init__(self, size=2, max_pages=50, max_rss_mb=1024, factory=create_chrome_driver, min_size=0):
+        self.size = size
+        self.min_size = min(min_size, size)
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.factory = factory
+        self.idle = LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.live = set()
+        self.created = 0
+        self.recycled = 0
+        self.warmed = 0
+        self.warm_seconds = None
+        self.startup_seconds = []
+
+    def _create(self):
+        started = time.monotonic()
+        driver = self.factory()
+        pooled = PooledDriver(driver, time.monotonic() - started)
+        with self.lock:
+            self.live.add(pooled)
+            self.created += 1
+            self.startup_seconds = (self.startup_seconds + [pooled.startup_seconds])[-100:]
+        return pooled
+
+    def _discard(self, pooled, reason):
+        logger.info(f"Recycling WebDriver after {pooled.pages} pages: {reason}")
+        with self.lock:
+            self.live.discard(pooled)
+            self.recycled += 1
+        pooled.quit()
+
+    def _checkout(self):
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                return self._create()
+            if pooled.is_healthy():
+                return pooled
+            self._discard(pooled, 'failed health check')
+
+    def _checkin(self, pooled):
+        if pooled.pages >= self.max_pages:
+            self._discard(pooled, 'page limit reached')
+            return
+        rss = pooled.rss_bytes() if self.max_rss_bytes else None
+        if rss and rss > self.max_rss_bytes:
+            self._discard(pooled, f'memory use {rss // (1024 * 1024)} MB over cap')
+            return
+        self.idle.put(pooled)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Lease a driver for one page; blocks while all drivers are in use."""
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError('No WebDriver available in the pool')
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled.driver
+        except Exception:
+            if pooled is not None:
+                if pooled.is_healthy():
+                    pooled.pages += 1
+                    self._checkin(pooled)
+                else:
+                    self._discard(pooled, 'failed health check after an error')
+            raise
+        except BaseException:
+            if pooled is not None:
+                self._discard(pooled, 'interrupted while leased')
+            raise
+        else:
+            pooled.pages += 1
+            self._checkin(pooled)
+        finally:
+            self.slots.release()
+
+    def warm(self, count=None):
+        """Start drivers ahead of time so the first leases don't wait for them.
+
+        Fills the idle queue up to ``count`` drivers, ``min_size`` by
+        default, and returns how many were started. Each start holds a
+        lease slot, so warming never takes the pool over ``size``.
+        """
+        count = min(self.min_size if count is None else count, self.size)
+        started = 0
+        began = time.monotonic()
+        while self.idle.qsize() < count and self.slots.acquire(blocking=False):
+            try:
+                if len(self.live) >= self.size:
+                    break
+                self.idle.put(self._create())
+                started += 1
+            except Exception as e:
+                logger.warning(f"Could not start a WebDriver ahead of time: {str(e)}")
+                break
+            finally:
+                self.slots.release()
+        with self.lock:
+            self.warmed += started
+            if started:
+                self.warm_seconds = time.monotonic() - began
+        return started
+
+    def metrics(self):
+        """Startup latency and per-driver memory use."""
+        with self.lock:
+            live = list(self.live)
+            startups = list(self.startup_seconds)
+        return {
+            'size': self.size,
+            'live': len(live),
+            'idle': self.idle.qsize(),
+            'created': self.created,
+            'recycled': self.recycled,
+            'warmed': self.warmed,
+            'warm_seconds': self.warm_seconds,
+            'startup_seconds_avg': sum(startups) / len(startups) if startups else None,
+            'startup_seconds_max': max(startups) if startups else None,
+            'drivers': [
+                {'pages': pooled.pages, 'rss_bytes': pooled.rss_bytes(), 'startup_seconds': pooled.startup_seconds}
+                for pooled in live
+            ],
+        }
+
+    def close(self):
+        """Quit every idle driver."""
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except Empty:
+                break
+            with self.lock:
+                self.live.discard(pooled)
+            pooled.quit()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """Get the process-wide driver pool, configured from settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=getattr(settings, 'SCRAPER_DRIVER_POOL_SIZE', 2),
+                max_pages=getattr(settings, 'SCRAPER_DRIVER_MAX_PAGES', 50),
+                max_rss_mb=getattr(settings, 'SCRAPER_DRIVER_MAX_RSS_MB', 1024),
+                min_size=getattr(settings, 'SCRAPER_DRIVER_POOL_MIN_SIZE', 1),
+            )
+            atexit.register(_pool.close)
+        return _pool
+
+
+def prewarm_driver_pool():
+    """Warm the process-wide pool on a background thread and return it.
+
+    Workers call this when they start, so the first player job finds
+    ``SCRAPER_DRIVER_POOL_MIN_SIZE`` browsers already running while jobs
+    are claimed meanwhile.
+    """
+    pool = get_driver_pool()
+    if pool.min_size:
+        threading.Thread(target=pool.warm, name='driver-pool-warm', daemon=True).start()
+    return pool
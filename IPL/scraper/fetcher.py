@@ -0,0 +1,245 @@
+import asyncio
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from .httpcache import content_hash
+from .throttle import HostStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Responses worth another attempt; anything else is returned as-is
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def build_session(pool_size=10):
+    """Create a requests session with a keep-alive connection pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = DEFAULT_USER_AGENT
+    return session
+
+
+_shared_session = None
+
+def get_shared_session():
+    """Get the process-wide session so every scraper reuses open connections."""
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = build_session(pool_size=AsyncFetcher.default_concurrency)
+    return _shared_session
+
+
+def retry_after_seconds(response):
+    """Seconds asked for by a numeric Retry-After header, or None."""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return None
+
+
+class FetchResult:
+    """Outcome of fetching a single URL."""
+
+    def __init__(self, url, status_code=None, text=None, content=b'', error=None, elapsed=0.0, attempts=0,
+                 content_hash=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.content = content
+        self.error = error
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.content_hash = content_hash
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"<FetchResult {self.url} status={self.status_code} attempts={self.attempts}>"
+
+
+class AsyncFetcher:
+    """Fetch pages concurrently over a shared keep-alive connection pool.
+
+    Requests run on a bounded thread pool driven by an asyncio event loop, so
+    at most ``concurrency`` requests are in flight per job. Connection errors,
+    timeouts and retryable status codes are retried with exponential backoff,
+    never waiting more than ``max_backoff`` seconds: a response whose
+    Retry-After asks for longer is returned as the result instead.
+    With an HTTPCache, requests are made conditional and 304 responses are
+    served from the cached body. With a ThrottleRegistry, every request
+    also waits for its host's rate limit and adaptive concurrency limit and
+    goes out through a rotated proxy and user agent; ``host_stats`` then
+    holds this fetcher's request and error counts per host.
+    """
+
+    default_concurrency = 8
+
+    def __init__(self, concurrency=None, timeout=10, retries=3, backoff=0.5, session=None, cache=None,
+                 throttles=None, max_backoff=60):
+        self.concurrency = concurrency or self.default_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = session or get_shared_session()
+        self.cache = cache
+        self.throttles = throttles
+        self.host_stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _stats_for(self, host):
+        with self._stats_lock:
+            if host not in self.host_stats:
+                self.host_stats[host] = HostStats()
+            return self.host_stats[host]
+
+    def _request(self, url):
+        """Perform one HTTP request; returns the response or raises."""
+        entry = self.cache.get(url) if self.cache else None
+        headers = entry.conditional_headers() if entry else {}
+        if self.throttles is None:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            response.cache_entry = entry
+            return response
+
+        throttle = self.throttles.for_url(url)
+        stats = self._stats_for(throttle.host)
+        with throttle.slot() as waited:
+            proxy, user_agent = throttle.choose_identity()
+            if user_agent:
+                headers['User-Agent'] = user_agent
+            proxies = {'http': proxy, 'https': proxy} if proxy else None
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, headers=headers, proxies=proxies, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                elapsed = time.monotonic() - started
+                throttle.record(proxy, user_agent, elapsed=elapsed, waited=waited)
+                stats.record(elapsed=elapsed, error=True, waited=waited)
+                raise
+        elapsed = time.monotonic() - started
+        # The host is paused for at most as long as this fetcher would wait
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            retry_after = min(retry_after, self.max_backoff)
+        throttle.record(proxy, user_agent, response.status_code, elapsed, retry_after=retry_after, waited=waited)
+        stats.record(response.status_code, elapsed, waited=waited)
+        response.cache_entry = entry
+        return response
+
+    def _backoff_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, or None to give up.
+
+        A Retry-After longer than ``max_backoff`` gives up rather than
+        parking the thread for as long as the server asks.
+        """
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_backoff else None
+        return min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+
+    def _result_from_response(self, url, response, started, attempts):
+        entry = getattr(response, 'cache_entry', None)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(entry)
+            body = entry.read_body()
+            return FetchResult(
+                url,
+                status_code=response.status_code,
+                text=body.decode(entry.meta.get('encoding') or 'utf-8', errors='replace'),
+                content=body,
+                elapsed=time.monotonic() - started,
+                attempts=attempts,
+                content_hash=entry.content_hash,
+                from_cache=True,
+            )
+
+        result = FetchResult(
+            url,
+            status_code=response.status_code,
+            text=response.text,
+            content=response.content,
+            elapsed=time.monotonic() - started,
+            attempts=attempts,
+            content_hash=content_hash(response.content),
+        )
+        if self.cache and response.status_code == 200:
+            self.cache.store(url, response)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            result.error = str(e)
+        return result
+
+    def fetch(self, url):
+        """Fetch a single URL on the calling thread, with retries."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self._request(url)
+            except requests.exceptions.RequestException as e:
+                if attempt > self.retries:
+                    return FetchResult(url, error=str(e), elapsed=time.monotonic() - started, attempts=attempt)
+                time.sleep(self._backoff_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUS_CODES and attempt <= self.retries:
+                delay = self._backoff_delay(attempt, response)
+                if delay is not None:
+                    time.sleep(delay)
+                    continue
+            return self._result_from_response(url, response, started, attempt)
+
+    async def _fetch_async(self, url, loop, executor, semaphore):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            async with semaphore:
+                try:
+                    response = await loop.run_in_executor(executor, self._request, url)
+                except requests.exceptions.RequestException as e:
+                    response = None
+                    error = str(e)
+            # Back off outside the semaphore so waiting retries don't hold a slot
+            if response is None:
+                if attempt > self.retries:
+                    return FetchResult(url, error=error, elapsed=time.monotonic() - started, attempts=attempt)
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUS_CODES and attempt <= self.retries:
+                delay = self._backoff_delay(attempt, response)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    continue
+            return self._result_from_response(url, response, started, attempt)
+
+    async def gather(self, urls):
+        """Fetch all URLs concurrently; results are returned in input order."""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='fetch') as executor:
+            return await asyncio.gather(*[
+                self._fetch_async(url, loop, executor, semaphore) for url in urls
+            ])
+
+    def fetch_many(self, urls):
+        """Fetch many URLs at once from synchronous code."""
+        urls = list(urls)
+        if not urls:
+            return []
+        if len(urls) == 1:
+            return [self.fetch(urls[0])]
+        return asyncio.run(self.gather(urls))
@@ -0,0 +1,144 @@
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .throttle import TokenBucket
+
+
+def render_team_page(count=10):
+    """Render a listing page in the markup TeamScraper expects."""
+    rows = []
+    for i in range(count):
+        rows.append(
+            f'<div class="team-container"><h2 class="team-name">Team {i}</h2>'
+            f'<span class="team-short-name">T{i}</span>'
+            f'<div class="team-logo"><img src="https://example.com/logos/{i}.png"></div></div>'
+        )
+    return _page('Teams', rows)
+
+
+def render_match_page(count=10, season=2025, offset=0):
+    """Render a fixtures page in the markup MatchScraper expects."""
+    rows = []
+    for i in range(offset, offset + count):
+        rows.append(
+            f'<div class="match-container"><span class="match-number">Match #{i + 1}</span>'
+            f'<span class="season">{season}</span><span class="match-date">{(i % 28) + 1:02d} Apr {season}</span>'
+            f'<span class="match-time">19:30</span><span class="team-home">Team {i % 10}</span>'
+            f'<span class="team-away">Team {(i + 1) % 10}</span><span class="venue">Stadium {i % 12}</span></div>'
+        )
+    return _page('Fixtures', rows)
+
+
+def render_stadium_page(count=10):
+    """Render a venues page in the markup StadiumScraper expects."""
+    rows = []
+    for i in range(count):
+        rows.append(
+            f'<div class="stadium-container"><h2 class="stadium-name">Stadium {i}</h2>'
+            f'<span class="stadium-city">City {i}</span><span class="stadium-country">India</span>'
+            f'<span class="stadium-capacity">{30000 + i * 1000:,}</span></div>'
+        )
+    return _page('Venues', rows)
+
+
+def _page(title, rows):
+    # Surround the data with the navigation and boilerplate real pages carry
+    chrome = ''.join(
+        f'<li><a href="/section/{i}">Section {i}</a><p>{"Lorem ipsum dolor sit amet. " * 4}</p></li>'
+        for i in range(40)
+    )
+    return (
+        f'<!DOCTYPE html><html><head><title>{title}</title></head><body>'
+        f'<nav><ul>{chrome}</ul></nav><main>{"".join(rows)}</main>'
+        f'<footer><ul>{chrome}</ul></footer></body></html>'
+    )
+
+
+PAGE_RENDERERS = {
+    'teams': render_team_page,
+    'matches': render_match_page,
+    'stadiums': render_stadium_page,
+}
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """Serve generated scraper pages at /<kind>/<n> over keep-alive HTTP/1.1.
+
+    Responses carry an ETag and honour If-None-Match with a 304. When the
+    server has a rate limit, requests over it get a 429 with Retry-After.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if server.bucket and not server.bucket.try_acquire():
+            server.throttled += 1
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = self.path.strip('/').split('/')
+        renderer = PAGE_RENDERERS.get(parts[0])
+        if not renderer:
+            self.send_error(404)
+            return
+
+        body = renderer().encode('utf-8')
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Local HTTP server for benchmarking and exercising the scrapers."""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, rate_limit=None, retry_after=1, handler_class=FixtureRequestHandler):
+        super().__init__(('127.0.0.1', port), handler_class)
+        self.latency = latency
+        # Requests per second served before answering 429
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.retry_after = retry_after
+        self.throttled = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
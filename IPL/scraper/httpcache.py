@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content):
+    """Hash of a response body, used to detect byte-identical pages."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class CacheEntry:
+    """Metadata and body of a cached response."""
+
+    def __init__(self, cache, key, meta):
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+
+    @property
+    def content_hash(self):
+        return self.meta['content_hash']
+
+    def conditional_headers(self):
+        """Validators to send so the server can answer 304 Not Modified."""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def read_body(self):
+        return self.cache.body_path(self.key).read_bytes()
+
+
+class HTTPCache:
+    """On-disk cache of page bodies with their HTTP validators.
+
+    Each URL is stored as a JSON metadata file plus a body file. Besides
+    ETag/Last-Modified, the metadata keeps the hash of the body the last
+    successful job processed, so unchanged pages can skip parsing entirely.
+    Entries older than ``max_age`` seconds are evicted, then the least
+    recently used ones until the cache fits in ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def meta_path(self, key):
+        return self.directory / key[:2] / f'{key}.json'
+
+    def body_path(self, key):
+        return self.directory / key[:2] / f'{key}.body'
+
+    def _write(self, path, data):
+        # Write to a temp file and rename so readers never see partial files
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_meta(self, key, meta):
+        self._write(self.meta_path(key), json.dumps(meta).encode('utf-8'))
+
+    def get(self, url):
+        """Get the cache entry for a URL, or None."""
+        key = self.key(url)
+        try:
+            meta = json.loads(self.meta_path(key).read_text())
+        except (OSError, ValueError):
+            return None
+        if not self.body_path(key).exists():
+            return None
+        return CacheEntry(self, key, meta)
+
+    def store(self, url, response):
+        """Store a 200 response and return its entry."""
+        key = self.key(url)
+        previous = self.get(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash(response.content),
+            'encoding': response.encoding,
+            'size': len(response.content),
+            'stored_at': time.time(),
+            'accessed_at': time.time(),
+            'processed_hash': previous.meta.get('processed_hash') if previous else None,
+        }
+        self._write(self.body_path(key), response.content)
+        self._write_meta(key, meta)
+        return CacheEntry(self, key, meta)
+
+    def touch(self, entry):
+        """Record that a cached entry was revalidated and used."""
+        entry.meta['accessed_at'] = time.time()
+        self._write_meta(entry.key, entry.meta)
+
+    def is_processed(self, url, body_hash):
+        """Whether this exact body was already parsed and stored by a successful job."""
+        entry = self.get(url)
+        return entry is not None and entry.meta.get('processed_hash') == body_hash
+
+    def mark_processed(self, url, body_hash):
+        entry = self.get(url)
+        if entry is None:
+            return
+        entry.meta['processed_hash'] = body_hash
+        self._write_meta(entry.key, entry.meta)
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones over the size cap."""
+        entries = []
+        for meta_path in self.directory.glob('*/*.json'):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                meta = {}
+            entries.append((meta.get('accessed_at', 0), meta.get('stored_at', 0), meta.get('size', 0), meta_path))
+
+        now = time.time()
+        removed = 0
+        total = sum(size for _, _, size, _ in entries)
+        for accessed_at, stored_at, size, meta_path in sorted(entries):
+            expired = self.max_age and now - stored_at > self.max_age
+            if not expired and (not self.max_bytes or total <= self.max_bytes):
+                continue
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.body').unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+_cache = None
+
+def get_http_cache():
+    """Get the process-wide HTTP cache, or None when it is disabled in settings."""
+    global _cache
+    directory = getattr(settings, 'SCRAPER_HTTP_CACHE_DIR', settings.BASE_DIR / 'scraper_cache')
+    if not directory:
+        return None
+    if _cache is None or _cache.directory != Path(directory):
+        _cache = HTTPCache(
+            directory,
+            max_bytes=getattr(settings, 'SCRAPER_HTTP_CACHE_MAX_MB', 256) * 1024 * 1024,
+            max_age=getattr(settings, 'SCRAPER_HTTP_CACHE_MAX_AGE', 7 * 24 * 3600),
+        )
+    return _cache
@@ -0,0 +1,116 @@
+import logging
+from django.db import transaction
+from django.utils import timezone
+from api.cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class NameResolver:
+    """Resolve related objects by name from a single prefetched name->id map.
+
+    Names that don't exist yet are created as placeholders in one bulk
+    insert the first time they are resolved. Another worker may create the
+    same name in the meantime; the insert skips names that exist by then
+    and their ids are read back with the new ones.
+    """
+
+    def __init__(self, model, placeholder_defaults=None):
+        self.model = model
+        self.placeholder_defaults = placeholder_defaults or (lambda name: {})
+        self.ids = dict(model.objects.values_list('name', 'id'))
+        self.created = []
+
+    def ensure(self, names):
+        """Make sure every name has an id, creating placeholders for missing ones."""
+        missing = sorted({name for name in names if name not in self.ids})
+        if not missing:
+            return []
+
+        self.model.objects.bulk_create([
+            self.model(name=name, **self.placeholder_defaults(name)) for name in missing
+        ], ignore_conflicts=True)
+        self.ids.update(self.model.objects.filter(name__in=missing).values_list('name', 'id'))
+        # bulk_create sends no post_save, so cached API responses are expired here
+        invalidate(self.model)
+        self.created.extend(missing)
+        return missing
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+class BulkUpserter:
+    """Collect parsed rows and upsert them by natural key in chunked batches.
+
+    Each batch costs one SELECT for existing keys, one bulk INSERT for new
+    rows and one bulk UPDATE for existing ones, and all batches are written
+    inside a single transaction.
+    """
+
+    def __init__(self, model, key_fields, update_fields, batch_size=DEFAULT_BATCH_SIZE):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.update_fields = list(update_fields)
+        self.batch_size = batch_size
+        self.rows = {}
+
+    def add(self, **values):
+        """Queue a row; later rows with the same key replace earlier ones."""
+        key = tuple(values[field] for field in self.key_fields)
+        self.rows[key] = values
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _existing(self, keys):
+        """Map key -> existing instance for a batch of keys."""
+        lookup = {
+            f'{field}__in': {key[i] for key in keys}
+            for i, field in enumerate(self.key_fields)
+        }
+        # The IN filters may match a superset for composite keys; the dict
+        # lookup below keeps only exact matches.
+        existing = {}
+        for obj in self.model.objects.filter(**lookup):
+            existing[tuple(getattr(obj, field) for field in self.key_fields)] = obj
+        return {key: existing[key] for key in keys if key in existing}
+
+    def _write_batch(self, keys):
+        existing = self._existing(keys)
+        now = timezone.now()
+        to_create = []
+        to_update = []
+
+        for key in keys:
+            values = self.rows[key]
+            obj = existing.get(key)
+            if obj is None:
+                to_create.append(self.model(**values))
+                continue
+            for field, value in values.items():
+                setattr(obj, field, value)
+            obj.updated_at = now
+            to_update.append(obj)
+
+        if to_create:
+            self.model.objects.bulk_create(to_create)
+        if to_update:
+            self.model.objects.bulk_update(to_update, self.update_fields + ['updated_at'])
+
+        return {'created': len(to_create), 'updated': len(to_update)}
+
+    def write(self):
+        """Write all queued rows and return created/updated counts per batch."""
+        keys = list(self.rows)
+        if not keys:
+            return []
+        batches = []
+        with transaction.atomic():
+            for start in range(0, len(keys), self.batch_size):
+                batches.append(self._write_batch(keys[start:start + self.batch_size]))
+        self.rows = {}
+        invalidate(self.model)
+        return batches
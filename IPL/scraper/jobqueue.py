@@ -0,0 +1,276 @@
+import os
+import time
+import socket
+import signal
+import logging
+import threading
+import multiprocessing
+from datetime import timedelta
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from .models import ScraperJob
+from .throttle import get_throttles
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job is leased to its worker, which renews the lease by
+# touching the job's updated_at every tenth of SCRAPER_JOB_LEASE seconds.
+# A job whose lease ran out belongs to a worker that was killed or hung;
+# workers fail such jobs when they poll, so they can be run again.
+
+
+def lease_seconds():
+    return getattr(settings, 'SCRAPER_JOB_LEASE', 300)
+
+
+def enqueue_job(job):
+    """Reset a job to PENDING so the next free worker picks it up."""
+    job.status = 'PENDING'
+    job.start_time = None
+    job.end_time = None
+    job.error_message = None
+    job.claimed_by = None
+    job.save()
+    return job
+
+
+def claim_next_job(worker_id):
+    """Atomically claim the oldest due PENDING job, or return None.
+
+    On databases with SKIP LOCKED the candidate row is locked so concurrent
+    workers pass over it. Everywhere, the claim itself is a conditional
+    UPDATE on status='PENDING', so two workers can never both win a job;
+    on SQLite, where writes are serialized, that is the whole mechanism.
+    """
+    candidates = ScraperJob.objects.filter(
+        status='PENDING', scheduled_time__lte=timezone.now()
+    ).order_by('scheduled_time', 'id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_id = candidates.select_for_update(skip_locked=True).values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            return _claim(job_id, worker_id)
+
+    for job_id in candidates.values_list('id', flat=True)[:20]:
+        job = _claim(job_id, worker_id)
+        if job:
+            return job
+    return None
+
+
+def _claim(job_id, worker_id):
+    return _transition(job_id, {'status': 'PENDING'}, status='RUNNING', claimed_by=worker_id, start_time=timezone.now())
+
+
+def _transition(job_id, expected, **values):
+    """Update one job if it still matches ``expected``; returns the updated job, or None.
+
+    The update is a single conditional UPDATE, so of several workers racing
+    for the same change exactly one wins. QuerySet.update() sends no
+    signals, so post_save is sent here for the winner.
+    """
+    values['updated_at'] = timezone.now()
+    if not ScraperJob.objects.filter(id=job_id, **expected).update(**values):
+        return None
+    job = ScraperJob.objects.get(id=job_id)
+    post_save.send(
+        sender=ScraperJob, instance=job, created=False, raw=False,
+        using=job._state.db, update_fields=frozenset(values),
+    )
+    return job
+
+
+def fail_job(job_id, error_message, expected=None):
+    """Mark a job FAILED unless it no longer matches ``expected``."""
+    return _transition(
+        job_id, expected or {}, status='FAILED', error_message=error_message, end_time=timezone.now()
+    )
+
+
+def reap_stale_jobs(lease=None):
+    """Fail RUNNING jobs whose lease has run out; returns them."""
+    cutoff = timezone.now() - timedelta(seconds=lease or lease_seconds())
+    reaped = []
+    for job_id, worker_id in ScraperJob.objects.filter(
+        status='RUNNING', updated_at__lt=cutoff
+    ).values_list('id', 'claimed_by'):
+        # A heartbeat landing meanwhile moves updated_at past the cutoff
+        job = fail_job(
+            job_id, f"Worker {worker_id} stopped renewing the job's lease",
+            expected={'status': 'RUNNING', 'updated_at__lt': cutoff},
+        )
+        if job:
+            logger.warning(f"Failed job {job_id}: its worker {worker_id} stopped renewing the lease")
+            reaped.append(job)
+    return reaped
+
+
+def fail_worker_jobs(worker_ids, reason):
+    """Fail the RUNNING jobs of workers known to be dead; returns them."""
+    failed = []
+    for job_id, worker_id in ScraperJob.objects.filter(
+        status='RUNNING', claimed_by__in=worker_ids
+    ).values_list('id', 'claimed_by'):
+        job = fail_job(job_id, f"Worker {worker_id} {reason}", expected={'status': 'RUNNING', 'claimed_by': worker_id})
+        if job:
+            failed.append(job)
+    return failed
+
+
+def supervise(job, scraper, stop_event, done):
+    """Renew the job's lease until ``done``, and pass a worker stop on to the scraper.
+
+    Runs on its own thread next to the scraper. Scrapers with a ``stop()``
+    (the live scraper) are asked to stop as soon as the worker is; the
+    others run to completion.
+    """
+    interval = lease_seconds() / 10
+    renewed = time.monotonic()
+    stopping = False
+    try:
+        while not done.wait(min(interval, 0.5)):
+            if stop_event is not None and not stopping and stop_event.is_set():
+                stopping = True
+                if hasattr(scraper, 'stop'):
+                    logger.info(f"Stopping job {job.id} early for worker shutdown")
+                    scraper.stop()
+            if time.monotonic() - renewed >= interval:
+                ScraperJob.objects.filter(id=job.id, status='RUNNING').update(updated_at=timezone.now())
+                renewed = time.monotonic()
+    finally:
+        # This thread has a database connection of its own
+        connection.close()
+
+
+def run_job(job, stop_event=None):
+    """Run a claimed job with the scraper for its type.
+
+    While it runs, the job's lease is renewed and ``stop_event``, when
+    given, is passed on to scrapers that can stop early.
+    """
+    # Imported here so the queue can be used without loading Selenium
+    from .scrapers import get_scraper
+
+    scraper = get_scraper(job.job_type, job.id)
+    if not scraper:
+        fail_job(job.id, f"Unknown scraper type: {job.job_type}")
+        return
+    done = threading.Event()
+    supervisor = threading.Thread(
+        target=supervise, args=(job, scraper, stop_event, done), name=f'job-{job.id}-supervisor', daemon=True
+    )
+    supervisor.start()
+    try:
+        scraper.run()
+    except Exception as e:
+        logger.exception(f"Unhandled error in job {job.id}")
+        scraper.finish_job('FAILED', str(e))
+    finally:
+        done.set()
+        supervisor.join()
+        # Whatever path the job took, nothing it logged stays buffered
+        if scraper.log_sink:
+            scraper.log_sink.close()
+
+
+def default_worker_id(index=0, pid=None):
+    return f"{socket.gethostname()}:{pid or os.getpid()}:{index}"
+
+
+def work(stop_event, worker_id=None, poll_interval=5.0, max_jobs=None):
+    """Claim and run jobs until ``stop_event`` is set.
+
+    A running job finishes before the worker exits, except that a live
+    scraper is asked to stop after its current poll. Between jobs, at most
+    once per half lease, the worker also fails jobs whose lease ran out.
+    """
+    worker_id = worker_id or default_worker_id()
+    done = 0
+    next_reap = 0.0
+    logger.info(f"Worker {worker_id} started")
+    while not stop_event.is_set():
+        if time.monotonic() >= next_reap:
+            reap_stale_jobs()
+            next_reap = time.monotonic() + lease_seconds() / 2
+        job = claim_next_job(worker_id)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        logger.info(f"Worker {worker_id} running job {job.id} ({job.job_type})")
+        run_job(job, stop_event)
+        done += 1
+        if max_jobs and done >= max_jobs:
+            break
+    logger.info(f"Worker {worker_id} stopped after {done} job(s)")
+    return done
+
+
+def worker_process(index, stop_event, poll_interval, max_jobs, processes=1):
+    """Entry point of a worker process started by run_workers()."""
+    # The parent handles Ctrl+C and tells workers to stop via stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    django.setup()
+    connection.close()
+    # Per-host concurrency limits are split between the workers
+    get_throttles(workers=processes)
+    # Imported here for the same reason as in run_job(); the browsers start
+    # while the first jobs are claimed
+    from .drivers import prewarm_driver_pool
+    prewarm_driver_pool()
+    work(stop_event, default_worker_id(index), poll_interval, max_jobs)
+
+
+def run_workers(processes, poll_interval=5.0, max_jobs=None):
+    """Run ``processes`` worker processes until SIGINT/SIGTERM, then drain them.
+
+    A first signal lets every worker finish its current job; a second one
+    terminates them immediately. Jobs left RUNNING by a worker that was
+    killed or crashed are failed once it has exited.
+    """
+    # Connections must not be shared with forked children
+    connections.close_all()
+    stop_event = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(
+            target=worker_process,
+            args=(index, stop_event, poll_interval, max_jobs, processes),
+            name=f'scraper-worker-{index}',
+        )
+        for index in range(processes)
+    ]
+
+    def request_stop(signum, frame):
+        if stop_event.is_set():
+            logger.warning("Second stop signal received, terminating workers")
+            for process in workers:
+                process.kill()
+            return
+        logger.info("Stop signal received, waiting for running jobs to finish")
+        stop_event.set()
+
+    previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for process in workers:
+            process.start()
+        # Join with a timeout so the signal handler keeps running
+        while any(process.is_alive() for process in workers):
+            for process in workers:
+                process.join(timeout=0.5)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    dead = [
+        default_worker_id(index, process.pid)
+        for index, process in enumerate(workers) if process.exitcode
+    ]
+    if dead:
+        for job in fail_worker_jobs(dead, 'exited while running the job'):
+            logger.warning(f"Failed job {job.id} left running by {job.claimed_by}")
+    return [process.exitcode for process in workers]
@@ -0,0 +1,118 @@
+import time
+import random
+import logging
+import threading
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import ScraperLog
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
+
+
+class BufferedLogSink:
+    """Buffer ScraperLog entries for a job and write them with bulk_create.
+
+    Entries are flushed when the buffer reaches ``max_entries``, on any
+    ERROR or CRITICAL entry, when the sink is closed, and at the latest
+    ``flush_interval`` seconds after they were buffered, by a timer when
+    the job emits nothing more in the meantime. Entries below the
+    job's ``log_level`` are dropped and INFO entries are kept with
+    probability ``log_sample_rate``. A failed flush keeps the entries
+    buffered for the next attempt.
+    """
+
+    def __init__(self, job, max_entries=None, flush_interval=None):
+        self.job = job
+        self.max_entries = max_entries or getattr(settings, 'SCRAPER_LOG_BUFFER_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'SCRAPER_LOG_FLUSH_INTERVAL', 5.0)
+        self.min_level = LEVELS.get(job.log_level, logging.INFO)
+        self.sample_rate = job.log_sample_rate
+        self.buffer = []
+        self.dropped = 0
+        self.closed = False
+        self.last_flush = time.monotonic()
+        self.lock = threading.RLock()
+        self.timer = None
+
+    def accepts(self, level):
+        """Whether an entry at this level should be stored for the job."""
+        levelno = LEVELS.get(level, logging.INFO)
+        if levelno < self.min_level:
+            return False
+        if levelno == logging.INFO and self.sample_rate < 1.0:
+            return random.random() < self.sample_rate
+        return True
+
+    def emit(self, message, level='INFO'):
+        """Buffer an entry, flushing if a threshold has been reached."""
+        if not self.accepts(level):
+            self.dropped += 1
+            return
+
+        with self.lock:
+            self.buffer.append(ScraperLog(job=self.job, level=level, message=message, timestamp=timezone.now()))
+            due = (self.closed
+                   or LEVELS.get(level, logging.INFO) >= logging.ERROR
+                   or len(self.buffer) >= self.max_entries
+                   or time.monotonic() - self.last_flush >= self.flush_interval)
+            if due:
+                self.flush()
+            elif self.timer is None:
+                self.schedule()
+
+    def schedule(self):
+        """Flush the buffer after ``flush_interval`` seconds unless something flushes it first."""
+        self.timer = threading.Timer(self.flush_interval, self.flush_on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer's thread has a database connection of its own
+            connection.close()
+
+    def flush(self):
+        """Write all buffered entries; returns the number written."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.last_flush = time.monotonic()
+            if not self.buffer:
+                return 0
+
+            entries, self.buffer = self.buffer, []
+            try:
+                ScraperLog.objects.bulk_create(entries, batch_size=self.max_entries)
+            except Exception as e:
+                # Keep the entries so the next flush (at the latest on close) retries them
+                self.buffer = entries + self.buffer
+                logger.error(f"Failed to flush {len(entries)} log entries for job {self.job.id}: {str(e)}")
+                if not self.closed:
+                    self.schedule()
+                return 0
+            return len(entries)
+
+    def close(self):
+        """Flush everything; entries emitted after closing are written immediately."""
+        with self.lock:
+            if self.dropped and not self.closed:
+                self.buffer.append(ScraperLog(
+                    job=self.job,
+                    level='WARNING',
+                    message=f"Dropped {self.dropped} log entries below the job's log level or sample rate",
+                    timestamp=timezone.now()
+                ))
+            self.closed = True
+            return self.flush()
@@ -0,0 +1,42 @@
+import time
+import requests
+from django.core.management.base import BaseCommand
+from scraper.fetcher import AsyncFetcher, DEFAULT_USER_AGENT, build_session
+from scraper.fixture_server import FixtureServer
+
+class Command(BaseCommand):
+    help = 'Benchmark serial vs concurrent page fetching against a local fixture server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=100, help='Number of pages to fetch per run')
+        parser.add_argument('--latency', type=float, default=0.05, help='Simulated server latency in seconds')
+        parser.add_argument('--concurrency', type=int, default=AsyncFetcher.default_concurrency,
+                            help='Concurrent requests for the async path')
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        concurrency = options['concurrency']
+
+        with FixtureServer(latency=options['latency']) as server:
+            kinds = ['teams', 'matches', 'stadiums']
+            urls = [f'{server.base_url}/{kinds[i % 3]}/{i}' for i in range(pages)]
+
+            # Serial path: one fresh connection per page, as get_soup used to do
+            started = time.perf_counter()
+            for url in urls:
+                requests.get(url, headers={'User-Agent': DEFAULT_USER_AGENT}).raise_for_status()
+            serial = time.perf_counter() - started
+
+            fetcher = AsyncFetcher(concurrency=concurrency, session=build_session(pool_size=concurrency))
+            started = time.perf_counter()
+            results = fetcher.fetch_many(urls)
+            concurrent = time.perf_counter() - started
+            failures = sum(1 for result in results if not result.ok)
+
+        self.stdout.write(f'Pages: {pages}, latency: {options["latency"] * 1000:.0f} ms, concurrency: {concurrency}')
+        self.stdout.write(f'Serial:     {pages / serial:8.1f} pages/s ({serial:.2f}s)')
+        self.stdout.write(f'Concurrent: {pages / concurrent:8.1f} pages/s ({concurrent:.2f}s)')
+        if failures:
+            self.stdout.write(self.style.ERROR(f'{failures} concurrent fetches failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {serial / concurrent:.1f}x'))
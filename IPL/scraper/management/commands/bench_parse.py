@@ -0,0 +1,61 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from scraper.fixture_server import render_match_page, render_team_page, render_stadium_page
+from scraper.parsers import available_backends, parse_html
+
+class Command(BaseCommand):
+    help = 'Benchmark HTML parse throughput per parser backend over saved fixture pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='*', help='Saved HTML files or directories of *.html files')
+        parser.add_argument('--only', type=str, default='match-container',
+                            help='CSS class of the containers in saved fixtures')
+        parser.add_argument('--repeat', type=int, default=20, help='Times each page is parsed')
+        parser.add_argument('--save', type=str, help='Write the generated fixture pages to this directory and exit')
+
+    def load_fixtures(self, paths, only):
+        pages = []
+        for path in map(Path, paths):
+            files = sorted(path.glob('*.html')) if path.is_dir() else [path]
+            for file in files:
+                pages.append((file.name, file.read_text(encoding='utf-8'), only))
+        if paths and not pages:
+            raise CommandError('No HTML fixtures found')
+        return pages
+
+    def generated_fixtures(self):
+        return [
+            ('matches.html', render_match_page(count=500), 'match-container'),
+            ('teams.html', render_team_page(count=10), 'team-container'),
+            ('stadiums.html', render_stadium_page(count=40), 'stadium-container'),
+        ]
+
+    def handle(self, *args, **options):
+        if options['save']:
+            directory = Path(options['save'])
+            directory.mkdir(parents=True, exist_ok=True)
+            for name, html, _ in self.generated_fixtures():
+                (directory / name).write_text(html, encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Saved fixtures to {directory}'))
+            return
+
+        pages = self.load_fixtures(options['fixtures'], options['only']) or self.generated_fixtures()
+        total_bytes = sum(len(html.encode('utf-8')) for _, html, _ in pages)
+        repeat = options['repeat']
+        self.stdout.write(f'{len(pages)} page(s), {total_bytes / 1024:.0f} KiB, {repeat} repeats')
+
+        # Each run parses the page and locates its containers, which is the
+        # work every scraper does before reading fields
+        for backend in available_backends():
+            for partial in (False, True):
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    for _, html, only in pages:
+                        parse_html(html, backend=backend, only=only if partial else None).select(f'.{only}')
+                elapsed = time.perf_counter() - started
+                label = f'{backend} ({"partial" if partial else "full"})'
+                self.stdout.write(
+                    f'{label:24} {len(pages) * repeat / elapsed:8.1f} pages/s '
+                    f'{total_bytes * repeat / elapsed / (1024 * 1024):8.2f} MiB/s'
+                )
@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand
+from scraper.fetcher import AsyncFetcher, build_session
+from scraper.fixture_server import FixtureServer
+from scraper.throttle import ThrottleRegistry, HostThrottle, host_of
+
+class Command(BaseCommand):
+    help = 'Fetch pages from a local fixture server that answers 429 over its rate limit, with and without throttling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=60, help='Number of pages to fetch per run')
+        parser.add_argument('--server-rate', type=float, default=20.0, help='Requests per second the server accepts')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Client rate limit for the throttled run (defaults to the server rate)')
+        parser.add_argument('--concurrency', type=int, default=AsyncFetcher.default_concurrency,
+                            help='Concurrent requests per run')
+        parser.add_argument('--latency', type=float, default=0.02, help='Simulated server latency in seconds')
+
+    def run(self, urls, concurrency, throttles=None):
+        fetcher = AsyncFetcher(
+            concurrency=concurrency,
+            session=build_session(pool_size=concurrency),
+            throttles=throttles,
+            backoff=0.1,
+        )
+        started = time.perf_counter()
+        results = fetcher.fetch_many(urls)
+        elapsed = time.perf_counter() - started
+        failures = sum(1 for result in results if not result.ok)
+        attempts = sum(result.attempts for result in results)
+        return elapsed, failures, attempts
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        concurrency = options['concurrency']
+        rate = options['rate'] or options['server_rate']
+
+        for label in ('Unthrottled', 'Throttled'):
+            with FixtureServer(latency=options['latency'], rate_limit=options['server_rate']) as server:
+                urls = [f'{server.base_url}/teams/{i}' for i in range(pages)]
+                throttles = None
+                if label == 'Throttled':
+                    throttles = ThrottleRegistry()
+                    host = host_of(server.base_url)
+                    throttles.throttles[host] = HostThrottle(host, rate=rate, max_concurrency=concurrency, burst=1)
+                elapsed, failures, attempts = self.run(urls, concurrency, throttles)
+
+            self.stdout.write(
+                f'{label + ":":13} {pages / elapsed:6.1f} pages/s, {attempts} requests, '
+                f'{server.throttled} answered 429, {failures} failed'
+            )
+            if throttles:
+                for data in throttles.snapshot():
+                    self.stdout.write(
+                        f'  {data["host"]}: {data["requests_per_second"]:.1f} req/s, '
+                        f'{data["error_rate"]:.1%} errors, concurrency limit {data["concurrency_limit"]:.1f}'
+                    )
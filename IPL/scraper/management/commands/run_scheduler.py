@@ -0,0 +1,32 @@
+import signal
+import logging
+import threading
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from scraper.scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Enqueue scraper jobs for active configurations as they fall due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit')
+        parser.add_argument('--refresh-interval', type=int, default=300,
+                            help='Seconds between reloads of changed configs and the match calendar')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(refresh_interval=timedelta(seconds=options['refresh_interval']))
+
+        if options['once']:
+            jobs = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f'Enqueued {len(jobs)} job(s)'))
+            return
+
+        stop_event = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda signum, frame: stop_event.set())
+
+        self.stdout.write(self.style.SUCCESS('Scheduler started'))
+        scheduler.run(stop_event)
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped'))
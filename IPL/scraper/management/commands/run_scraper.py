@@ -3,6 +3,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from scraper.models import ScraperJob, DataSource, ScraperConfig
 from scraper.scrapers import get_scraper
+from scraper.jobqueue import run_workers
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,14 @@ class Command(BaseCommand):
         parser.add_argument('--url', type=str, help='URL to scrape')
         parser.add_argument('--data-source', type=str, help='Name of the data source')
         parser.add_argument('--config-id', type=int, help='ID of the scraper configuration to use')
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Create the job as PENDING for the workers instead of running it here')
+        parser.add_argument('--worker', action='store_true',
+                            help='Run as a worker that claims and runs PENDING jobs until stopped')
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds a worker waits before polling again when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, help='Stop each worker process after this many jobs')
 
     def handle(self, *args, **options):
         job_id = options.get('job_id')
@@ -24,6 +33,14 @@ class Command(BaseCommand):
         data_source_name = options.get('data_source')
         config_id = options.get('config_id')
         
+        # Worker mode: process the queue until SIGINT/SIGTERM
+        if options.get('worker'):
+            processes = options['processes']
+            self.stdout.write(self.style.SUCCESS(f'Starting {processes} scraper worker process(es)'))
+            run_workers(processes, poll_interval=options['poll_interval'], max_jobs=options.get('max_jobs'))
+            self.stdout.write(self.style.SUCCESS('Workers stopped'))
+            return
+        
         # If job_id is provided, run that specific job
         if job_id:
             try:
@@ -93,6 +110,9 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.SUCCESS(f'Created new job {job.id} of type {job_type}'))
         
+        if options.get('enqueue'):
+            return
+        
         # Run the job
         scraper = get_scraper(job_type, job.id)
         if scraper:
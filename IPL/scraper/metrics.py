@@ -0,0 +1,138 @@
+import math
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, ExitStack
+from django.db import connection
+
+# Phases a scraper job's time is split into; anything else counts as 'other'
+PHASES = ['fetch', 'parse', 'resolve', 'write']
+
+
+class JobMetrics:
+    """Phase timings, bytes, rows and query counts for one scraper job.
+
+    ``start()`` installs a database execute wrapper on the current thread's
+    connection, so every query the job runs is counted and attributed to
+    the innermost active phase. Phases are timed on the thread that opens
+    them; time spent outside any phase is reported as 'other'.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.queries = defaultdict(int)
+        self.query_seconds = 0.0
+        self.counters = defaultdict(int)
+        self.started = None
+        self.finished = None
+        self._phases = []
+        self._stack = None
+        self._thread = None
+
+    def start(self):
+        if self._stack is not None:
+            return self
+        self.started = time.monotonic()
+        self._thread = threading.get_ident()
+        self._stack = ExitStack()
+        self._stack.enter_context(connection.execute_wrapper(self._count_query))
+        return self
+
+    def stop(self):
+        if self._stack is None:
+            return
+        self._stack.close()
+        self._stack = None
+        self.finished = time.monotonic()
+
+    def _count_query(self, execute, sql, params, many, context):
+        phase = self._phases[-1] if self._phases else 'other'
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_seconds += time.monotonic() - started
+            self.queries[phase] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work as part of phase ``name``."""
+        tracked = threading.get_ident() == self._thread
+        outer = self._phases[-1] if tracked and self._phases else None
+        if tracked:
+            self._phases.append(name)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.seconds[name] += elapsed
+            if tracked:
+                self._phases.pop()
+                # Time in a nested phase only counts towards the inner one
+                if outer is not None:
+                    self.seconds[outer] -= elapsed
+
+    def add(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def as_dict(self):
+        end = self.finished or time.monotonic()
+        total = end - self.started if self.started else 0.0
+        phases = {
+            name: {'seconds': round(self.seconds[name], 4), 'queries': self.queries[name]}
+            for name in PHASES
+        }
+        phases['other'] = {
+            'seconds': round(max(total - sum(self.seconds[name] for name in PHASES), 0.0), 4),
+            'queries': self.queries['other'],
+        }
+        return {
+            'total_seconds': round(total, 4),
+            'phases': phases,
+            'queries': sum(self.queries.values()),
+            'query_seconds': round(self.query_seconds, 4),
+            **{name: value for name, value in sorted(self.counters.items())},
+        }
+
+
+def percentile(values, q):
+    """The ``q`` percentile (0-100) of ``values`` by linear interpolation, or None."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(jobs, key):
+    """p50/p95 of job and phase durations, grouped by day and ``key(job)``.
+
+    ``jobs`` are dicts with 'end_time' and 'metrics' plus whatever ``key``
+    reads. Returns rows sorted by day (newest first), then group.
+    """
+    groups = defaultdict(list)
+    for job in jobs:
+        if job['metrics'] and job['end_time']:
+            groups[(job['end_time'].date(), key(job))].append(job['metrics'])
+
+    rows = []
+    for (day, group), metrics in groups.items():
+        totals = [m['total_seconds'] for m in metrics]
+        row = {
+            'day': day,
+            'group': group,
+            'jobs': len(metrics),
+            'p50': percentile(totals, 50),
+            'p95': percentile(totals, 95),
+            'queries_p95': percentile([m['queries'] for m in metrics], 95),
+            'phases': {},
+        }
+        for name in PHASES + ['other']:
+            seconds = [m['phases'].get(name, {}).get('seconds', 0.0) for m in metrics]
+            row['phases'][name] = {'p50': percentile(seconds, 50), 'p95': percentile(seconds, 95)}
+        rows.append(row)
+    rows.sort(key=lambda row: (-row['day'].toordinal(), str(row['group'])))
+    return rows
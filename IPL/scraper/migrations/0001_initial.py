@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('base_url', models.URLField()),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('requests_per_second', models.FloatField(default=2.0, help_text='Rate limit for requests to this host')),
+                ('max_concurrency', models.PositiveIntegerField(default=4, help_text='Upper bound for concurrent requests to this host')),
+                ('proxies', models.JSONField(blank=True, help_text='Proxy URLs to rotate through', null=True)),
+                ('user_agents', models.JSONField(blank=True, help_text='User-Agent strings to rotate through', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScraperConfig',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scraper_type', models.CharField(choices=[('TEAM', 'Team Data'), ('PLAYER', 'Player Data'), ('MATCH', 'Match Data'), ('STADIUM', 'Stadium Data'), ('LIVE', 'Live Match Data')], max_length=10)),
+                ('url_pattern', models.CharField(max_length=255)),
+                ('css_selectors', models.JSONField(blank=True, null=True)),
+                ('xpath_selectors', models.JSONField(blank=True, null=True)),
+                ('frequency', models.CharField(choices=[('HOURLY', 'Hourly'), ('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly'), ('MATCH_DAY', 'Match Day Only')], max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_run', models.DateTimeField(blank=True, null=True)),
+                ('next_run', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('data_source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='configs', to='scraper.datasource')),
+            ],
+            options={
+                'ordering': ['data_source', 'scraper_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScraperJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('TEAM', 'Team Data'), ('PLAYER', 'Player Data'), ('MATCH', 'Match Data'), ('STADIUM', 'Stadium Data'), ('LIVE', 'Live Match Data')], max_length=10)),
+                ('url', models.URLField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('scheduled_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('claimed_by', models.CharField(blank=True, help_text='Worker running the job', max_length=100, null=True)),
+                ('log_level', models.CharField(choices=[('DEBUG', 'Debug'), ('INFO', 'Info'), ('WARNING', 'Warning'), ('ERROR', 'Error')], default='INFO', max_length=10)),
+                ('log_sample_rate', models.FloatField(default=1.0, help_text='Fraction of INFO log entries to keep')),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('cache_misses', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, help_text='Phase timings, bytes, rows and query counts', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='scraper.scraperconfig')),
+                ('data_source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='scraper.datasource')),
+            ],
+            options={
+                'ordering': ['-scheduled_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScraperLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('level', models.CharField(max_length=10)),
+                ('message', models.TextField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='scraper.scraperjob')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['-timestamp', '-id'], name='scraperlog_timestamp_idx'), models.Index(fields=['job', '-timestamp', '-id'], name='scraperlog_job_timestamp_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scraperconfig',
+            index=models.Index(fields=['updated_at'], name='scraperconfig_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scraperjob',
+            index=models.Index(fields=['status', 'scheduled_time'], name='scraperjob_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scraperjob',
+            index=models.Index(fields=['config', 'status'], name='scraperjob_config_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scraperjob',
+            index=models.Index(fields=['status', 'end_time'], name='scraperjob_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scraperjob',
+            index=models.Index(fields=['-created_at'], name='scraperjob_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:24
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_indexes_and_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datasource',
+            name='requests_per_second',
+            field=models.FloatField(default=2.0, help_text='Rate limit for requests to this host', validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
@@ -18,6 +19,13 @@ class ScraperJob(models.Model):
         ('LIVE', 'Live Match Data'),
     ]
     
+    LOG_LEVEL_CHOICES = [
+        ('DEBUG', 'Debug'),
+        ('INFO', 'Info'),
+        ('WARNING', 'Warning'),
+        ('ERROR', 'Error'),
+    ]
+    
     job_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     url = models.URLField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
@@ -25,6 +33,14 @@ class ScraperJob(models.Model):
     start_time = models.DateTimeField(blank=True, null=True)
     end_time = models.DateTimeField(blank=True, null=True)
     error_message = models.TextField(blank=True, null=True)
+    config = models.ForeignKey('ScraperConfig', on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
+    data_source = models.ForeignKey('DataSource', on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
+    claimed_by = models.CharField(max_length=100, blank=True, null=True, help_text='Worker running the job')
+    log_level = models.CharField(max_length=10, choices=LOG_LEVEL_CHOICES, default='INFO')
+    log_sample_rate = models.FloatField(default=1.0, help_text='Fraction of INFO log entries to keep')
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+    metrics = models.JSONField(blank=True, null=True, help_text='Phase timings, bytes, rows and query counts')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -33,11 +49,20 @@ class ScraperJob(models.Model):
     
     class Meta:
         ordering = ['-scheduled_time']
+        indexes = [
+            # claim_next_job(): oldest due PENDING job
+            models.Index(fields=['status', 'scheduled_time'], name='scraperjob_queue_idx'),
+            # Scheduler: is a job for this config still queued or running?
+            models.Index(fields=['config', 'status'], name='scraperjob_config_status_idx'),
+            # Metrics dashboard: completed jobs by end time
+            models.Index(fields=['status', 'end_time'], name='scraperjob_status_end_idx'),
+            models.Index(fields=['-created_at'], name='scraperjob_created_idx'),
+        ]
 
 class ScraperLog(models.Model):
     """Model representing a log entry for a scraper job."""
     job = models.ForeignKey(ScraperJob, on_delete=models.CASCADE, related_name='logs')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     level = models.CharField(max_length=10)
     message = models.TextField()
     
@@ -46,6 +71,10 @@ class ScraperLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='scraperlog_timestamp_idx'),
+            models.Index(fields=['job', '-timestamp', '-id'], name='scraperlog_job_timestamp_idx'),
+        ]
 
 class DataSource(models.Model):
     """Model representing a data source for scraping."""
@@ -53,6 +82,12 @@ class DataSource(models.Model):
     base_url = models.URLField()
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    requests_per_second = models.FloatField(
+        default=2.0, validators=[MinValueValidator(0.01)], help_text='Rate limit for requests to this host'
+    )
+    max_concurrency = models.PositiveIntegerField(default=4, help_text='Upper bound for concurrent requests to this host')
+    proxies = models.JSONField(blank=True, null=True, help_text='Proxy URLs to rotate through')
+    user_agents = models.JSONField(blank=True, null=True, help_text='User-Agent strings to rotate through')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -89,3 +124,7 @@ class ScraperConfig(models.Model):
     
     class Meta:
         ordering = ['data_source', 'scraper_type']
+        indexes = [
+            # Scheduler refresh: configs changed since the last one
+            models.Index(fields=['updated_at'], name='scraperconfig_updated_idx'),
+        ]
@@ -0,0 +1,5 @@
+from api.pagination import KeysetPagination
+
+
+class ScraperLogPagination(KeysetPagination):
+    ordering = ('-timestamp', '-id')
@@ -0,0 +1,214 @@
+import re
+import logging
+from functools import lru_cache
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
+from django.conf import settings
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference. 'lxml-native' builds the tree in C with
+# lxml and exposes the small part of the BeautifulSoup API the scrapers use;
+# the others are BeautifulSoup tree builders.
+PARSER_BACKENDS = ['lxml-native', 'lxml', 'html.parser']
+
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][a-zA-Z0-9]*|\*)?(?P<rest>(?:[.#][\w-]+)*)$')
+
+
+def class_predicate(name):
+    """XPath predicate matching elements that have the given CSS class."""
+    return f"@class and contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+@lru_cache(maxsize=256)
+def css_to_xpath(selector, include_self=False):
+    """Translate a descendant-only CSS selector (tags, classes, ids) to XPath.
+
+    With ``include_self`` the first step may also match the context element.
+    Raises ValueError for anything more complex, such as child combinators,
+    attribute selectors or pseudo-classes.
+    """
+    steps = []
+    for part in selector.split():
+        match = _SIMPLE_SELECTOR.match(part)
+        if not match:
+            raise ValueError(f"Unsupported selector for lxml-native parser: {selector!r}")
+        predicates = []
+        for kind, name in re.findall(r'([.#])([\w-]+)', match.group('rest')):
+            if kind == '.':
+                predicates.append(class_predicate(name))
+            else:
+                predicates.append(f"@id='{name}'")
+        axis = 'descendant-or-self' if include_self and not steps else 'descendant'
+        step = f"{axis}::{match.group('tag') or '*'}"
+        if predicates:
+            step += '[' + ' and '.join(predicates) + ']'
+        steps.append(step)
+    return etree.XPath('/'.join(steps))
+
+
+class LxmlNode:
+    """An lxml element with the BeautifulSoup methods the scrapers rely on."""
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, selector):
+        return [LxmlNode(element) for element in css_to_xpath(selector)(self.element)]
+
+    def select_one(self, selector):
+        found = css_to_xpath(selector)(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    @property
+    def text(self):
+        return ''.join(self.element.itertext())
+
+    def get_text(self, separator='', strip=False):
+        texts = (text.strip() if strip else text for text in self.element.itertext())
+        return separator.join(text for text in texts if text or not strip)
+
+    def get(self, key, default=None):
+        return self.element.get(key, default)
+
+    def __getitem__(self, key):
+        return self.element.attrib[key]
+
+
+class LxmlFragment:
+    """A set of lxml subtrees that selects like a document containing only them."""
+
+    __slots__ = ('elements', 'root_selectors')
+
+    def __init__(self, elements, root_selectors=()):
+        self.elements = elements
+        # Selectors known to match exactly the fragment roots
+        self.root_selectors = set(root_selectors)
+
+    def select(self, selector):
+        if selector in self.root_selectors:
+            return [LxmlNode(element) for element in self.elements]
+        xpath = css_to_xpath(selector, include_self=True)
+        return [LxmlNode(found) for element in self.elements for found in xpath(element)]
+
+    def select_one(self, selector):
+        found = self.select(selector)
+        return found[0] if found else None
+
+    @property
+    def text(self):
+        return ''.join(LxmlNode(element).text for element in self.elements)
+
+
+# Characters fed to the pull parser at a time
+PARSE_CHUNK_SIZE = 64 * 1024
+
+
+def has_class(element, names):
+    classes = element.get('class')
+    return bool(classes) and not names.isdisjoint(classes.split())
+
+
+def pull_subtrees(markup, names):
+    """The outermost elements with any class in ``names``, parsing ``markup`` incrementally.
+
+    Elements outside the matches are cleared and dropped as soon as they
+    close, so the parser only ever holds the kept subtrees and the chain
+    of elements currently open, never the whole document.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    kept = []
+    depth = 0  # Open elements within the current match, itself included
+
+    def drain():
+        nonlocal depth
+        for event, element in parser.read_events():
+            if event == 'start':
+                if depth or has_class(element, names):
+                    depth += 1
+                continue
+            if depth:
+                depth -= 1
+                if not depth:
+                    parent = element.getparent()
+                    if parent is not None:
+                        parent.remove(element)
+                    kept.append(element)
+                continue
+            element.clear(keep_tail=False)
+            # Drop the cleared siblings that closed before this one
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    for start in range(0, len(markup), PARSE_CHUNK_SIZE):
+        parser.feed(markup[start:start + PARSE_CHUNK_SIZE])
+        drain()
+    parser.close()
+    drain()
+    return kept
+
+
+def parse_lxml_native(markup, only=None):
+    """Parse with lxml and, with ``only``, keep just the matching subtrees.
+
+    With ``only`` the markup is pull-parsed, so the rest of the document
+    is discarded while parsing rather than built and then filtered.
+    """
+    if not only:
+        return LxmlNode(lxml.html.document_fromstring(markup))
+    if isinstance(only, str):
+        return LxmlFragment(pull_subtrees(markup, {only}), root_selectors=[f'.{only}'])
+    # Several classes: each outermost match, in document order
+    return LxmlFragment(pull_subtrees(markup, set(only)))
+
+
+def backend_available(backend):
+    if backend == 'lxml-native':
+        return lxml is not None
+    try:
+        BeautifulSoup('', backend)
+    except FeatureNotFound:
+        return False
+    return True
+
+
+def available_backends():
+    """Parser backends that can be used in this environment."""
+    return [backend for backend in PARSER_BACKENDS if backend_available(backend)]
+
+
+_default_backend = None
+
+def default_backend():
+    """The backend from SCRAPER_HTML_PARSER, else the fastest one installed."""
+    global _default_backend
+    configured = getattr(settings, 'SCRAPER_HTML_PARSER', None)
+    if configured:
+        return configured
+    if _default_backend is None:
+        _default_backend = available_backends()[0]
+    return _default_backend
+
+
+def parse_html(markup, backend=None, only=None):
+    """Parse HTML into a tree that supports ``select``/``select_one``.
+
+    ``only`` is a CSS class name, or a list of them; when given, just the
+    elements with that class and their subtrees are kept, so selects never
+    walk the rest of the document. With the BeautifulSoup backends the rest
+    of the document is skipped while parsing.
+    """
+    backend = backend or default_backend()
+    if backend == 'lxml-native':
+        return parse_lxml_native(markup, only=only)
+    parse_only = SoupStrainer(class_=only) if only else None
+    return BeautifulSoup(markup, backend, parse_only=parse_only)
@@ -0,0 +1,231 @@
+import heapq
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+from django.utils import timezone
+from .models import ScraperJob, ScraperConfig
+from api.models import Match
+
+logger = logging.getLogger(__name__)
+
+BASE_INTERVALS = {
+    'HOURLY': timedelta(hours=1),
+    'DAILY': timedelta(days=1),
+    'WEEKLY': timedelta(weeks=1),
+    'MONTHLY': timedelta(days=30),
+}
+
+# Scraper types whose data changes while a match is on
+MATCH_SENSITIVE_TYPES = {'MATCH', 'LIVE'}
+
+
+def scheduler_setting(name, default):
+    return getattr(settings, f'SCRAPER_SCHEDULER_{name}', default)
+
+
+class MatchCalendar:
+    """Start times of upcoming matches, kept sorted for O(log n) lookups.
+
+    A match window runs from ``before`` ahead of the start until ``after``
+    past it, which covers a T20 match and the scorecard settling.
+    """
+
+    def __init__(self, starts, before=timedelta(hours=1), after=timedelta(hours=5)):
+        self.starts = sorted(starts)
+        self.before = before
+        self.after = after
+
+    @classmethod
+    def load(cls, now, horizon=timedelta(days=90), before=timedelta(hours=1), after=timedelta(hours=5)):
+        """Load scheduled and live matches around now in one query."""
+        rows = Match.objects.filter(
+            status__in=['SCHEDULED', 'LIVE'],
+            date__gte=(now - after).date(),
+            date__lte=(now + horizon).date(),
+        ).values_list('date', 'time')
+        tz = timezone.get_current_timezone()
+        starts = [timezone.make_aware(datetime.combine(date, time), tz) for date, time in rows]
+        return cls(starts, before=before, after=after)
+
+    def in_window(self, now):
+        """Whether a match window is open at ``now``."""
+        # Any start within [now - after, now + before] puts now inside its window
+        lo = bisect_left(self.starts, now - self.after)
+        return lo < len(self.starts) and self.starts[lo] <= now + self.before
+
+    def next_window_start(self, now):
+        """When the next match window opens after ``now``, or None."""
+        index = bisect_right(self.starts, now + self.before)
+        if index == len(self.starts):
+            return None
+        return self.starts[index] - self.before
+
+    def has_match_on(self, day):
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()), tz)
+        index = bisect_left(self.starts, start)
+        return index < len(self.starts) and self.starts[index] < start + timedelta(days=1)
+
+
+def compute_next_run(frequency, scraper_type, now, calendar):
+    """Next run time for a config, polling more often around matches.
+
+    MATCH_DAY configs only run inside match windows. Match and live data
+    configs are polled every SCRAPER_SCHEDULER_MATCH_INTERVAL during a window
+    and wake up for the next one. Hourly configs back off by
+    SCRAPER_SCHEDULER_IDLE_BACKOFF on days without a match.
+    """
+    match_interval = scheduler_setting('MATCH_INTERVAL', timedelta(minutes=15))
+    in_window = calendar.in_window(now)
+
+    if frequency == 'MATCH_DAY':
+        if in_window:
+            return now + match_interval
+        # With no match on the calendar, look again once the calendar has been reloaded
+        return calendar.next_window_start(now) or now + timedelta(days=1)
+
+    interval = BASE_INTERVALS.get(frequency, timedelta(days=1))
+    match_sensitive = scraper_type in MATCH_SENSITIVE_TYPES
+    if match_sensitive and in_window:
+        return now + min(interval, match_interval)
+
+    if frequency == 'HOURLY' and not calendar.has_match_on(now.date()):
+        interval *= scheduler_setting('IDLE_BACKOFF', 4)
+    next_run = now + interval
+
+    if match_sensitive:
+        window_start = calendar.next_window_start(now)
+        if window_start and window_start < next_run:
+            next_run = window_start
+    return next_run
+
+
+class Scheduler:
+    """Enqueue ScraperJobs for active ScraperConfigs when they are due.
+
+    Due times live in a min-heap, so each tick costs O(log n) per due
+    config rather than a table scan. Configs are reloaded incrementally by
+    ``updated_at`` every ``refresh_interval``, and deleted ones found by
+    comparing ids; heap entries for edited, deactivated or deleted configs
+    are dropped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, refresh_interval=timedelta(minutes=5)):
+        self.refresh_interval = refresh_interval
+        self.calendar = MatchCalendar([])
+        self.reset()
+
+    def reset(self):
+        """Forget every config, so the next tick reloads them all."""
+        self.heap = []
+        self.configs = {}
+        self.synced_at = None
+        self.next_refresh = None
+
+    def refresh(self, now):
+        """Reload the match calendar and any configs changed since the last refresh."""
+        self.calendar = MatchCalendar.load(now)
+
+        # Unordered, so the incremental reload can be read off the updated_at index
+        configs = ScraperConfig.objects.order_by()
+        if self.synced_at is not None:
+            configs = configs.filter(updated_at__gt=self.synced_at)
+        else:
+            configs = configs.filter(is_active=True)
+
+        if self.synced_at is not None:
+            # Deletions leave no updated_at behind; the id list is read off the primary key
+            existing = set(ScraperConfig.objects.order_by().values_list('id', flat=True))
+            for config_id in [config_id for config_id in self.configs if config_id not in existing]:
+                del self.configs[config_id]
+
+        # Overlap slightly so a save racing the previous refresh is not missed
+        self.synced_at = now - timedelta(seconds=1)
+        for config in configs:
+            if not config.is_active:
+                self.configs.pop(config.id, None)
+                continue
+            next_run = config.next_run or now
+            self.configs[config.id] = {
+                'next_run': next_run,
+                'scraper_type': config.scraper_type,
+                'frequency': config.frequency,
+                'url': config.url_pattern,
+            }
+            heapq.heappush(self.heap, (next_run, config.id))
+
+        self.next_refresh = now + self.refresh_interval
+
+    def enqueue(self, config_id, entry, now):
+        """Create a PENDING job for a config unless one is already queued or running."""
+        if ScraperJob.objects.filter(config_id=config_id, status__in=['PENDING', 'RUNNING']).exists():
+            logger.info(f"Config {config_id} still has a job queued or running, skipping this run")
+            return None
+        return ScraperJob.objects.create(
+            job_type=entry['scraper_type'],
+            url=entry['url'],
+            config_id=config_id,
+            status='PENDING',
+            scheduled_time=now,
+        )
+
+    def tick(self, now=None):
+        """Enqueue every due config and reschedule it; returns the jobs created."""
+        now = now or timezone.now()
+        if self.next_refresh is None or now >= self.next_refresh:
+            self.refresh(now)
+
+        jobs = []
+        while self.heap and self.heap[0][0] <= now:
+            due, config_id = heapq.heappop(self.heap)
+            entry = self.configs.get(config_id)
+            if entry is None or entry['next_run'] != due:
+                # Stale entry for a config that was deactivated or rescheduled
+                continue
+
+            try:
+                job = self.enqueue(config_id, entry, now)
+            except IntegrityError:
+                # Deleted since the last refresh
+                logger.warning(f"Config {config_id} no longer exists, dropping it")
+                del self.configs[config_id]
+                continue
+            except DatabaseError:
+                logger.exception(f"Could not enqueue a job for config {config_id}")
+                job = None
+            if job:
+                jobs.append(job)
+
+            entry['next_run'] = compute_next_run(entry['frequency'], entry['scraper_type'], now, self.calendar)
+            heapq.heappush(self.heap, (entry['next_run'], config_id))
+            # update() leaves updated_at alone, so this doesn't trigger a reload
+            ScraperConfig.objects.filter(id=config_id).update(last_run=now, next_run=entry['next_run'])
+        return jobs
+
+    def seconds_until_next(self, now=None):
+        """How long the loop can sleep before something is due."""
+        now = now or timezone.now()
+        wake = self.next_refresh or now
+        if self.heap:
+            wake = min(wake, self.heap[0][0])
+        return max((wake - now).total_seconds(), 0)
+
+    def run(self, stop_event=None, max_sleep=60):
+        """Tick until ``stop_event`` is set."""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                jobs = self.tick()
+            except DatabaseError:
+                # e.g. the database restarting. The tick may have stopped
+                # halfway, so start over from the stored next_run times
+                logger.exception("Scheduler tick failed")
+                self.reset()
+                stop_event.wait(max_sleep)
+                continue
+            for job in jobs:
+                logger.info(f"Enqueued {job.job_type} job {job.id} for config {job.config_id}")
+            stop_event.wait(min(self.seconds_until_next(), max_sleep))
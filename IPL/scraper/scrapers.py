@@ -1,87 +1,194 @@
 import os
 import time
 import logging
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from django.utils import timezone
-from .models import ScraperJob, ScraperLog, DataSource, ScraperConfig
-from api.models import Team, Player, Stadium, Match
+from .models import ScraperJob, DataSource, ScraperConfig
+from .fetcher import AsyncFetcher
+from .ingest import BulkUpserter, NameResolver
+from .logbuffer import BufferedLogSink
+from .drivers import get_driver_pool
+from .httpcache import get_http_cache
+from .parsers import parse_html
+from .throttle import get_throttles, host_of
+from .metrics import JobMetrics
+from api.cache import invalidate_rows
+from api.form import update_player_form
+from api.memo import memo
+from api.models import Team, Player, Stadium, Match, Innings, PlayerPerformance
 
 logger = logging.getLogger(__name__)
 
 class BaseScraper:
     """Base class for all scrapers."""
     
-    def __init__(self, job_id=None):
+    # Maximum number of pages fetched in parallel for a single job
+    concurrency = AsyncFetcher.default_concurrency
+    
+    # CSS class of the elements a scraper reads; when set, only those
+    # subtrees are parsed instead of the whole document
+    parse_only = None
+    
+    def __init__(self, job_id=None, urls=None):
         self.job = None
+        self.log_sink = None
+        self.urls = list(urls) if urls else None
+        self.cache = get_http_cache()
+        self.throttles = get_throttles()
+        self.fetcher = AsyncFetcher(concurrency=self.concurrency, cache=self.cache, throttles=self.throttles)
+        # Body hashes to record as processed once the job completes
+        self.processed_pages = {}
+        self.metrics = JobMetrics()
         if job_id:
             try:
-                self.job = ScraperJob.objects.get(id=job_id)
+                self.job = ScraperJob.objects.select_related('config__data_source', 'data_source').get(id=job_id)
                 self.job.status = 'RUNNING'
                 self.job.start_time = timezone.now()
+                self.job.data_source = self.resolve_data_source()
                 self.job.save()
+                self.log_sink = BufferedLogSink(self.job)
+                self.metrics.start()
             except ScraperJob.DoesNotExist:
                 logger.error(f"ScraperJob with ID {job_id} does not exist")
+        if self.job and self.job.data_source:
+            self.throttles.configure(self.job.data_source)
+    
+    def resolve_data_source(self):
+        """Find the DataSource of the job, from its config or else its URL's host."""
+        if self.job.data_source:
+            return self.job.data_source
+        if self.job.config:
+            return self.job.config.data_source
+        host = host_of(self.job.url)
+        for source in DataSource.objects.filter(is_active=True):
+            if host_of(source.base_url) == host:
+                return source
+        return None
     
     def log(self, message, level='INFO'):
-        """Log a message to the database."""
-        if self.job:
-            ScraperLog.objects.create(
-                job=self.job,
-                level=level,
-                message=message
-            )
+        """Log a message to the database.
+        
+        Entries are buffered and written in batches; see BufferedLogSink.
+        """
+        if self.log_sink:
+            self.log_sink.emit(message, level)
         logger.log(getattr(logging, level), message)
     
+    def get_urls(self):
+        """Get the URLs this job should scrape."""
+        if self.urls:
+            return self.urls
+        return [self.job.url] if self.job else []
+    
+    def count_cache_result(self, result):
+        """Record an HTTP cache hit or miss on the job, and the bytes transferred."""
+        self.metrics.add('pages_fetched')
+        if not result.from_cache:
+            self.metrics.add('bytes_fetched', len(result.content or b''))
+        if self.job and result.ok:
+            if result.from_cache:
+                self.job.cache_hits += 1
+            else:
+                self.job.cache_misses += 1
+    
     def get_soup(self, url):
         """Get BeautifulSoup object from URL."""
-        try:
-            response = requests.get(url, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error fetching URL {url}: {str(e)}", 'ERROR')
-            if self.job:
-                self.job.status = 'FAILED'
-                self.job.error_message = str(e)
-                self.job.end_time = timezone.now()
-                self.job.save()
+        with self.metrics.phase('fetch'):
+            result = self.fetcher.fetch(url)
+        self.count_cache_result(result)
+        if not result.ok:
+            self.log(f"Error fetching URL {url}: {result.error}", 'ERROR')
+            self.finish_job('FAILED', result.error)
             return None
+        return self.parse(result.text)
+    
+    def parse(self, markup):
+        """Parse a page with the configured parser backend."""
+        with self.metrics.phase('parse'):
+            return parse_html(markup, only=self.parse_only)
     
-    def get_selenium_driver(self):
-        """Get Selenium WebDriver."""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
+    def get_soups(self, urls):
+        """Fetch several URLs concurrently and return (url, soup) pairs.
         
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            return driver
-        except Exception as e:
-            self.log(f"Error initializing Selenium WebDriver: {str(e)}", 'ERROR')
-            if self.job:
-                self.job.status = 'FAILED'
-                self.job.error_message = str(e)
-                self.job.end_time = timezone.now()
-                self.job.save()
-            return None
+        Pages that fail are logged and skipped; the job only fails when no
+        page could be fetched at all. Pages whose body is byte-identical to
+        what the last successful job processed are skipped without parsing,
+        and the job completes straight away if nothing changed.
+        """
+        with self.metrics.phase('fetch'):
+            results = self.fetcher.fetch_many(urls)
+        soups = []
+        errors = []
+        unchanged = 0
+        for result in results:
+            self.count_cache_result(result)
+            if not result.ok:
+                self.log(f"Error fetching URL {result.url}: {result.error}", 'ERROR')
+                errors.append(result.error)
+            elif self.cache and self.cache.is_processed(result.url, result.content_hash):
+                unchanged += 1
+            else:
+                self.processed_pages[result.url] = result.content_hash
+                soups.append((result.url, self.parse(result.text)))
+        
+        if unchanged:
+            self.log(f"Skipped {unchanged} unchanged page(s)")
+        if errors and not soups:
+            self.finish_job('FAILED', errors[0])
+        elif not soups:
+            self.log("No page changed since the last successful run")
+            self.finish_job()
+        return soups
+    
+    def write_rows(self, upserter, label):
+        """Write queued rows in bulk and log the created/updated counts per batch."""
+        with self.metrics.phase('write'):
+            batches = upserter.write()
+        for number, counts in enumerate(batches, start=1):
+            self.metrics.add('rows_created', counts['created'])
+            self.metrics.add('rows_updated', counts['updated'])
+            self.log(f"{label} batch {number}: created {counts['created']}, updated {counts['updated']}")
+        return batches
+    
+    def team_resolver(self):
+        """Get a name->id resolver for teams that creates placeholders."""
+        return NameResolver(Team, lambda name: {'short_name': name[:3].upper()})
+    
+    def log_host_stats(self):
+        """Log the effective request rate and error rate per host for this job."""
+        for host, stats in self.fetcher.host_stats.items():
+            data = stats.snapshot()
+            throttle = self.throttles.for_url(f'http://{host}/')
+            self.log(
+                f"Host {host}: {data['requests']} requests at {data['requests_per_second']:.2f}/s, "
+                f"{data['error_rate']:.1%} errors, {data['throttled']} throttled, "
+                f"{data['rate_limit_wait']:.1f}s waiting for the rate limit, "
+                f"concurrency limit {throttle.concurrency.limit:.1f}"
+            )
     
     def finish_job(self, status='COMPLETED', error_message=None):
         """Mark the job as finished."""
+        self.log_host_stats()
+        if self.cache:
+            if status == 'COMPLETED':
+                for url, body_hash in self.processed_pages.items():
+                    self.cache.mark_processed(url, body_hash)
+            self.processed_pages = {}
+            self.cache.evict()
         if self.job:
+            self.metrics.stop()
             self.job.status = status
             self.job.error_message = error_message
             self.job.end_time = timezone.now()
+            self.job.metrics = self.metrics.as_dict()
             self.job.save()
+        if self.log_sink:
+            self.log_sink.close()
     
     def run(self):
         """Run the scraper."""
@@ -91,6 +198,8 @@ class BaseScraper:
 class TeamScraper(BaseScraper):
     """Scraper for team data."""
     
+    parse_only = 'team-container'
+    
     def run(self):
         """Run the team scraper."""
         if not self.job:
@@ -100,34 +209,29 @@ class TeamScraper(BaseScraper):
         self.log(f"Starting team scraper for URL: {self.job.url}")
         
         try:
-            soup = self.get_soup(self.job.url)
-            if not soup:
+            pages = self.get_soups(self.get_urls())
+            if not pages:
                 return
             
             # Example implementation - adjust based on actual website structure
-            team_containers = soup.select('.team-container')
+            team_containers = [
+                container for url, soup in pages
+                for container in soup.select('.team-container')
+            ]
+            
+            teams = BulkUpserter(Team, key_fields=['name'], update_fields=['short_name', 'logo'])
             
             for container in team_containers:
                 name = container.select_one('.team-name').text.strip()
                 short_name = container.select_one('.team-short-name').text.strip()
                 logo = container.select_one('.team-logo img')['src']
                 
-                # Create or update team
-                team, created = Team.objects.update_or_create(
-                    name=name,
-                    defaults={
-                        'short_name': short_name,
-                        'logo': logo
-                    }
-                )
-                
-                if created:
-                    self.log(f"Created new team: {name}")
-                else:
-                    self.log(f"Updated team: {name}")
+                teams.add(name=name, short_name=short_name, logo=logo)
+            
+            self.write_rows(teams, 'Team')
             
-            self.finish_job()
             self.log(f"Team scraper completed successfully")
+            self.finish_job()
             
         except Exception as e:
             self.log(f"Error in team scraper: {str(e)}", 'ERROR')
@@ -135,7 +239,39 @@ class TeamScraper(BaseScraper):
 
 
 class PlayerScraper(BaseScraper):
-    """Scraper for player data."""
+    """Scraper for player data.
+    
+    Pages are loaded on warm drivers leased from the shared DriverPool, so
+    several player pages can be scraped in parallel without starting a
+    browser per job.
+    """
+    
+    # Map role to choices
+    role_map = {
+        "Batsman": "BAT",
+        "Bowler": "BWL",
+        "All-Rounder": "AR",
+        "Wicket Keeper": "WK"
+    }
+    
+    def scrape_page(self, pool, url):
+        """Load one page on a pooled driver and return (name, team_name, role_code) rows."""
+        with pool.lease() as driver:
+            driver.get(url)
+            
+            # Wait for the page to load
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".player-container"))
+            )
+            
+            # Example implementation - adjust based on actual website structure
+            rows = []
+            for element in driver.find_elements(By.CSS_SELECTOR, ".player-container"):
+                name = element.find_element(By.CSS_SELECTOR, ".player-name").text
+                team_name = element.find_element(By.CSS_SELECTOR, ".player-team").text
+                role = element.find_element(By.CSS_SELECTOR, ".player-role").text
+                rows.append((name, team_name, self.role_map.get(role, "BAT")))
+            return rows
     
     def run(self):
         """Run the player scraper."""
@@ -146,70 +282,62 @@ class PlayerScraper(BaseScraper):
         self.log(f"Starting player scraper for URL: {self.job.url}")
         
         try:
-            driver = self.get_selenium_driver()
-            if not driver:
-                return
+            pool = get_driver_pool()
+            urls = self.get_urls()
+            rows = []
+            errors = []
             
-            driver.get(self.job.url)
+            # Browsers only extract data; all database writes stay on this thread
+            with self.metrics.phase('fetch'), ThreadPoolExecutor(max_workers=min(pool.size, len(urls))) as executor:
+                futures = {executor.submit(self.scrape_page, pool, url): url for url in urls}
+                for future in as_completed(futures):
+                    try:
+                        rows.extend(future.result())
+                    except Exception as e:
+                        self.log(f"Error scraping player page {futures[future]}: {str(e)}", 'ERROR')
+                        errors.append(str(e))
+            self.metrics.add('pages_fetched', len(urls))
             
-            # Wait for the page to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".player-container"))
-            )
+            if errors and not rows:
+                self.finish_job('FAILED', errors[0])
+                return
             
-            # Example implementation - adjust based on actual website structure
-            player_elements = driver.find_elements(By.CSS_SELECTOR, ".player-container")
+            with self.metrics.phase('resolve'):
+                team_ids = self.team_resolver()
+                missing_teams = team_ids.ensure(team_name for _, team_name, _ in rows)
+            for team_name in missing_teams:
+                self.log(f"Team {team_name} does not exist, creating placeholder", 'WARNING')
             
-            for element in player_elements:
-                name = element.find_element(By.CSS_SELECTOR, ".player-name").text
-                team_name = element.find_element(By.CSS_SELECTOR, ".player-team").text
-                role = element.find_element(By.CSS_SELECTOR, ".player-role").text
-                
-                # Map role to choices
-                role_map = {
-                    "Batsman": "BAT",
-                    "Bowler": "BWL",
-                    "All-Rounder": "AR",
-                    "Wicket Keeper": "WK"
-                }
-                role_code = role_map.get(role, "BAT")
-                
-                # Get or create team
-                try:
-                    team = Team.objects.get(name=team_name)
-                except Team.DoesNotExist:
-                    self.log(f"Team {team_name} does not exist, creating placeholder", 'WARNING')
-                    team = Team.objects.create(name=team_name, short_name=team_name[:3].upper())
-                
-                # Create or update player
-                player, created = Player.objects.update_or_create(
+            players = BulkUpserter(Player, key_fields=['name', 'team_id'], update_fields=['role', 'nationality'])
+            for name, team_name, role_code in rows:
+                players.add(
                     name=name,
-                    team=team,
-                    defaults={
-                        'role': role_code,
-                        'nationality': 'Unknown'  # This would be scraped in a real implementation
-                    }
+                    team_id=team_ids[team_name],
+                    role=role_code,
+                    nationality='Unknown'  # This would be scraped in a real implementation
                 )
-                
-                if created:
-                    self.log(f"Created new player: {name} ({team.name})")
-                else:
-                    self.log(f"Updated player: {name} ({team.name})")
             
-            driver.quit()
-            self.finish_job()
+            self.write_rows(players, 'Player')
+            
+            metrics = pool.metrics()
+            self.log(
+                f"Driver pool: {metrics['live']} live, {metrics['created']} started "
+                f"({metrics['warmed']} ahead of time), {metrics['recycled']} recycled, "
+                f"avg startup {metrics['startup_seconds_avg'] or 0:.2f}s"
+            )
             self.log(f"Player scraper completed successfully")
+            self.finish_job()
             
         except Exception as e:
             self.log(f"Error in player scraper: {str(e)}", 'ERROR')
             self.finish_job('FAILED', str(e))
-            if 'driver' in locals():
-                driver.quit()
 
 
 class MatchScraper(BaseScraper):
     """Scraper for match data."""
     
+    parse_only = 'match-container'
+    
     def run(self):
         """Run the match scraper."""
         if not self.job:
@@ -219,12 +347,17 @@ class MatchScraper(BaseScraper):
         self.log(f"Starting match scraper for URL: {self.job.url}")
         
         try:
-            soup = self.get_soup(self.job.url)
-            if not soup:
+            pages = self.get_soups(self.get_urls())
+            if not pages:
                 return
             
             # Example implementation - adjust based on actual website structure
-            match_containers = soup.select('.match-container')
+            match_containers = [
+                container for url, soup in pages
+                for container in soup.select('.match-container')
+            ]
+            
+            rows = []
             
             for container in match_containers:
                 match_number = int(container.select_one('.match-number').text.strip().split('#')[1])
@@ -241,46 +374,40 @@ class MatchScraper(BaseScraper):
                 team_away_name = container.select_one('.team-away').text.strip()
                 venue_name = container.select_one('.venue').text.strip()
                 
-                # Get or create teams and venue
-                try:
-                    team_home = Team.objects.get(name=team_home_name)
-                except Team.DoesNotExist:
-                    self.log(f"Team {team_home_name} does not exist, creating placeholder", 'WARNING')
-                    team_home = Team.objects.create(name=team_home_name, short_name=team_home_name[:3].upper())
-                
-                try:
-                    team_away = Team.objects.get(name=team_away_name)
-                except Team.DoesNotExist:
-                    self.log(f"Team {team_away_name} does not exist, creating placeholder", 'WARNING')
-                    team_away = Team.objects.create(name=team_away_name, short_name=team_away_name[:3].upper())
-                
-                try:
-                    venue = Stadium.objects.get(name=venue_name)
-                except Stadium.DoesNotExist:
-                    self.log(f"Stadium {venue_name} does not exist, creating placeholder", 'WARNING')
-                    venue = Stadium.objects.create(name=venue_name, city='Unknown', country='India')
-                
-                # Create or update match
-                match, created = Match.objects.update_or_create(
+                rows.append((match_number, season, date_obj, time_obj, team_home_name, team_away_name, venue_name))
+            
+            # Resolve teams and venues for every row from one name->id map each
+            with self.metrics.phase('resolve'):
+                team_ids = self.team_resolver()
+                venue_ids = NameResolver(Stadium, lambda name: {'city': 'Unknown', 'country': 'India'})
+                missing_teams = team_ids.ensure(name for row in rows for name in row[4:6])
+                missing_venues = venue_ids.ensure(row[6] for row in rows)
+            for team_name in missing_teams:
+                self.log(f"Team {team_name} does not exist, creating placeholder", 'WARNING')
+            for venue_name in missing_venues:
+                self.log(f"Stadium {venue_name} does not exist, creating placeholder", 'WARNING')
+            
+            matches = BulkUpserter(
+                Match,
+                key_fields=['match_number', 'season'],
+                update_fields=['date', 'time', 'team_home', 'team_away', 'venue', 'status']
+            )
+            for match_number, season, date_obj, time_obj, team_home_name, team_away_name, venue_name in rows:
+                matches.add(
                     match_number=match_number,
                     season=season,
-                    defaults={
-                        'date': date_obj,
-                        'time': time_obj,
-                        'team_home': team_home,
-                        'team_away': team_away,
-                        'venue': venue,
-                        'status': 'SCHEDULED'
-                    }
+                    date=date_obj,
+                    time=time_obj,
+                    team_home_id=team_ids[team_home_name],
+                    team_away_id=team_ids[team_away_name],
+                    venue_id=venue_ids[venue_name],
+                    status='SCHEDULED'
                 )
-                
-                if created:
-                    self.log(f"Created new match: {match}")
-                else:
-                    self.log(f"Updated match: {match}")
             
-            self.finish_job()
+            self.write_rows(matches, 'Match')
+            
             self.log(f"Match scraper completed successfully")
+            self.finish_job()
             
         except Exception as e:
             self.log(f"Error in match scraper: {str(e)}", 'ERROR')
@@ -290,6 +417,8 @@ class MatchScraper(BaseScraper):
 class StadiumScraper(BaseScraper):
     """Scraper for stadium data."""
     
+    parse_only = 'stadium-container'
+    
     def run(self):
         """Run the stadium scraper."""
         if not self.job:
@@ -299,12 +428,17 @@ class StadiumScraper(BaseScraper):
         self.log(f"Starting stadium scraper for URL: {self.job.url}")
         
         try:
-            soup = self.get_soup(self.job.url)
-            if not soup:
+            pages = self.get_soups(self.get_urls())
+            if not pages:
                 return
             
             # Example implementation - adjust based on actual website structure
-            stadium_containers = soup.select('.stadium-container')
+            stadium_containers = [
+                container for url, soup in pages
+                for container in soup.select('.stadium-container')
+            ]
+            
+            stadiums = BulkUpserter(Stadium, key_fields=['name'], update_fields=['city', 'country', 'capacity'])
             
             for container in stadium_containers:
                 name = container.select_one('.stadium-name').text.strip()
@@ -315,37 +449,279 @@ class StadiumScraper(BaseScraper):
                 # Parse capacity
                 capacity = int(capacity_text.replace(',', '')) if capacity_text else None
                 
-                # Create or update stadium
-                stadium, created = Stadium.objects.update_or_create(
-                    name=name,
-                    defaults={
-                        'city': city,
-                        'country': country,
-                        'capacity': capacity
-                    }
+                stadiums.add(name=name, city=city, country=country, capacity=capacity)
+            
+            self.write_rows(stadiums, 'Stadium')
+            
+            self.log(f"Stadium scraper completed successfully")
+            self.finish_job()
+            
+        except Exception as e:
+            self.log(f"Error in stadium scraper: {str(e)}", 'ERROR')
+            self.finish_job('FAILED', str(e))
+
+
+class LiveMatchScraper(BaseScraper):
+    """Scraper that follows a live match and writes only what changed.
+    
+    The match page is polled every ``poll_interval`` seconds. The last
+    parsed state is kept in memory (one entry per innings and per player
+    innings, so its size is bounded by the match itself) and each poll
+    issues targeted UPDATEs for the fields that differ from it. The
+    scraper stops by itself once the match is completed or cancelled.
+    """
+    
+    parse_only = 'live-match'
+    poll_interval = 30
+    max_duration = 6 * 60 * 60
+    max_consecutive_errors = 10
+    
+    status_map = {
+        'Scheduled': 'SCHEDULED',
+        'Live': 'LIVE',
+        'Completed': 'COMPLETED',
+        'Cancelled': 'CANCELLED',
+    }
+    innings_fields = ['runs', 'wickets', 'overs', 'extras']
+    performance_fields = [
+        'runs_scored', 'balls_faced', 'fours', 'sixes', 'how_out',
+        'overs_bowled', 'maidens', 'runs_conceded', 'wickets',
+    ]
+    float_fields = {'overs', 'overs_bowled'}
+    
+    def __init__(self, job_id=None, urls=None):
+        super().__init__(job_id, urls=urls)
+        self.stop_event = threading.Event()
+        self.match = None
+        self.status = None
+        self.innings_state = {}
+        self.performance_state = {}
+        self.innings_ids = {}
+        self.performance_ids = {}
+        self.player_ids = {}
+        self.team_ids = {}
+        # Page entries already reported as unusable
+        self.skipped = set()
+        self.last_hash = None
+    
+    def read_values(self, container, fields, prefix=''):
+        """Read the fields present in a container; missing ones are left out."""
+        values = {}
+        for field in fields:
+            element = container.select_one(f".{prefix}{field.replace('_', '-')}")
+            if element is None:
+                continue
+            text = element.text.strip()
+            if field == 'how_out':
+                values[field] = text or None
+            elif field in self.float_fields:
+                values[field] = float(text or 0)
+            else:
+                values[field] = int(text or 0)
+        return values
+    
+    def parse_page(self, soup):
+        """Read status, innings totals and player rows from a match page."""
+        header = soup.select_one('.match-header')
+        page = {
+            'match_number': int(header.select_one('.match-number').text.strip().split('#')[1]),
+            'season': int(header.select_one('.season').text.strip()),
+            'status': self.status_map.get(header.select_one('.match-status').text.strip(), 'LIVE'),
+            'innings': {},
+            'performances': {},
+        }
+        for container in soup.select('.innings-container'):
+            number = int(container['data-innings'])
+            page['innings'][number] = {
+                'batting_team': container.select_one('.batting-team').text.strip(),
+                'bowling_team': container.select_one('.bowling-team').text.strip(),
+                **self.read_values(container, self.innings_fields, 'innings-'),
+            }
+            for row in container.select('.performance-row'):
+                name = row.select_one('.player-name').text.strip()
+                page['performances'][(name, number)] = self.read_values(row, self.performance_fields)
+        return page
+    
+    def load_match(self, page):
+        """Resolve the match and prefetch the ids every later write needs."""
+        self.match = Match.objects.select_related('team_home', 'team_away').get(
+            match_number=page['match_number'], season=page['season']
+        )
+        self.status = self.match.status
+        teams = [self.match.team_home, self.match.team_away]
+        self.team_ids = {team.name: team.id for team in teams}
+        self.player_ids = dict(Player.objects.filter(team__in=teams).values_list('name', 'id'))
+        
+        for innings in Innings.objects.filter(match=self.match):
+            self.innings_ids[innings.innings_number] = innings.id
+            self.innings_state[innings.innings_number] = {field: getattr(innings, field) for field in self.innings_fields}
+        
+        numbers = {innings_id: number for number, innings_id in self.innings_ids.items()}
+        for performance in PlayerPerformance.objects.filter(match=self.match):
+            if performance.innings_id not in numbers:
+                self.log(f"Performance {performance.id} belongs to another match's innings, ignoring it", 'WARNING')
+                continue
+            key = (performance.player_id, numbers[performance.innings_id])
+            self.performance_ids[key] = performance.id
+            self.performance_state[key] = {field: getattr(performance, field) for field in self.performance_fields}
+    
+    def write_diff(self, model, object_id, old, new):
+        """UPDATE only the fields that changed; returns the changed field names."""
+        changed = {field: value for field, value in new.items() if old.get(field) != value}
+        if changed:
+            model.objects.filter(id=object_id).update(updated_at=timezone.now(), **changed)
+            old.update(changed)
+        return list(changed)
+    
+    def skip(self, key, message):
+        """Log that a page entry can't be applied, once per entry."""
+        if key not in self.skipped:
+            self.skipped.add(key)
+            self.log(message, 'WARNING')
+    
+    def apply(self, page):
+        """Write the differences between a parsed page and the last known state."""
+        writes = 0
+        if page['status'] != self.status:
+            Match.objects.filter(id=self.match.id).update(status=page['status'], updated_at=timezone.now())
+            self.log(f"Match status changed from {self.status} to {page['status']}")
+            self.status = page['status']
+            writes += 1
+        
+        for number, innings in page['innings'].items():
+            totals = {field: innings[field] for field in self.innings_fields if field in innings}
+            if number not in self.innings_ids:
+                batting_team_id = self.team_ids.get(innings['batting_team'])
+                bowling_team_id = self.team_ids.get(innings['bowling_team'])
+                if batting_team_id is None or bowling_team_id is None:
+                    self.skip(('innings', number), (
+                        f"Innings {number} is between {innings['batting_team']} and {innings['bowling_team']}, "
+                        f"not the match's teams, skipping it"
+                    ))
+                    continue
+                created = Innings.objects.create(
+                    match=self.match,
+                    innings_number=number,
+                    batting_team_id=batting_team_id,
+                    bowling_team_id=bowling_team_id,
+                    **totals
                 )
-                
-                if created:
-                    self.log(f"Created new stadium: {name}, {city}")
+                self.innings_ids[number] = created.id
+                self.innings_state[number] = totals
+                writes += 1
+            elif self.write_diff(Innings, self.innings_ids[number], self.innings_state[number], totals):
+                writes += 1
+        
+        changed_players = set()
+        for (name, number), stats in page['performances'].items():
+            player_id = self.player_ids.get(name)
+            if player_id is None:
+                self.skip(('player', name), f"Player {name} is not in either squad, skipping")
+                continue
+            key = (player_id, number)
+            if key not in self.performance_ids:
+                if number not in self.innings_ids:
+                    # Its innings was skipped and already reported
+                    continue
+                created = PlayerPerformance.objects.create(
+                    match=self.match,
+                    player_id=player_id,
+                    innings_id=self.innings_ids[number],
+                    **stats
+                )
+                self.performance_ids[key] = created.id
+                self.performance_state[key] = dict(stats)
+                writes += 1
+            elif self.write_diff(PlayerPerformance, self.performance_ids[key], self.performance_state[key], stats):
+                changed_players.add(player_id)
+                writes += 1
+        if changed_players:
+            # Updates bypass post_save, so fold the new figures into the players' form here
+            update_player_form((player_id, self.match.id) for player_id in changed_players)
+        return writes
+    
+    def poll(self, url):
+        """Fetch and apply one update; returns False if the page could not be fetched."""
+        with self.metrics.phase('fetch'):
+            result = self.fetcher.fetch(url)
+        self.count_cache_result(result)
+        if not result.ok:
+            self.log(f"Error fetching URL {url}: {result.error}", 'WARNING')
+            return False
+        if result.content_hash == self.last_hash:
+            return True
+        
+        with self.metrics.phase('parse'):
+            page = self.parse_page(self.parse(result.text))
+        if self.match is None:
+            with self.metrics.phase('resolve'):
+                self.load_match(page)
+            self.log(f"Following live match: {self.match}")
+        with self.metrics.phase('write'):
+            writes = self.apply(page)
+            if writes:
+                # Updates bypass post_save, so expire cached API responses
+                # and memoized predictions here; only this match's rows
+                # changed, so other matches' responses stay cached
+                invalidate_rows(Match, [self.match])
+                invalidate_rows(Innings, Innings.objects.filter(match=self.match))
+                invalidate_rows(PlayerPerformance, PlayerPerformance.objects.filter(match=self.match))
+                memo.invalidate(match_ids=[self.match.id])
+        self.metrics.add('rows_updated', writes)
+        self.last_hash = result.content_hash
+        if writes:
+            self.log(f"Applied {writes} update(s)", 'DEBUG')
+        return True
+    
+    def stop(self):
+        """Ask a running scraper to stop after the current poll."""
+        self.stop_event.set()
+    
+    def run(self):
+        """Run the live scraper until the match finishes."""
+        if not self.job:
+            self.log("No job specified", 'ERROR')
+            return
+        
+        self.log(f"Starting live scraper for URL: {self.job.url}")
+        
+        try:
+            deadline = time.monotonic() + self.max_duration
+            errors = 0
+            while not self.stop_event.is_set():
+                if self.poll(self.job.url):
+                    errors = 0
                 else:
-                    self.log(f"Updated stadium: {name}, {city}")
+                    errors += 1
+                    if errors >= self.max_consecutive_errors:
+                        self.finish_job('FAILED', f"Giving up after {errors} consecutive fetch errors")
+                        return
+                
+                if self.status in ('COMPLETED', 'CANCELLED'):
+                    self.log(f"Match {self.status.lower()}, stopping live scraper")
+                    break
+                if time.monotonic() >= deadline:
+                    self.log("Maximum live scraping duration reached", 'WARNING')
+                    break
+                self.stop_event.wait(self.poll_interval)
             
+            self.log("Live scraper completed successfully")
             self.finish_job()
-            self.log(f"Stadium scraper completed successfully")
             
         except Exception as e:
-            self.log(f"Error in stadium scraper: {str(e)}", 'ERROR')
+            self.log(f"Error in live scraper: {str(e)}", 'ERROR')
             self.finish_job('FAILED', str(e))
 
 
 # Factory function to get the appropriate scraper
-def get_scraper(job_type, job_id):
+def get_scraper(job_type, job_id, urls=None):
     """Get the appropriate scraper based on job type."""
     scrapers = {
         'TEAM': TeamScraper,
         'PLAYER': PlayerScraper,
         'MATCH': MatchScraper,
         'STADIUM': StadiumScraper,
+        'LIVE': LiveMatchScraper,
     }
     
     scraper_class = scrapers.get(job_type)
@@ -353,4 +729,4 @@ def get_scraper(job_type, job_id):
         logger.error(f"Unknown scraper type: {job_type}")
         return None
     
-    return scraper_class(job_id)
\ No newline at end of file
+    return scraper_class(job_id, urls=urls)
\ No newline at end of file
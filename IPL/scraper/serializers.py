@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from .models import ScraperJob, ScraperLog, DataSource, ScraperConfig
+
+class ScraperJobSerializer(serializers.ModelSerializer):
+    # Set by the workers, not by clients
+    class Meta:
+        model = ScraperJob
+        fields = '__all__'
+        read_only_fields = [
+            'status', 'start_time', 'end_time', 'error_message', 'claimed_by',
+            'cache_hits', 'cache_misses', 'metrics', 'created_at', 'updated_at',
+        ]
+
+class ScraperLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScraperLog
+        fields = '__all__'
+
+class DataSourceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSource
+        fields = '__all__'
+
+class ScraperConfigSerializer(serializers.ModelSerializer):
+    data_source_name = serializers.ReadOnlyField(source='data_source.name')
+    
+    class Meta:
+        model = ScraperConfig
+        fields = '__all__'
+        read_only_fields = ['last_run', 'created_at', 'updated_at']
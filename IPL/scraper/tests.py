@@ -1,3 +1,934 @@
-from django.test import TestCase
+import time
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from unittest import mock
+from django.db import DatabaseError, IntegrityError, OperationalError, connection
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from api.memo import memo
+from api.models import Team, Player, Stadium, Match, Innings, PlayerPerformance
+from api.testing import full_scans
+from .drivers import DriverPool
+from .fetcher import AsyncFetcher, build_session
+from .fixture_server import PAGE_RENDERERS, FixtureServer, FixtureRequestHandler, render_match_page
+from .httpcache import HTTPCache
+from .ingest import BulkUpserter, NameResolver
+from .jobqueue import claim_next_job, fail_worker_jobs, reap_stale_jobs, run_job
+from .logbuffer import BufferedLogSink
+from .metrics import JobMetrics, percentile, summarize
+from .parsers import PARSE_CHUNK_SIZE, available_backends, parse_html
+from .scheduler import MatchCalendar, Scheduler, compute_next_run
+from .scrapers import LiveMatchScraper
+from .throttle import (
+    AdaptiveConcurrency, ProxiesExhausted, RotationPool, SharedTokenBucket, ThrottleRegistry, TokenBucket
+)
+from .models import ScraperJob, ScraperLog, DataSource, ScraperConfig
 
-# Create your tests here.
+
+class FlakyRequestHandler(FixtureRequestHandler):
+    """Answer each path's first request with a 503 and a Retry-After."""
+
+    def do_GET(self):
+        if self.path not in self.server.failed:
+            self.server.failed.add(self.path)
+            self.send_response(503)
+            self.send_header('Retry-After', '2')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+
+class FetcherTests(SimpleTestCase):
+    """AsyncFetcher against the local fixture server."""
+
+    def fetcher(self, **kwargs):
+        return AsyncFetcher(session=build_session(), **kwargs)
+
+    def test_retries_honour_retry_after(self):
+        with FixtureServer(handler_class=FlakyRequestHandler) as server:
+            server.failed = set()
+            with mock.patch('scraper.fetcher.time.sleep') as sleep:
+                result = self.fetcher(backoff=0.01).fetch(f'{server.base_url}/teams/1')
+        self.assertTrue(result.ok)
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.attempts, 2)
+        sleep.assert_called_once_with(2.0)
+
+    def test_gives_up_after_retries(self):
+        with FixtureServer(rate_limit=1, retry_after=0) as server:
+            fetcher = self.fetcher(retries=2)
+            fetcher.fetch(f'{server.base_url}/teams/1')
+            result = fetcher.fetch(f'{server.base_url}/teams/1')
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status_code, 429)
+        self.assertEqual(result.attempts, 3)
+
+    def test_long_retry_after_gives_up_instead_of_sleeping(self):
+        with FixtureServer(rate_limit=1, retry_after=86400) as server:
+            fetcher = self.fetcher(max_backoff=60)
+            fetcher.fetch(f'{server.base_url}/teams/1')
+            with mock.patch('scraper.fetcher.time.sleep') as sleep, \
+                    mock.patch('scraper.fetcher.asyncio.sleep') as async_sleep:
+                result = fetcher.fetch(f'{server.base_url}/teams/1')
+                [many] = fetcher.fetch_many([f'{server.base_url}/teams/2'])
+        for result in (result, many):
+            self.assertFalse(result.ok)
+            self.assertEqual((result.status_code, result.attempts), (429, 1))
+        sleep.assert_not_called()
+        async_sleep.assert_not_called()
+
+    def test_backoff_is_capped(self):
+        fetcher = self.fetcher(backoff=10, max_backoff=60)
+        self.assertEqual([fetcher._backoff_delay(attempt) for attempt in (1, 3, 5)], [10, 40, 60])
+
+    def test_not_modified_serves_cached_body(self):
+        with tempfile.TemporaryDirectory() as directory, FixtureServer() as server:
+            fetcher = self.fetcher(cache=HTTPCache(directory))
+            first = fetcher.fetch(f'{server.base_url}/stadiums/1')
+            second = fetcher.fetch(f'{server.base_url}/stadiums/1')
+        self.assertEqual((first.status_code, first.from_cache), (200, False))
+        self.assertEqual((second.status_code, second.from_cache), (304, True))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.text, first.text)
+        self.assertEqual(second.content_hash, first.content_hash)
+
+    def test_fetch_many_keeps_input_order(self):
+        titles = {'teams': 'Teams', 'matches': 'Fixtures', 'stadiums': 'Venues'}
+        with FixtureServer(latency=0.02) as server:
+            urls = [f'{server.base_url}/{kind}/{i}' for i in range(4) for kind in titles]
+            urls.append(f'{server.base_url}/missing/1')
+            results = self.fetcher(concurrency=4, retries=0).fetch_many(urls)
+        self.assertEqual([result.url for result in results], urls)
+        for result in results[:-1]:
+            self.assertTrue(result.ok, result.error)
+            self.assertIn(f'<title>{titles[result.url.split("/")[3]]}</title>', result.text)
+        self.assertEqual(results[-1].status_code, 404)
+        self.assertFalse(results[-1].ok)
+
+
+class ThrottleTests(SimpleTestCase):
+    def test_token_bucket_refills_at_rate(self):
+        bucket = TokenBucket(rate=50, burst=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        waited = bucket.acquire()
+        self.assertGreater(waited, 0)
+        self.assertLess(waited, 0.1)
+
+    def test_token_bucket_pause(self):
+        bucket = TokenBucket(rate=1000, burst=5)
+        bucket.pause(0.05)
+        self.assertFalse(bucket.try_acquire())
+        self.assertGreaterEqual(bucket.acquire(), 0.04)
+
+    def test_token_bucket_rejects_non_positive_rates(self):
+        for rate in (0, -1, None):
+            with self.assertRaises(ValueError):
+                TokenBucket(rate)
+
+    def test_shared_bucket_is_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/host.bucket'
+            first = SharedTokenBucket(path, rate=0.01, burst=2)
+            second = SharedTokenBucket(path, rate=0.01, burst=2)
+            self.assertTrue(first.try_acquire())
+            self.assertTrue(second.try_acquire())
+            self.assertFalse(first.try_acquire())
+            self.assertFalse(second.try_acquire())
+            # A pause, e.g. after a Retry-After, holds every process back
+            second.pause(60)
+            self.assertFalse(SharedTokenBucket(path, rate=100).try_acquire())
+
+    def test_registry_shares_concurrency_between_workers(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            SCRAPER_THROTTLE_DIR=directory, SCRAPER_HOST_CONCURRENCY=4
+        ):
+            self.assertEqual(ThrottleRegistry(workers=3).for_url('http://a.test/').concurrency.maximum, 1)
+            self.assertEqual(ThrottleRegistry(workers=2).for_url('http://a.test/').concurrency.maximum, 2)
+            source = DataSource(name='Zero', base_url='http://b.test', requests_per_second=0)
+            with self.assertLogs('scraper.throttle', 'WARNING'):
+                throttle = ThrottleRegistry().configure(source)
+            self.assertIsInstance(throttle.bucket, SharedTokenBucket)
+            self.assertEqual(throttle.bucket.rate, 2.0)
+
+    def test_concurrency_grows_and_halves(self):
+        concurrency = AdaptiveConcurrency(maximum=8, latency_target=1.0, cooldown=60)
+        concurrency.record(overloaded=True)
+        self.assertEqual(concurrency.limit, 4)
+        # Within the cooldown a second failure doesn't halve it again
+        concurrency.record(overloaded=False, elapsed=2.0)
+        self.assertEqual(concurrency.limit, 4)
+        for _ in range(4):
+            concurrency.record(overloaded=False, elapsed=0.1)
+        self.assertGreater(concurrency.limit, 4.9)
+        self.assertLess(concurrency.limit, 5)
+
+        concurrency = AdaptiveConcurrency(maximum=4, minimum=2, cooldown=0)
+        for _ in range(5):
+            concurrency.record(overloaded=True)
+        self.assertEqual(concurrency.limit, 2)
+        for _ in range(100):
+            concurrency.record(overloaded=False)
+        self.assertEqual(concurrency.limit, 4)
+
+    def test_rotation_pool_evicts_failing_items(self):
+        pool = RotationPool(['good', 'bad'], min_samples=3)
+        for _ in range(10):
+            pool.report('good', True)
+            pool.report('bad', False)
+        self.assertEqual(pool.evicted, ['bad'])
+        self.assertEqual({pool.choose() for _ in range(20)}, {'good'})
+
+    def test_rotation_pool_fails_when_exhausted(self):
+        self.assertIsNone(RotationPool([]).choose())
+        pool = RotationPool(['proxy'], min_samples=1, readmit_after=60)
+        for _ in range(6):
+            pool.report('proxy', False)
+        with self.assertRaises(ProxiesExhausted):
+            pool.choose()
+        pool.last_eviction -= 60
+        with self.assertLogs('scraper.throttle', 'WARNING'):
+            self.assertEqual(pool.choose(), 'proxy')
+
+
+def statements(queries):
+    """Count captured queries by their SQL verb."""
+    counts = {}
+    for query in queries:
+        verb = query['sql'].split(None, 1)[0].upper()
+        counts[verb] = counts.get(verb, 0) + 1
+    return counts
+
+
+class ParserTests(SimpleTestCase):
+    """Every backend finds the same containers, whole or partially parsed."""
+
+    def match_rows(self, tree):
+        return [
+            (row.select_one('.match-number').text, row.select_one('.team-home').get_text(strip=True))
+            for row in tree.select('.match-container')
+        ]
+
+    def test_backends_agree(self):
+        html = render_match_page(count=1000)
+        # Big enough to be fed to the pull parser in several chunks
+        self.assertGreater(len(html), 2 * PARSE_CHUNK_SIZE)
+        expected = [(f'Match #{i + 1}', f'Team {i % 10}') for i in range(1000)]
+        for backend in available_backends():
+            for only in (None, 'match-container'):
+                with self.subTest(backend=backend, only=only):
+                    self.assertEqual(self.match_rows(parse_html(html, backend=backend, only=only)), expected)
+
+    def test_partial_parse_keeps_only_matches(self):
+        html = render_match_page(count=3)
+        tree = parse_html(html, backend='lxml-native', only='match-container')
+        self.assertEqual(tree.select('nav'), [])
+        self.assertEqual(tree.select('footer li'), [])
+        self.assertNotIn('Lorem ipsum', tree.text)
+        self.assertEqual(len(tree.select('span.venue')), 3)
+
+    def test_outermost_matches_in_document_order(self):
+        html = (
+            '<html><body><p>skip</p><div class="b" id="first"><div class="a" id="nested">x</div></div>'
+            '<div class="a extra" id="second">y</div><div class="c">z</div></body></html>'
+        )
+        tree = parse_html(html, backend='lxml-native', only=['a', 'b'])
+        self.assertEqual([element.get('id') for element in tree.elements], ['first', 'second'])
+        self.assertEqual([node.get('id') for node in tree.select('.a')], ['nested', 'second'])
+        self.assertIsNone(tree.select_one('.c'))
+
+
+class FakeDriver:
+    """Stands in for a WebDriver; a crashed one stops answering commands."""
+
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.crashed:
+            raise WebDriverException('chrome not reachable')
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverPoolTests(SimpleTestCase):
+    """Leased drivers are reused unless the browser itself has failed."""
+
+    def setUp(self):
+        self.pool = DriverPool(size=1, max_pages=3, max_rss_mb=None, factory=FakeDriver)
+
+    def test_reuses_driver(self):
+        with self.pool.lease() as first:
+            pass
+        with self.pool.lease() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.created, 1)
+
+    def test_page_timeout_keeps_driver(self):
+        with self.assertRaises(TimeoutException):
+            with self.pool.lease() as first:
+                raise TimeoutException('no .player-container')
+        with self.pool.lease() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.recycled, 0)
+
+    def test_crashed_driver_is_recycled(self):
+        with self.assertRaises(WebDriverException):
+            with self.pool.lease() as first:
+                first.crashed = True
+                raise WebDriverException('tab crashed')
+        self.assertTrue(first.quit_called)
+        with self.pool.lease() as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual((self.pool.created, self.pool.recycled), (2, 1))
+
+    def test_recycled_after_page_limit(self):
+        drivers = []
+        for _ in range(4):
+            with self.pool.lease() as driver:
+                drivers.append(driver)
+        self.assertEqual(len({id(driver) for driver in drivers}), 2)
+        self.assertTrue(drivers[0].quit_called)
+
+
+    def test_warm_starts_min_size_drivers(self):
+        pool = DriverPool(size=3, max_pages=3, max_rss_mb=None, factory=FakeDriver, min_size=2)
+        self.assertEqual(pool.warm(), 2)
+        self.assertEqual(pool.warm(), 0)
+        with pool.lease():
+            pass
+        metrics = pool.metrics()
+        self.assertEqual((metrics['created'], metrics['warmed'], metrics['idle']), (2, 2, 2))
+        self.assertEqual(len(metrics['drivers']), 2)
+        self.assertIsNotNone(metrics['startup_seconds_avg'])
+        self.assertIsNotNone(metrics['warm_seconds'])
+
+    def test_warm_stays_within_size(self):
+        with self.pool.lease():
+            self.assertEqual(self.pool.warm(1), 0)
+        self.assertEqual(self.pool.created, 1)
+
+    def test_warm_survives_a_browser_that_fails_to_start(self):
+        def broken():
+            raise WebDriverException('chrome not found')
+        pool = DriverPool(size=2, max_rss_mb=None, factory=broken, min_size=2)
+        with self.assertLogs('scraper.drivers', 'WARNING'):
+            self.assertEqual(pool.warm(), 0)
+        self.assertEqual(pool.metrics()['live'], 0)
+
+
+class IngestTests(TestCase):
+    """Bulk upserts and name resolution run a fixed number of queries per batch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teams = [Team.objects.create(name=f'Team {i}', short_name=f'T{i}') for i in range(3)]
+
+    def test_upsert_batches(self):
+        upserter = BulkUpserter(Team, key_fields=['name'], update_fields=['short_name'], batch_size=2)
+        # Each batch of two holds one existing team and one new one
+        for name, short_name in [('Team 0', 'A0'), ('New 0', 'N0'), ('Team 1', 'A1'), ('New 1', 'N1')]:
+            upserter.add(name=name, short_name=short_name)
+        upserter.add(name='Team 0', short_name='Z0')
+        self.assertEqual(len(upserter), 4)
+
+        with CaptureQueriesContext(connection) as ctx:
+            batches = upserter.write()
+        self.assertEqual(batches, [{'created': 1, 'updated': 1}, {'created': 1, 'updated': 1}])
+        counts = statements(ctx.captured_queries)
+        self.assertEqual((counts.get('SELECT'), counts.get('INSERT'), counts.get('UPDATE')), (2, 2, 2))
+        self.assertEqual(len(upserter), 0)
+        self.assertEqual(
+            dict(Team.objects.values_list('name', 'short_name')),
+            {'Team 0': 'Z0', 'Team 1': 'A1', 'Team 2': 'T2', 'New 0': 'N0', 'New 1': 'N1'}
+        )
+
+    def test_nothing_queued_writes_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(BulkUpserter(Team, ['name'], ['short_name']).write(), [])
+
+    def test_resolver_creates_placeholders_once(self):
+        with self.assertNumQueries(1):
+            resolver = NameResolver(Team, lambda name: {'short_name': name[:3].upper()})
+        with CaptureQueriesContext(connection) as ctx:
+            created = resolver.ensure(['Team 0', 'new side', 'Other XI', 'new side'])
+        self.assertEqual(created, ['Other XI', 'new side'])
+        counts = statements(ctx.captured_queries)
+        self.assertEqual((counts.get('INSERT'), counts.get('SELECT')), (1, 1))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.ensure(['Team 0', 'new side']), [])
+        placeholder = Team.objects.get(name='new side')
+        self.assertEqual(resolver['new side'], placeholder.pk)
+        self.assertEqual(placeholder.short_name, 'NEW')
+        self.assertEqual(resolver['Team 1'], self.teams[1].pk)
+        self.assertEqual(resolver.created, ['Other XI', 'new side'])
+
+    def test_resolver_tolerates_names_created_meanwhile(self):
+        resolver = NameResolver(Stadium, lambda name: {'city': 'Unknown'})
+        # Another worker adds one of the missing names after the map was loaded
+        existing = Stadium.objects.create(name='New Ground', city='Pune')
+        self.assertEqual(resolver.ensure(['New Ground', 'Other Ground']), ['New Ground', 'Other Ground'])
+        self.assertEqual(resolver['New Ground'], existing.pk)
+        self.assertEqual(Stadium.objects.get(pk=existing.pk).city, 'Pune')
+        self.assertEqual(resolver['Other Ground'], Stadium.objects.get(name='Other Ground').pk)
+
+
+class MetricsTests(TestCase):
+    def test_queries_and_time_go_to_the_innermost_phase(self):
+        metrics = JobMetrics().start()
+        with metrics.phase('fetch'):
+            time.sleep(0.02)
+            with metrics.phase('write'):
+                Team.objects.count()
+                Team.objects.count()
+                time.sleep(0.02)
+        Team.objects.count()
+        metrics.add('pages_fetched')
+        metrics.add('bytes_fetched', 512)
+        metrics.stop()
+        # Queries after stop() aren't counted
+        Team.objects.count()
+
+        report = metrics.as_dict()
+        self.assertEqual(report['queries'], 3)
+        self.assertEqual(report['phases']['write']['queries'], 2)
+        self.assertEqual(report['phases']['fetch']['queries'], 0)
+        self.assertEqual(report['phases']['other']['queries'], 1)
+        self.assertGreaterEqual(report['phases']['write']['seconds'], 0.02)
+        self.assertGreaterEqual(report['phases']['fetch']['seconds'], 0.015)
+        self.assertLess(report['phases']['fetch']['seconds'], report['total_seconds'] - 0.02)
+        self.assertEqual((report['pages_fetched'], report['bytes_fetched']), (1, 512))
+
+    def test_phases_on_other_threads_are_only_timed(self):
+        metrics = JobMetrics().start()
+
+        def parse():
+            with metrics.phase('parse'):
+                time.sleep(0.01)
+
+        with metrics.phase('write'):
+            thread = threading.Thread(target=parse)
+            thread.start()
+            thread.join()
+            Team.objects.count()
+        metrics.stop()
+        report = metrics.as_dict()
+        self.assertGreaterEqual(report['phases']['parse']['seconds'], 0.01)
+        # The other thread's phase doesn't take the query or the time from this one's
+        self.assertEqual(report['phases']['write']['queries'], 1)
+        self.assertGreaterEqual(report['phases']['write']['seconds'], 0.01)
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([3], 95), 3)
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2.5)
+        self.assertAlmostEqual(percentile(range(1, 101), 95), 95.05)
+
+    def test_summarize_groups_by_day_and_key(self):
+        def job(day, job_type, total, write=0.0):
+            metrics = {'total_seconds': total, 'queries': 4, 'phases': {'write': {'seconds': write}}}
+            return {'job_type': job_type, 'end_time': datetime(2024, 4, day, 12), 'metrics': metrics}
+
+        jobs = [job(1, 'TEAM', 1.0), job(1, 'TEAM', 3.0, write=1.0), job(2, 'MATCH', 2.0),
+                job(2, 'TEAM', 5.0), {'job_type': 'TEAM', 'end_time': None, 'metrics': None}]
+        rows = summarize(jobs, lambda job: job['job_type'])
+        self.assertEqual(
+            [(row['day'].day, row['group'], row['jobs']) for row in rows],
+            [(2, 'MATCH', 1), (2, 'TEAM', 1), (1, 'TEAM', 2)],
+        )
+        self.assertEqual((rows[2]['p50'], rows[2]['queries_p95']), (2.0, 4))
+        self.assertEqual(rows[2]['phases']['write']['p50'], 0.5)
+        self.assertEqual(rows[2]['phases']['parse'], {'p50': 0.0, 'p95': 0.0})
+
+
+class LogBufferTests(TestCase):
+    """Log entries are written in batches, and never lost to a quiet job or a failed write."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = ScraperJob.objects.create(job_type='MATCH', url='http://127.0.0.1/matches')
+
+    def sink(self, **kwargs):
+        sink = BufferedLogSink(self.job, **{'max_entries': 3, 'flush_interval': 60, **kwargs})
+        self.addCleanup(sink.close)
+        return sink
+
+    def test_flushes_when_full(self):
+        sink = self.sink()
+        with self.assertNumQueries(0):
+            sink.emit('one')
+            sink.emit('two')
+        with self.assertNumQueries(1):
+            sink.emit('three')
+        self.assertEqual(list(self.job.logs.order_by('id').values_list('message', flat=True)), ['one', 'two', 'three'])
+
+    def test_flushes_on_error(self):
+        sink = self.sink()
+        sink.emit('fetching')
+        self.assertFalse(self.job.logs.exists())
+        sink.emit('page failed', 'ERROR')
+        self.assertEqual(self.job.logs.count(), 2)
+        self.assertEqual(sink.buffer, [])
+
+    def test_failed_flush_keeps_entries(self):
+        sink = self.sink()
+        sink.emit('kept')
+        with mock.patch.object(ScraperLog.objects, 'bulk_create', side_effect=DatabaseError('locked')):
+            self.assertEqual(sink.flush(), 0)
+        self.assertEqual(len(sink.buffer), 1)
+        self.assertIsNotNone(sink.timer)
+        self.assertEqual(sink.close(), 1)
+        self.assertIsNone(sink.timer)
+        self.assertEqual(list(self.job.logs.values_list('message', flat=True)), ['kept'])
+
+    def test_close_records_dropped_entries(self):
+        self.job.log_level = 'WARNING'
+        sink = self.sink()
+        sink.emit('chatter')
+        sink.emit('odd page', 'WARNING')
+        self.assertEqual(sink.close(), 2)
+        self.assertEqual(self.job.logs.filter(message__startswith='Dropped 1 log entries').count(), 1)
+
+
+class LogBufferTimerTests(TransactionTestCase):
+    """A job that goes quiet still has its entries written after the flush interval."""
+
+    def test_flushes_on_timer(self):
+        job = ScraperJob.objects.create(job_type='LIVE', url='http://127.0.0.1/live')
+        sink = BufferedLogSink(job, max_entries=100, flush_interval=0.1)
+        self.addCleanup(sink.close)
+        sink.emit('polling')
+        timer = sink.timer
+        self.assertFalse(job.logs.exists())
+        # Reading while the timer's thread writes can hit SQLite's table lock
+        timer.join(5)
+        self.assertEqual(list(job.logs.values_list('message', flat=True)), ['polling'])
+        self.assertIsNone(sink.timer)
+
+
+class StoppableScraper:
+    """Stands in for a live scraper: runs until stopped or ``duration`` is up."""
+
+    log_sink = None
+
+    def __init__(self, duration=5):
+        self.duration = duration
+        self.stopped = threading.Event()
+        self.finished = None
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        self.stopped.wait(self.duration)
+        self.finished = 'stopped' if self.stopped.is_set() else 'ran out'
+
+    def finish_job(self, status='COMPLETED', error_message=None):
+        self.finished = status
+
+
+class JobQueueTests(TestCase):
+    """Claims go through signals, and jobs orphaned by a dead worker don't stay RUNNING."""
+
+    def setUp(self):
+        self.job = ScraperJob.objects.create(job_type='MATCH', url='http://127.0.0.1/matches')
+
+    def test_claim_sends_post_save(self):
+        saved = []
+        receiver = lambda sender, instance, **kwargs: saved.append((instance.pk, instance.status))
+        post_save.connect(receiver, sender=ScraperJob)
+        self.addCleanup(post_save.disconnect, receiver, sender=ScraperJob)
+        job = claim_next_job('worker-1')
+        self.assertEqual((job.pk, job.status, job.claimed_by), (self.job.pk, 'RUNNING', 'worker-1'))
+        self.assertEqual(saved, [(self.job.pk, 'RUNNING')])
+        self.assertIsNone(claim_next_job('worker-2'))
+
+    def test_reaps_jobs_past_their_lease(self):
+        fresh = ScraperJob.objects.create(job_type='TEAM', url='http://127.0.0.1/teams', status='RUNNING')
+        ScraperJob.objects.filter(pk=self.job.pk).update(
+            status='RUNNING', claimed_by='host:1:0', updated_at=timezone.now() - timedelta(minutes=10)
+        )
+        self.assertEqual([job.pk for job in reap_stale_jobs(lease=300)], [self.job.pk])
+        self.job.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(self.job.status, 'FAILED')
+        self.assertIn('host:1:0', self.job.error_message)
+        self.assertIsNotNone(self.job.end_time)
+        self.assertEqual(fresh.status, 'RUNNING')
+        self.assertEqual(reap_stale_jobs(lease=300), [])
+
+    def test_fails_jobs_of_dead_workers(self):
+        ScraperJob.objects.filter(pk=self.job.pk).update(status='RUNNING', claimed_by='host:1:0')
+        other = ScraperJob.objects.create(job_type='TEAM', url='http://127.0.0.1/teams', status='RUNNING',
+                                          claimed_by='host:2:1')
+        self.assertEqual([job.pk for job in fail_worker_jobs(['host:1:0'], 'was killed')], [self.job.pk])
+        self.assertEqual(ScraperJob.objects.get(pk=self.job.pk).status, 'FAILED')
+        self.assertEqual(ScraperJob.objects.get(pk=other.pk).status, 'RUNNING')
+
+    def test_worker_stop_reaches_scraper(self):
+        scraper = StoppableScraper()
+        stop_event = threading.Event()
+        stop_event.set()
+        started = time.monotonic()
+        with mock.patch('scraper.scrapers.get_scraper', return_value=scraper):
+            run_job(self.job, stop_event)
+        self.assertEqual(scraper.finished, 'stopped')
+        self.assertLess(time.monotonic() - started, 3)
+
+
+@override_settings(ROOT_URLCONF='scraper.urls')
+class JobApiTests(APITestCase):
+    """The job endpoints queue work for the workers and page logs over HTTP."""
+
+    def setUp(self):
+        self.job = ScraperJob.objects.create(job_type='MATCH', url='http://127.0.0.1/matches', status='FAILED',
+                                             error_message='boom', claimed_by='host:1:0')
+        self.client.force_authenticate(User.objects.create_user('operator'))
+
+    def test_run_queues_job(self):
+        response = self.client.post(f'/jobs/{self.job.pk}/run/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'status': 'Job queued', 'job_id': self.job.pk})
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error_message, self.job.claimed_by), ('PENDING', None, None))
+
+    def test_run_refuses_running_job(self):
+        ScraperJob.objects.filter(pk=self.job.pk).update(status='RUNNING')
+        response = self.client.post(f'/jobs/{self.job.pk}/run/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ScraperJob.objects.get(pk=self.job.pk).status, 'RUNNING')
+
+    def test_logs_are_paged(self):
+        ScraperLog.objects.bulk_create(
+            ScraperLog(job=self.job, level='INFO', message=f'line {i}') for i in range(5)
+        )
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(f'/jobs/{self.job.pk}/logs/', params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body['results']), 2)
+            seen += [row['message'] for row in body['results']]
+            cursor = body['next']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), [f'line {i}' for i in range(5)])
+        response = self.client.get(f'/jobs/{self.job.pk}/logs/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConcurrentJobQueueTests(TransactionTestCase):
+    """Workers racing for the queue never run a job twice, and running jobs keep their lease."""
+
+    def test_each_job_claimed_once(self):
+        jobs = [ScraperJob.objects.create(job_type='TEAM', url=f'http://127.0.0.1/teams/{i}') for i in range(40)]
+        claimed = []
+        barrier = threading.Barrier(6)
+
+        def worker(worker_id):
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        job = claim_next_job(worker_id)
+                    except OperationalError:
+                        # The shared-cache test database refuses a lock rather than waiting for it
+                        time.sleep(0.001)
+                        continue
+                    if job is None:
+                        return
+                    claimed.append((job.pk, worker_id))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(f'worker-{i}',)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = [job_id for job_id, _ in claimed]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), [job.pk for job in jobs])
+        self.assertEqual(
+            dict(ScraperJob.objects.values_list('id', 'claimed_by')), dict(claimed)
+        )
+
+    @override_settings(SCRAPER_JOB_LEASE=0.5)
+    def test_running_job_renews_lease(self):
+        job = ScraperJob.objects.create(job_type='LIVE', url='http://127.0.0.1/live')
+        job = claim_next_job('worker-1')
+        claimed_at = job.updated_at
+        with mock.patch('scraper.scrapers.get_scraper', return_value=StoppableScraper(duration=0.6)):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertGreater(job.updated_at, claimed_at + timedelta(seconds=0.4))
+        self.assertEqual(reap_stale_jobs(), [])
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime(2025, 4, day, hour, minute))
+
+
+class MatchCalendarTests(SimpleTestCase):
+    """Match windows open an hour before a start and close five hours after it."""
+
+    def setUp(self):
+        self.calendar = MatchCalendar([at(12, 19, 30), at(10, 15, 30)])
+
+    def test_in_window(self):
+        self.assertFalse(self.calendar.in_window(at(10, 14, 29)))
+        self.assertTrue(self.calendar.in_window(at(10, 14, 30)))
+        self.assertTrue(self.calendar.in_window(at(10, 20, 30)))
+        self.assertFalse(self.calendar.in_window(at(10, 20, 31)))
+        self.assertFalse(MatchCalendar([]).in_window(at(10, 15, 30)))
+
+    def test_next_window_start(self):
+        self.assertEqual(self.calendar.next_window_start(at(10, 12)), at(10, 14, 30))
+        self.assertEqual(self.calendar.next_window_start(at(10, 16)), at(12, 18, 30))
+        self.assertIsNone(self.calendar.next_window_start(at(12, 19)))
+
+    def test_has_match_on(self):
+        self.assertTrue(self.calendar.has_match_on(date(2025, 4, 10)))
+        self.assertFalse(self.calendar.has_match_on(date(2025, 4, 11)))
+        self.assertTrue(self.calendar.has_match_on(date(2025, 4, 12)))
+
+
+class NextRunTests(SimpleTestCase):
+    """Configs are polled more often around matches and less on quiet days."""
+
+    def setUp(self):
+        self.calendar = MatchCalendar([at(10, 15, 30), at(12, 19, 30)])
+
+    def next_run(self, frequency, scraper_type, now):
+        return compute_next_run(frequency, scraper_type, now, self.calendar)
+
+    def test_match_day_configs_run_only_in_windows(self):
+        self.assertEqual(self.next_run('MATCH_DAY', 'TEAM', at(10, 16)), at(10, 16, 15))
+        self.assertEqual(self.next_run('MATCH_DAY', 'TEAM', at(10, 12)), at(10, 14, 30))
+        self.assertEqual(self.next_run('MATCH_DAY', 'TEAM', at(13, 12)), at(14, 12))
+
+    def test_match_data_polled_during_windows(self):
+        self.assertEqual(self.next_run('DAILY', 'MATCH', at(10, 16)), at(10, 16, 15))
+        self.assertEqual(self.next_run('DAILY', 'TEAM', at(10, 16)), at(11, 16))
+        # The next window opens before the daily run would
+        self.assertEqual(self.next_run('DAILY', 'LIVE', at(10, 12)), at(10, 14, 30))
+
+    @override_settings(SCRAPER_SCHEDULER_IDLE_BACKOFF=3)
+    def test_hourly_backs_off_without_matches(self):
+        self.assertEqual(self.next_run('HOURLY', 'TEAM', at(10, 9)), at(10, 10))
+        self.assertEqual(self.next_run('HOURLY', 'TEAM', at(11, 9)), at(11, 12))
+
+
+class SchedulerTests(TestCase):
+    """Due configs get one queued job each, and removed configs stop getting them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = DataSource.objects.create(name='Fixtures', base_url='http://127.0.0.1/')
+        cls.teams = ScraperConfig.objects.create(
+            data_source=source, scraper_type='TEAM', url_pattern='http://127.0.0.1/teams', frequency='DAILY'
+        )
+        cls.stadiums = ScraperConfig.objects.create(
+            data_source=source, scraper_type='STADIUM', url_pattern='http://127.0.0.1/stadiums', frequency='WEEKLY'
+        )
+        ScraperConfig.objects.create(
+            data_source=source, scraper_type='MATCH', url_pattern='http://127.0.0.1/matches', frequency='DAILY',
+            is_active=False,
+        )
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.scheduler = Scheduler(refresh_interval=timedelta(0))
+
+    def test_enqueues_due_configs_once(self):
+        jobs = self.scheduler.tick(self.now)
+        self.assertEqual(sorted(job.config_id for job in jobs), [self.teams.pk, self.stadiums.pk])
+        self.teams.refresh_from_db()
+        self.assertEqual(self.teams.next_run, self.now + timedelta(days=1))
+        self.assertEqual(self.scheduler.tick(self.now + timedelta(hours=1)), [])
+
+    def test_skips_config_with_queued_job(self):
+        self.scheduler.tick(self.now)
+        ScraperJob.objects.filter(config=self.stadiums).update(status='COMPLETED')
+        jobs = self.scheduler.tick(self.now + timedelta(weeks=1))
+        # The teams job from the first tick is still PENDING
+        self.assertEqual([job.config_id for job in jobs], [self.stadiums.pk])
+        self.assertEqual(ScraperJob.objects.filter(config=self.teams).count(), 1)
+
+    def test_drops_deactivated_and_deleted_configs(self):
+        self.scheduler.tick(self.now)
+        ScraperJob.objects.update(status='COMPLETED')
+        self.teams.is_active = False
+        self.teams.save()
+        self.stadiums.delete()
+        with self.assertNumQueries(3):
+            # Calendar, changed configs and the id list; nothing is due
+            self.scheduler.refresh(self.now + timedelta(minutes=5))
+        self.assertEqual(self.scheduler.configs, {})
+        self.assertEqual(self.scheduler.tick(self.now + timedelta(weeks=2)), [])
+
+    def test_enqueue_error_spares_other_configs(self):
+        enqueue = Scheduler.enqueue
+
+        def flaky(scheduler, config_id, entry, now):
+            if config_id == self.stadiums.pk:
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return enqueue(scheduler, config_id, entry, now)
+
+        with mock.patch.object(Scheduler, 'enqueue', flaky):
+            jobs = self.scheduler.tick(self.now)
+        self.assertEqual([job.config_id for job in jobs], [self.teams.pk])
+        self.assertNotIn(self.stadiums.pk, self.scheduler.configs)
+        self.assertIn(self.teams.pk, self.scheduler.configs)
+
+
+def render_live_page(status, innings):
+    """A live match page; ``innings`` maps numbers to (batting, bowling, runs, {player: runs})."""
+    containers = []
+    for number, (batting, bowling, runs, scores) in innings.items():
+        rows = ''.join(
+            f'<div class="performance-row"><span class="player-name">{name}</span>'
+            f'<span class="runs-scored">{score}</span><span class="fours">1</span></div>'
+            for name, score in scores.items()
+        )
+        containers.append(
+            f'<div class="innings-container" data-innings="{number}"><span class="batting-team">{batting}</span>'
+            f'<span class="bowling-team">{bowling}</span><span class="innings-runs">{runs}</span>'
+            f'<span class="innings-overs">12.3</span>{rows}</div>'
+        )
+    return (
+        '<html><body><div class="live-match"><div class="match-header"><span class="match-number">Match #7</span>'
+        f'<span class="season">2025</span><span class="match-status">{status}</span></div>'
+        f'{"".join(containers)}</div></body></html>'
+    )
+
+
+class LiveScraperTests(TestCase):
+    """Each poll writes only what changed, and odd scorecard entries are skipped."""
+
+    @classmethod
+    def setUpTestData(cls):
+        home = Team.objects.create(name='Home', short_name='HOM')
+        away = Team.objects.create(name='Away', short_name='AWY')
+        cls.players = {
+            name: Player.objects.create(name=name, team=team, role='BAT', nationality='India')
+            for name, team in [('Opener', home), ('Keeper', home), ('Bowler', away)]
+        }
+        cls.match = Match.objects.create(
+            match_number=7, season=2025, date=date(2025, 4, 7), time=datetime(2025, 4, 7, 19, 30).time(),
+            team_home=home, team_away=away, venue=Stadium.objects.create(name='Ground', city='City'),
+        )
+        innings = Innings.objects.create(match=cls.match, innings_number=1, batting_team=home, bowling_team=away)
+        PlayerPerformance.objects.create(player=cls.players['Opener'], match=cls.match, innings=innings, runs_scored=4)
+
+    def setUp(self):
+        self.scraper = LiveMatchScraper()
+
+    def poll(self, status, innings):
+        page = self.scraper.parse_page(self.scraper.parse(render_live_page(status, innings)))
+        if self.scraper.match is None:
+            self.scraper.load_match(page)
+        return self.scraper.apply(page)
+
+    def test_applies_only_differences(self):
+        self.assertEqual(self.poll('Live', {1: ('Home', 'Away', 40, {'Opener': 30})}), 3)
+        self.assertEqual(Match.objects.get(pk=self.match.pk).status, 'LIVE')
+        innings = Innings.objects.get(match=self.match, innings_number=1)
+        self.assertEqual((innings.runs, innings.overs), (40, 12.3))
+        opener = PlayerPerformance.objects.get(player=self.players['Opener'])
+        self.assertEqual((opener.runs_scored, opener.fours), (30, 1))
+
+        # An unchanged page costs nothing
+        with self.assertNumQueries(0):
+            self.assertEqual(self.poll('Live', {1: ('Home', 'Away', 40, {'Opener': 30})}), 0)
+
+        # One run more is a single-column UPDATE of the innings and of the player
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.poll('Live', {1: ('Home', 'Away', 41, {'Opener': 31})}), 2)
+        updates = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertIn('"runs" = 41', updates[0])
+        self.assertNotIn('"overs"', updates[0])
+        self.assertIn('"runs_scored" = 31', updates[1])
+        self.assertNotIn('"fours"', updates[1])
+
+    def test_new_rows_are_created(self):
+        self.poll('Live', {
+            1: ('Home', 'Away', 40, {'Opener': 4, 'Keeper': 12}),
+            2: ('Away', 'Home', 10, {'Bowler': 10}),
+        })
+        self.assertEqual(
+            set(PlayerPerformance.objects.values_list('player__name', 'innings__innings_number', 'runs_scored')),
+            {('Opener', 1, 4), ('Keeper', 1, 12), ('Bowler', 2, 10)}
+        )
+        self.assertEqual(self.poll('Completed', {}), 1)
+        self.assertEqual(self.scraper.status, 'COMPLETED')
+
+    def test_unknown_teams_and_players_are_skipped(self):
+        writes = self.poll('Live', {
+            1: ('Home', 'Away', 40, {'Opener': 30, 'Substitute': 5}),
+            2: ('Visitors XI', 'Home', 10, {'Bowler': 10}),
+        })
+        self.assertEqual(writes, 3)
+        self.assertFalse(Innings.objects.filter(innings_number=2).exists())
+        self.assertFalse(PlayerPerformance.objects.filter(player=self.players['Bowler']).exists())
+        self.assertEqual(self.scraper.skipped, {('player', 'Substitute'), ('innings', 2)})
+        # Reported once, however many polls repeat them
+        self.poll('Live', {2: ('Visitors XI', 'Home', 12, {'Bowler': 12})})
+        self.assertEqual(len(self.scraper.skipped), 2)
+
+    def test_poll_expires_memoized_predictions(self):
+        marks = memo.match_marks[self.match.pk]
+        with FixtureServer() as server:
+            with mock.patch.dict(PAGE_RENDERERS, live=lambda: render_live_page('Live', {1: ('Home', 'Away', 9, {})})):
+                self.scraper.fetcher = AsyncFetcher(session=build_session())
+                self.assertTrue(self.scraper.poll(f'{server.base_url}/live/7'))
+        self.assertEqual(Innings.objects.get(match=self.match, innings_number=1).runs, 9)
+        self.assertGreater(memo.match_marks[self.match.pk], marks)
+
+
+class IndexUsageTests(TestCase):
+    """The queue, scheduler, log and dashboard queries are served by an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = DataSource.objects.create(name='Fixtures', base_url='http://127.0.0.1/')
+        cls.config = ScraperConfig.objects.create(
+            data_source=source, scraper_type='MATCH', url_pattern='http://127.0.0.1/matches', frequency='DAILY'
+        )
+        cls.job = ScraperJob.objects.create(job_type='MATCH', url='http://127.0.0.1/matches', config=cls.config)
+        ScraperLog.objects.create(job=cls.job, level='INFO', message='Started')
+
+    def test_hot_queries_use_indexes(self):
+        now = timezone.now()
+        queries = {
+            'claim next job': ScraperJob.objects.filter(status='PENDING', scheduled_time__lte=now).order_by('scheduled_time', 'id'),
+            'stale running jobs': ScraperJob.objects.filter(status='RUNNING', updated_at__lt=now),
+            'config has queued job': ScraperJob.objects.filter(config=self.config, status__in=['PENDING', 'RUNNING']),
+            'completed jobs for metrics': ScraperJob.objects.filter(status='COMPLETED', end_time__gte=now),
+            'recent jobs': ScraperJob.objects.order_by('-created_at')[:10],
+            'job logs': ScraperLog.objects.filter(job=self.job).order_by('-timestamp', '-id')[:50],
+            'recent logs': ScraperLog.objects.order_by('-timestamp', '-id')[:10],
+            'scheduler refresh': ScraperConfig.objects.order_by().filter(updated_at__gt=now),
+        }
+        for label, queryset in queries.items():
+            with self.subTest(query=label):
+                self.assertEqual(full_scans(queryset), [], queryset.explain())
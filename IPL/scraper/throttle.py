@@ -0,0 +1,435 @@
+import os
+import re
+import time
+import struct
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: buckets can't be shared and stay per process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Rotated when a data source doesn't configure its own user agents
+DEFAULT_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+]
+
+# Responses that mean the host wants us to slow down
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Responses that count against the proxy and user agent that got them
+BLOCKED_STATUS_CODES = {403, 407, 429}
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+class ProxiesExhausted(requests.exceptions.ConnectionError):
+    """Every configured proxy has been evicted; requests must not go out directly."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` requests per second with bursts of ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        if not rate or rate <= 0:
+            raise ValueError(f'Rate limit must be positive, not {rate!r}')
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.tokens = self.burst
+        self.updated = self.clock()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def clock(self):
+        return time.monotonic()
+
+    @contextmanager
+    def locked(self):
+        """Hold the bucket's state for one operation."""
+        with self.lock:
+            yield
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + max(now - self.updated, 0) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available right now."""
+        with self.locked():
+            now = self.clock()
+            self._refill(now)
+            if now < self.paused_until or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.locked():
+                now = self.clock()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hand out no tokens for ``seconds``, e.g. after a Retry-After."""
+        with self.locked():
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0
+
+
+# Tokens, last refill and end of pause, as wall-clock seconds
+BUCKET_STATE = struct.Struct('ddd')
+
+
+class SharedTokenBucket(TokenBucket):
+    """A TokenBucket kept in a file, so every process on the machine draws from it.
+
+    Each operation takes an exclusive lock on the file, reads the state,
+    and writes it back, so worker processes together stay within ``rate``.
+    """
+
+    def __init__(self, path, rate, burst=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(rate, burst)
+
+    def clock(self):
+        # Compared across processes and kept across restarts
+        return time.time()
+
+    @contextmanager
+    def locked(self):
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.pread(fd, BUCKET_STATE.size, 0)
+                if len(data) == BUCKET_STATE.size:
+                    self.tokens, self.updated, self.paused_until = BUCKET_STATE.unpack(data)
+                    # Another process may have a smaller burst configured
+                    self.tokens = min(self.tokens, self.burst)
+                else:
+                    self.tokens, self.updated, self.paused_until = self.burst, self.clock(), 0.0
+                yield
+                os.pwrite(fd, BUCKET_STATE.pack(self.tokens, self.updated, self.paused_until), 0)
+            finally:
+                os.close(fd)
+
+
+def make_bucket(host, rate, burst=None):
+    """The token bucket for a host: shared through SCRAPER_THROTTLE_DIR when set, else per process."""
+    directory = getattr(settings, 'SCRAPER_THROTTLE_DIR', settings.BASE_DIR / 'scraper_throttle')
+    if directory and fcntl is not None:
+        name = re.sub(r'[^\w.-]', '_', host)
+        return SharedTokenBucket(Path(directory) / f'{name}.bucket', rate, burst)
+    return TokenBucket(rate, burst)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of requests in flight to one host.
+
+    Every successful response grows the limit by ``1 / limit`` (about one
+    slot per round trip); an overload response, an error or a response
+    slower than ``latency_target`` halves it. Decreases are spaced by
+    ``cooldown`` seconds so one burst of failures only halves it once.
+    """
+
+    def __init__(self, maximum, minimum=1, latency_target=5.0, cooldown=1.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def record(self, overloaded, elapsed=0.0):
+        with self.condition:
+            if overloaded or (self.latency_target and elapsed > self.latency_target):
+                now = time.monotonic()
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class RotationPool:
+    """Pool of interchangeable identities (proxies, user agents) scored by health.
+
+    Each item's score is an exponentially weighted success rate. Items are
+    picked at random weighted by score, and evicted once they have been
+    used ``min_samples`` times and their score falls below ``min_score``.
+    Once every item has been evicted, they are all given another chance
+    ``readmit_after`` seconds after the last eviction.
+    """
+
+    def __init__(self, items, min_score=0.3, min_samples=5, decay=0.2, readmit_after=300):
+        self.scores = {item: 1.0 for item in items}
+        self.uses = {item: 0 for item in items}
+        self.evicted = []
+        self.min_score = min_score
+        self.min_samples = min_samples
+        self.decay = decay
+        self.readmit_after = readmit_after
+        self.last_eviction = 0.0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def choose(self):
+        """Pick a healthy item, or None when the pool was configured empty.
+
+        Raises ProxiesExhausted while every item is evicted.
+        """
+        with self.lock:
+            if not self.scores:
+                if not self.evicted:
+                    return None
+                if time.monotonic() - self.last_eviction < self.readmit_after:
+                    raise ProxiesExhausted(f'All {len(self.evicted)} proxies or identities are evicted')
+                logger.warning(f"Readmitting {len(self.evicted)} evicted items on probation")
+                for item in self.evicted:
+                    self.scores[item] = self.min_score
+                    self.uses[item] = 0
+                self.evicted = []
+            items = list(self.scores)
+            return random.choices(items, weights=[self.scores[item] + 0.01 for item in items])[0]
+
+    def report(self, item, ok):
+        """Record the outcome of a request made with ``item``."""
+        with self.lock:
+            if item not in self.scores:
+                return
+            self.uses[item] += 1
+            self.scores[item] = (1 - self.decay) * self.scores[item] + self.decay * (1.0 if ok else 0.0)
+            if self.uses[item] >= self.min_samples and self.scores[item] < self.min_score:
+                logger.warning(f"Evicting {item} after {self.uses[item]} uses, health {self.scores[item]:.2f}")
+                del self.scores[item]
+                self.evicted.append(item)
+                self.last_eviction = time.monotonic()
+
+
+class HostStats:
+    """Request, error and throttling counts for one host."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, status_code=None, elapsed=0.0, error=False, waited=0.0):
+        with self.lock:
+            self.requests += 1
+            self.latency += elapsed
+            self.waited += waited
+            if error or status_code is None or status_code >= 400:
+                self.errors += 1
+            if status_code == 429:
+                self.throttled += 1
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            'requests': self.requests,
+            'requests_per_second': self.requests / elapsed,
+            'error_rate': self.errors / self.requests if self.requests else 0.0,
+            'throttled': self.throttled,
+            'avg_latency': self.latency / self.requests if self.requests else 0.0,
+            'rate_limit_wait': self.waited,
+        }
+
+
+class HostThrottle:
+    """Rate limit, adaptive concurrency and identity rotation for one host.
+
+    The rate limit is shared with the other processes on the machine (see
+    make_bucket); the concurrency limit is this process's share of
+    ``max_concurrency``, one slot at least.
+    """
+
+    def __init__(self, host, rate, max_concurrency, proxies=None, user_agents=None, burst=None, bucket=None):
+        self.host = host
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.proxies = RotationPool(proxies or [])
+        self.user_agents = RotationPool(user_agents or DEFAULT_USER_AGENTS, min_samples=10)
+        self.stats = HostStats()
+
+    @contextmanager
+    def slot(self):
+        """Wait for a concurrency slot and a token; yields the seconds spent waiting."""
+        started = time.monotonic()
+        self.concurrency.acquire()
+        try:
+            self.bucket.acquire()
+            yield time.monotonic() - started
+        finally:
+            self.concurrency.release()
+
+    def choose_identity(self):
+        """Pick a (proxy, user agent) pair; proxy is None for a direct connection.
+
+        Raises ProxiesExhausted rather than going direct when proxies are
+        configured but all evicted; the fetcher retries it with backoff.
+        """
+        return self.proxies.choose(), self.user_agents.choose()
+
+    def record(self, proxy, user_agent, status_code=None, elapsed=0.0, retry_after=None, waited=0.0):
+        """Feed a response (or a failure, with no status code) back into the controllers."""
+        failed = status_code is None
+        overloaded = failed or status_code in OVERLOAD_STATUS_CODES
+        blocked = failed or status_code in BLOCKED_STATUS_CODES
+        self.concurrency.record(overloaded, elapsed)
+        if proxy is not None:
+            self.proxies.report(proxy, not blocked)
+        if status_code is not None:
+            # A connection failure says nothing about the user agent
+            self.user_agents.report(user_agent, status_code not in BLOCKED_STATUS_CODES)
+        if retry_after:
+            self.bucket.pause(retry_after)
+        self.stats.record(status_code, elapsed, error=failed, waited=waited)
+
+    def snapshot(self):
+        data = self.stats.snapshot()
+        data.update({
+            'host': self.host,
+            'rate_limit': self.bucket.rate,
+            'concurrency_limit': self.concurrency.limit,
+            'proxies': len(self.proxies),
+            'proxies_evicted': len(self.proxies.evicted),
+            'user_agents': len(self.user_agents),
+        })
+        return data
+
+
+class ThrottleRegistry:
+    """Process-wide HostThrottles, keyed by host.
+
+    Hosts that belong to a DataSource use its limits and identities once it
+    has been passed to ``configure()``; any other host gets the
+    SCRAPER_RATE_LIMIT / SCRAPER_HOST_CONCURRENCY defaults. Rate limits
+    hold across processes; concurrency limits are divided by ``workers``,
+    the number of worker processes sharing the host.
+    """
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.throttles = {}
+        self.lock = threading.Lock()
+
+    def build(self, host, rate, max_concurrency, proxies=None, user_agents=None):
+        if not rate or rate <= 0:
+            default = getattr(settings, 'SCRAPER_RATE_LIMIT', 2.0)
+            logger.warning(f"Invalid rate limit {rate!r} for {host}, using {default}")
+            rate = default
+        return HostThrottle(
+            host,
+            rate=rate,
+            max_concurrency=max(1, (max_concurrency or 1) // self.workers),
+            proxies=proxies,
+            user_agents=user_agents,
+            bucket=make_bucket(host, rate),
+        )
+
+    def configure(self, data_source):
+        """Create or update the throttle for a DataSource's host."""
+        host = host_of(data_source.base_url)
+        throttle = self.build(
+            host,
+            rate=data_source.requests_per_second,
+            max_concurrency=data_source.max_concurrency,
+            proxies=data_source.proxies,
+            user_agents=data_source.user_agents,
+        )
+        with self.lock:
+            current = self.throttles.get(host)
+            if current is not None and self._same_config(current, throttle):
+                return current
+            self.throttles[host] = throttle
+        return throttle
+
+    def _same_config(self, current, throttle):
+        # Keep the learned state unless the DataSource was edited
+        return (
+            current.bucket.rate == throttle.bucket.rate
+            and current.concurrency.maximum == throttle.concurrency.maximum
+            and set(current.proxies.scores) | set(current.proxies.evicted) == set(throttle.proxies.scores)
+            and set(current.user_agents.scores) | set(current.user_agents.evicted) == set(throttle.user_agents.scores)
+        )
+
+    def for_url(self, url):
+        host = host_of(url)
+        with self.lock:
+            throttle = self.throttles.get(host)
+            if throttle is None:
+                throttle = self.build(
+                    host,
+                    rate=getattr(settings, 'SCRAPER_RATE_LIMIT', 2.0),
+                    max_concurrency=getattr(settings, 'SCRAPER_HOST_CONCURRENCY', 4),
+                    proxies=getattr(settings, 'SCRAPER_PROXIES', None),
+                    user_agents=getattr(settings, 'SCRAPER_USER_AGENTS', None),
+                )
+                self.throttles[host] = throttle
+            return throttle
+
+    def snapshot(self):
+        with self.lock:
+            throttles = list(self.throttles.values())
+        return [throttle.snapshot() for throttle in throttles]
+
+
+_registry = None
+
+def get_throttles(workers=None):
+    """Get the process-wide throttle registry.
+
+    Worker processes pass how many of them there are, once, before the
+    first request.
+    """
+    global _registry
+    if _registry is None:
+        _registry = ThrottleRegistry()
+    if workers:
+        _registry.workers = workers
+    return _registry
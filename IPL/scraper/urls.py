@@ -0,0 +1,13 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ScraperJobViewSet, ScraperLogViewSet, DataSourceViewSet, ScraperConfigViewSet
+
+router = DefaultRouter()
+router.register(r'jobs', ScraperJobViewSet)
+router.register(r'logs', ScraperLogViewSet)
+router.register(r'sources', DataSourceViewSet)
+router.register(r'configs', ScraperConfigViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
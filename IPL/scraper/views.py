@@ -1,14 +1,18 @@
+import binascii
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
+from api.pagination import keyset_page
 from .models import ScraperJob, ScraperLog, DataSource, ScraperConfig
 from .serializers import (
     ScraperJobSerializer, ScraperLogSerializer, 
     DataSourceSerializer, ScraperConfigSerializer
 )
-from .scrapers import get_scraper
+from .jobqueue import enqueue_job
+from .pagination import ScraperLogPagination
 
 class ScraperJobViewSet(viewsets.ModelViewSet):
     """
@@ -23,7 +27,7 @@ class ScraperJobViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def run(self, request, pk=None):
-        """Run a specific scraper job."""
+        """Queue a specific scraper job for the workers to run."""
         job = self.get_object()
         
         if job.status == 'RUNNING':
@@ -32,31 +36,38 @@ class ScraperJobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Reset job status
-        job.status = 'PENDING'
-        job.start_time = None
-        job.end_time = None
-        job.error_message = None
-        job.save()
+        # Reset job status; a `run_scraper --worker` process picks it up
+        enqueue_job(job)
         
-        # Run the job
-        scraper = get_scraper(job.job_type, job.id)
-        if scraper:
-            scraper.run()
-            return Response({'status': 'Job completed'})
-        else:
-            return Response(
-                {'error': 'Failed to create scraper'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(
+            {'status': 'Job queued', 'job_id': job.id},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['get'])
     def logs(self, request, pk=None):
-        """Get logs for a specific job."""
+        """Get logs for a specific job, newest first, a page at a time.
+        
+        ``cursor`` continues after the last row of the previous page, as
+        returned in ``next``; ``page_size`` is capped like the log list's.
+        """
         job = self.get_object()
+        try:
+            page_size = int(request.query_params.get('page_size', ScraperLogPagination.page_size))
+        except ValueError:
+            page_size = ScraperLogPagination.page_size
+        page_size = max(1, min(page_size, ScraperLogPagination.max_page_size))
+        
         logs = ScraperLog.objects.filter(job=job)
+        try:
+            logs, next_cursor = keyset_page(
+                logs, ScraperLogPagination.ordering, request.query_params.get('cursor'), page_size
+            )
+        except (ValueError, binascii.Error, DjangoValidationError):
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        
         serializer = ScraperLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        return Response({'next': next_cursor, 'results': serializer.data})
 
 class ScraperLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -64,6 +75,7 @@ class ScraperLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = ScraperLog.objects.all()
     serializer_class = ScraperLogSerializer
+    pagination_class = ScraperLogPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['job', 'level']
     search_fields = ['message']
@@ -108,6 +120,7 @@ class ScraperConfigViewSet(viewsets.ModelViewSet):
         job = ScraperJob.objects.create(
             job_type=config.scraper_type,
             url=config.url_pattern,
+            config=config,
             status='PENDING',
             scheduled_time=timezone.now()
         )